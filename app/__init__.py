@@ -111,6 +111,18 @@ def create_app():
         app.register_blueprint(page)
         app.register_blueprint(tasks_bp, url_prefix="/tasks")
 
+        # ✅ Emit buffered WebSocket events only after the request's commit
+        from app.utils.socket_events import init_socket_events
+        init_socket_events(app)
+
+        # ✅ `flask repair-project-stats` rebuilds the maintained project totals
+        from app.tasks.stats import repair_project_stats_command
+        app.cli.add_command(repair_project_stats_command)
+
+        # ✅ `flask prune-task-changes` keeps the delta sync change log bounded
+        from app.tasks.changes import prune_task_changes_command
+        app.cli.add_command(prune_task_changes_command)
+
         logger.info("Blueprints registered successfully")
         
         # # ✅ Set CSRF token in response cookie after every request
@@ -2,33 +2,62 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import io
-import base64
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from app.charts.renderer import cached_chart_url
+from app.extensions.db import db
 from app.models import Project  # Replace `your_application` with your actual application/module name
+from app.tasks.models import Task
+
+
+def burnup_chart_params(project):
+    """
+    Collects everything the burn-up chart of a project depends on, as plain JSON values.
+
+    Only the completed tasks' dates and points are read, not the project's tasks.
+    """
+    completed = db.session.query(Task.completed_date, Task.story_points).filter(
+        Task.project_id == project.id, Task.completed.is_(True)
+    ).order_by(Task.completed_date, Task.id).all()
+    return {
+        "project_name": project.name,
+        "start_date": project.start_date.isoformat(),
+        "end_date": project.end_date.isoformat(),
+        "total_scope": project.total_story_points,
+        "completed": [[completed_date.isoformat() if completed_date else None, points] for completed_date, points in completed],
+        "today": datetime.now().date().isoformat(),  # ✅ The actual and forecast lines run up to today
+    }
+
 
 # Function to generate burn-up chart
 def generate_burnup_chart(project_name):
+    """Returns the image URL of a project's burn-up chart, rendered only if not cached yet."""
     current_project = Project.query.filter_by(name=project_name).first()
     if not current_project:
         return None
+    return cached_chart_url("burnup", burnup_chart_params(current_project), render_burnup_chart)
+
+
+def render_burnup_chart(params):
+    """Draws a burn-up chart from `burnup_chart_params` and returns it as PNG bytes (no app or database access)."""
+    project_name = params["project_name"]
 
     # Parse project start and end dates
-    start_date = current_project.start_date
-    end_date = current_project.end_date
-    total_scope = current_project.total_story_points
+    start_date = date.fromisoformat(params["start_date"])
+    end_date = date.fromisoformat(params["end_date"])
+    total_scope = params["total_scope"]
+    today = date.fromisoformat(params["today"])
 
     # Calculate ideal progress line
     total_days = (end_date - start_date).days or 1
     ideal_progress = [i / total_days * total_scope for i in range(total_days + 1)]
 
-    # Fetch completed points data
-    completed_points = sum(task.story_points for task in current_project.tasks if task.completed)
-    completed_points_data = [{'date': task.completed_date, 'points': task.story_points} for task in current_project.tasks if task.completed]
+    # Completed points data
+    completed_points_data = [{'date': completed_date, 'points': points} for completed_date, points in params["completed"]]
 
     # Default entry if no progress entries are available
     if not completed_points_data:
-        completed_points_data = [{'date': current_project.start_date, 'points': 0}]
+        completed_points_data = [{'date': start_date, 'points': 0}]
 
     # Create DataFrame for completed points and process cumulative progress
     completed_points_df = pd.DataFrame(completed_points_data)
@@ -36,7 +65,7 @@ def generate_burnup_chart(project_name):
     completed_points_df = completed_points_df.dropna(subset=['date']).set_index('date').resample('D').sum().cumsum()
 
     # Ensure cumulative progress does not drop by filling forward
-    date_range = pd.date_range(start=start_date, end=datetime.now().date(), freq='D')
+    date_range = pd.date_range(start=start_date, end=today, freq='D')
     completed_points_df = completed_points_df.reindex(date_range, method='ffill').fillna(0)  # Forward-fill missing values
     actual_progress = completed_points_df['points'].values
 
@@ -73,7 +102,7 @@ def generate_burnup_chart(project_name):
 
     # Forecast line calculations
     total_points_submitted = completed_points_df['points'].iloc[-1]
-    days_since_start = (datetime.now().date() - start_date).days or 1
+    days_since_start = (today - start_date).days or 1
     average_completion_rate = total_points_submitted / days_since_start if days_since_start > 0 else 0
 
     # Determine forecast only if there is progress; otherwise, skip forecast calculation
@@ -81,9 +110,9 @@ def generate_burnup_chart(project_name):
         remaining_scope = total_scope - total_points_submitted
         if remaining_scope > 0:
             days_to_completion = remaining_scope / average_completion_rate
-            forecasted_completion_date = datetime.now().date() + timedelta(days=int(days_to_completion))
+            forecasted_completion_date = today + timedelta(days=int(days_to_completion))
 
-            forecast_dates = pd.date_range(start=datetime.now().date(), end=forecasted_completion_date)
+            forecast_dates = pd.date_range(start=today, end=forecasted_completion_date)
             forecast_progress = [total_points_submitted + average_completion_rate * i for i in range(len(forecast_dates))]
 
             # Debugging outputs
@@ -126,11 +155,10 @@ def generate_burnup_chart(project_name):
     ax.spines['top'].set_linewidth(0)
     ax.spines['right'].set_linewidth(0)
 
-    # Generate the chart image as a base64 string with a transparent background
+    # Generate the chart image as PNG bytes with a transparent background
     buf = io.BytesIO()
     plt.savefig(buf, format='png', transparent=True)  # Save with a transparent background
-    buf.seek(0)
-    chart_url = base64.b64encode(buf.getvalue()).decode('utf-8')
+    png = buf.getvalue()
     plt.close()
 
-    return f"data:image/png;base64,{chart_url}"
\ No newline at end of file
+    return png
\ No newline at end of file
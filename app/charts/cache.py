@@ -0,0 +1,99 @@
+# Content-addressed cache of rendered chart images (in-memory LRU in front of files under instance/)
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from flask import current_app
+from app.utils.cache_utils import LRUCache
+
+# Initialize logger for the module
+logger = logging.getLogger(__name__)
+
+CHART_CACHE_DIR = "chart_cache"  # Directory under the Flask instance folder
+CHART_MEMORY_CACHE_SIZE = 64  # Rendered PNGs kept in memory per worker
+CHART_RENDER_VERSION = 1  # Bump when a renderer's output changes, so older images are not reused
+CHART_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def chart_key(kind, params):
+    """
+    Returns the cache key of a chart: a SHA-256 of its kind and input series.
+
+    `params` must be JSON-serializable (dates as ISO strings); key order does not matter.
+    """
+    payload = json.dumps(
+        {"kind": kind, "version": CHART_RENDER_VERSION, "params": params},
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ChartCache:
+    """
+    Rendered chart PNGs by content key.
+
+    Lookups go to an in-process LRU first, then to `<instance>/chart_cache/<key>.png`,
+    which all workers share and which survives restarts. Since a key is derived
+    from the chart's inputs, an entry never goes stale and needs no invalidation.
+    """
+
+    def __init__(self, maxsize=CHART_MEMORY_CACHE_SIZE):
+        self._memory = LRUCache(maxsize=maxsize)
+
+    @staticmethod
+    def _path(key):
+        directory = os.path.join(current_app.instance_path, CHART_CACHE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{key}.png")
+
+    def get(self, key):
+        """Returns the PNG bytes stored under `key`, or None."""
+        if not CHART_KEY_PATTERN.fullmatch(key):
+            return None
+        png = self._memory.get(key)
+        if png is not None:
+            return png
+        try:
+            with open(self._path(key), "rb") as image:
+                png = image.read()
+        except FileNotFoundError:
+            return None
+        self._memory.set(key, png)
+        return png
+
+    def put(self, key, png):
+        """Stores a rendered PNG in memory and on disk (written atomically)."""
+        self._memory.set(key, png)
+        path = self._path(key)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as image:
+                image.write(png)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write chart {key} to disk: {e}")  # Still served from memory
+
+    def get_or_render(self, kind, params, render):
+        """
+        Returns the key of a chart, rendering it with `render(params)` only on a cache miss.
+
+        Args:
+            kind (str): Chart type, part of the key.
+            params (dict): The chart's complete input (JSON-serializable).
+            render (callable): Returns the PNG bytes for `params`.
+        """
+        key = chart_key(kind, params)
+        if self.get(key) is None:
+            logger.debug(f"Rendering {kind} chart {key[:12]}")
+            self.put(key, render(params))
+        return key
+
+    def clear_memory(self):
+        """Drops the in-memory copies (files on disk are kept)."""
+        self._memory.clear()
+
+
+# Shared instance used by the chart generators and the image route
+chart_cache = ChartCache()
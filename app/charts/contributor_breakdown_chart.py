@@ -2,9 +2,11 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import io
-import base64
+from app.charts.renderer import cached_chart_url
 
-def generate_contributor_breakdown_chart(assigned_contributors_count, unassigned_contributors_count):
+def render_contributor_breakdown_chart(params):
+    """Draws the contributor breakdown pie and returns it as PNG bytes (no app or database access)."""
+    assigned_contributors_count, unassigned_contributors_count = params["assigned"], params["unassigned"]
     labels = ['Assigned to project', 'Available']
 
     def format_autopct(pct, all_vals):
@@ -65,9 +67,14 @@ def generate_contributor_breakdown_chart(assigned_contributors_count, unassigned
     ax.axis('equal')
     buf = io.BytesIO()
     plt.savefig(buf, format='png', transparent=True)
-    buf.seek(0)
-    chart_data = base64.b64encode(buf.getvalue()).decode('utf-8')
+    png = buf.getvalue()
     buf.close()
     plt.close(fig)
 
-    return f"data:image/png;base64,{chart_data}"
\ No newline at end of file
+    return png
+
+
+def generate_contributor_breakdown_chart(assigned_contributors_count, unassigned_contributors_count):
+    """Returns the image URL of the contributor breakdown pie, rendered only if not cached yet."""
+    params = {"assigned": assigned_contributors_count, "unassigned": unassigned_contributors_count}
+    return cached_chart_url("contributor_breakdown", params, render_contributor_breakdown_chart)
@@ -2,12 +2,14 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import io
-import base64
 from matplotlib.patches import Circle
 from matplotlib.legend_handler import HandlerPatch
 from tabulate import tabulate
+from app.charts.renderer import cached_chart_url
 
-def generate_project_breakdown_chart(ongoing_count, completed_count, unstarted_count):
+def render_project_breakdown_chart(params):
+    """Draws the project breakdown pie and returns it as PNG bytes (no app or database access)."""
+    ongoing_count, completed_count, unstarted_count = params["ongoing"], params["completed"], params["unstarted"]
     labels = ['Active', 'Completed', 'Yet to Start']
 
     def format_autopct(pct, all_vals):
@@ -68,9 +70,14 @@ def generate_project_breakdown_chart(ongoing_count, completed_count, unstarted_c
     ax.axis('equal')
     buf = io.BytesIO()
     plt.savefig(buf, format='png', transparent=True)
-    buf.seek(0)
-    chart_data = base64.b64encode(buf.getvalue()).decode('utf-8')
+    png = buf.getvalue()
     buf.close()
     plt.close(fig)
 
-    return f"data:image/png;base64,{chart_data}"
\ No newline at end of file
+    return png
+
+
+def generate_project_breakdown_chart(ongoing_count, completed_count, unstarted_count):
+    """Returns the image URL of the project breakdown pie, rendered only if not cached yet."""
+    params = {"ongoing": ongoing_count, "completed": completed_count, "unstarted": unstarted_count}
+    return cached_chart_url("project_breakdown", params, render_project_breakdown_chart)
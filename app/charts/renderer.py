@@ -0,0 +1,195 @@
+# Chart rendering in a pool of worker processes, so matplotlib never runs on a request thread
+import base64
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app, url_for
+from app.charts.cache import CHART_KEY_PATTERN, chart_cache, chart_key
+from app.utils.cache_utils import LRUCache
+
+# Initialize logger for the module
+logger = logging.getLogger(__name__)
+
+CHART_RENDER_WORKERS = 2  # Default pool size; 0 renders on the calling thread instead
+CHART_RENDER_TIMEOUT = 20  # Default seconds an image request waits for its chart
+CHART_REQUEST_MEMORY = 256  # Recently requested charts whose inputs are kept for re-rendering
+
+# 1x1 transparent PNG served while a chart is still rendering
+PLACEHOLDER_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+
+class ChartRenderError(Exception):
+    """A chart could not be rendered in time (or at all)."""
+
+
+class ChartRenderer:
+    """
+    Renders charts in worker processes and stores the PNGs in the chart cache.
+
+    `request()` only schedules a render and returns the chart's key, so a page can
+    embed the image URL right away; the image route then `wait()`s for the PNG.
+    Concurrent requests for the same key share one in-flight render.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._executor = None
+        self._inflight = {}  # key -> Future of the render
+        self._requested = LRUCache(maxsize=CHART_REQUEST_MEMORY)  # key -> (render, params)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _workers():
+        return current_app.config.get("CHART_RENDER_WORKERS", CHART_RENDER_WORKERS)
+
+    def _get_executor(self, workers):
+        """Returns the process pool, starting it on first use (call with the lock held)."""
+        if self._executor is None:
+            # ✅ "spawn": forking a process that runs request and socket threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Started chart render pool with {workers} worker(s)")
+        return self._executor
+
+    def _reset_executor(self, executor):
+        """Drops a broken pool so the next render starts a fresh one."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, key, render, params):
+        """
+        Returns the in-flight render of `key`, submitting one if there is none.
+
+        Returns None if the chart was rendered on this thread instead (no pool configured,
+        or the pool could not take the job).
+        """
+        workers = self._workers()
+        if workers > 0:
+            with self._lock:
+                future = self._inflight.get(key)
+                if future is not None:
+                    return future  # ✅ Concurrent requests share one render
+                executor = self._get_executor(workers)
+                try:
+                    future = executor.submit(render, params)
+                except (BrokenProcessPool, RuntimeError) as e:
+                    logger.warning(f"Chart render pool unavailable, rendering inline: {e}")
+                    future = None
+                else:
+                    self._inflight[key] = future
+            if future is not None:
+                app = current_app._get_current_object()
+                # Added outside the lock: the callback runs at once if the render already finished
+                future.add_done_callback(lambda done: self._finish(app, key, executor, done))
+                return future
+            self._reset_executor(executor)
+
+        logger.debug(f"Rendering chart {key[:12]} inline")
+        self.cache.put(key, render(params))
+        return None
+
+    def _finish(self, app, key, executor, future):
+        """Stores a finished render in the cache (runs on the pool's result thread)."""
+        try:
+            if not future.cancelled():
+                png = future.result()
+                with app.app_context():
+                    self.cache.put(key, png)
+        except BrokenProcessPool as e:
+            logger.error(f"Chart render pool broke while rendering {key[:12]}: {e}")
+            self._reset_executor(executor)
+        except Exception as e:
+            logger.error(f"Rendering chart {key[:12]} failed: {e}")
+        finally:
+            # ✅ Only after the PNG is cached, so a waiter never finds neither
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+    def request(self, kind, params, render):
+        """
+        Schedules a chart unless an identical one is cached, and returns its key at once.
+
+        Args:
+            kind (str): Chart type, part of the key.
+            params (dict): The chart's complete input (JSON-serializable).
+            render (callable): A module-level function returning the PNG bytes for `params`
+                (it runs in another process, so it must be importable).
+        """
+        key = chart_key(kind, params)
+        if self.cache.get(key) is None:
+            self._requested.set(key, (render, params))
+            self._submit(key, render, params)
+        return key
+
+    def wait(self, key, timeout=None):
+        """
+        Returns the PNG of a chart, waiting for its render if needed.
+
+        Args:
+            key (str): The chart's key, as returned by `request()`.
+            timeout (float | None): Seconds to wait; defaults to `CHART_RENDER_TIMEOUT`.
+
+        Returns:
+            bytes | None: The PNG, or None if `key` is not a chart key at all.
+
+        Raises:
+            ChartRenderError: If the render failed or did not finish within the timeout, or
+                if this process does not know the key (another worker may be rendering it).
+        """
+        png = self.cache.get(key)
+        if png is not None:
+            return png
+
+        with self._lock:
+            future = self._inflight.get(key)
+        if future is None:
+            entry = self._requested.get(key)
+            if entry is None:
+                if not CHART_KEY_PATTERN.fullmatch(key):
+                    return None
+                # ✅ Requested through another worker, whose render lands in the shared disk cache
+                raise ChartRenderError(f"Chart {key} is not rendered yet.")
+            # ✅ Not cached and not rendering: a previous render failed or the cache dropped it
+            future = self._submit(key, *entry)
+            if future is None:
+                return self.cache.get(key)
+
+        if timeout is None:
+            timeout = current_app.config.get("CHART_RENDER_TIMEOUT", CHART_RENDER_TIMEOUT)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            logger.warning(f"Chart {key[:12]} not rendered within {timeout}s")
+            raise ChartRenderError(f"Chart {key} is still rendering.")
+        except Exception as e:
+            raise ChartRenderError(f"Chart {key} could not be rendered: {e}")
+
+    def shutdown(self):
+        """Stops the worker processes (pending renders are cancelled)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Shared instance used by the chart generators and the image route
+chart_renderer = ChartRenderer(chart_cache)
+
+
+def cached_chart_url(kind, params, render):
+    """
+    Returns the URL of a chart's image without waiting for it to render.
+
+    The image route holds the browser's request until the render finishes, so the
+    page itself is served as soon as its data is ready.
+    """
+    key = chart_renderer.request(kind, params, render)
+    return url_for("page.chart_image", chart_key=key)
@@ -12,6 +12,13 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "postgresql://localhost:5432/defaultdb")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     DEBUG = False
+    # Python hierarchy checks before task writes; the database triggers enforce the same rules
+    TASK_HIERARCHY_PRECHECKS = os.getenv("TASK_HIERARCHY_PRECHECKS", "true").lower() != "false"
+    # Chart rendering: worker processes (0 renders on the request thread) and seconds an image request waits
+    CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "2"))
+    CHART_RENDER_TIMEOUT = float(os.getenv("CHART_RENDER_TIMEOUT", "20"))
+    # Days of task change log kept for delta sync (`flask prune-task-changes`)
+    TASK_CHANGE_RETENTION_DAYS = int(os.getenv("TASK_CHANGE_RETENTION_DAYS", "30"))
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -22,6 +29,7 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URL", "postgresql://localhost:5432/testdb")
+    CHART_RENDER_WORKERS = 0  # Render charts inline, without starting worker processes
     DEBUG = True
 
 class ProductionConfig(Config):
@@ -130,15 +130,15 @@ class Project(db.Model):
 
     def update_story_points(self):
         """
-        Recalculate the completed story points for the project.
+        Refresh the completed story points of the project from its maintained stats.
         """
-        from app.tasks.utils import TaskService
+        from app.tasks.stats import get_single_project_stats
 
         try:
-            self.completed_story_points = TaskService.calculate_completed_story_points(self.id)
+            self.completed_story_points = get_single_project_stats(self.id)["completed_story_points"]
             log_interaction(
                 caller="Project Model",
-                callee="TaskService",
+                callee="ProjectStats",
                 action="Update Story Points",
                 data={"project_id": self.id, "completed_story_points": self.completed_story_points},
             )
@@ -156,15 +156,16 @@ class Project(db.Model):
     @property
     def total_story_points(self):
         """
-        Fetch the total story points for all tasks associated with this project.
+        Fetch the total story points for all tasks associated with this project
+        (a lookup of its maintained stats row).
         """
-        from app.tasks.utils import TaskService
-        
+        from app.tasks.stats import get_single_project_stats
+
         try:
-            total_points = TaskService.calculate_total_story_points(self.id)
+            total_points = get_single_project_stats(self.id)["total_story_points"]
             log_interaction(
                 caller="Project Model",
-                callee="TaskService",
+                callee="ProjectStats",
                 action="Calculate Total Story Points",
                 data={
                     "project_id": self.id,
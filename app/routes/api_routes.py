@@ -1,7 +1,9 @@
+import csv
 import logging
 import traceback
 from sqlalchemy.exc import IntegrityError
-from flask import Blueprint, request, jsonify, make_response
+from sqlalchemy.orm import selectinload
+from flask import Blueprint, Response, current_app, request, jsonify, make_response, stream_with_context
 from flask_cors import CORS
 from flask_wtf.csrf import generate_csrf
 from markupsafe import Markup  # ✅ Import from markupsafe
@@ -9,12 +11,44 @@ from datetime import datetime
 from app.forms.forms import csrf
 from app.tasks.utils import TaskService
 from app.models import Project, Contributor
-from app.tasks.models import Task
+from app.tasks.models import (
+    Task, TaskChange, TaskChangeVersion, add_project_stats_delta, apply_project_stats_deltas, collect_project_stats,
+    delete_task_closure, record_task_changes,
+)
+from app.tasks.ancestry import load_task_types
+from app.tasks.hierarchy_triggers import hierarchy_prechecks_enabled, hierarchy_violation
+from app.tasks.ranking import allocate_rank, move_to_index, raise_rank_floor, schedule_rebalance
+from app.tasks.importer import MAX_IMPORT_ROWS, TaskImportError, import_tasks, parse_csv_rows
+from app.tasks.serializers import (
+    TASK_DETAIL_FIELDS,
+    parse_fields,
+    project_task_tree,
+    select_task_rows,
+    serialize_task_rows,
+    iter_task_ndjson,
+    iter_task_json_array,
+)
+from app.tasks.tree_cache import task_tree_cache, build_task_tree
+from app.tasks.versions import project_versions
+from app.utils.common_utils import get_portfolio_summary
+from app.utils.socket_events import queue_event, queue_task_update
 from app.extensions.db import db
 from app import socketio  # ✅ Ensure this is imported where needed
 from flask_socketio import SocketIO, emit
 
 logger = logging.getLogger(__name__)  # Creates a logger for the current module
+
+TASK_CHANGES_LIMIT = 1000  # Change log rows returned per /api/tasks/changes call
+TASK_BATCH_LIMIT = 500  # Tasks accepted per PATCH /api/tasks call
+BATCH_TASK_FIELDS = {
+    "project_id", "status", "contributor_id", "priority", "epic_priority",
+    "task_type", "estimate", "estimate_type", "name", "description",
+}
+STREAM_BATCH_SIZE = 500  # Rows fetched per round trip when streaming task exports
+STREAM_FORMATS = {
+    "ndjson": (iter_task_ndjson, "application/x-ndjson"),
+    "json-stream": (iter_task_json_array, "application/json"),
+}
 logger.debug("This is a debug message from the api_routes module")
 
 # ✅ Corrected Order: Define the Blueprint first
@@ -73,6 +107,14 @@ def list_tasks_json():
     hierarchical = request.args.get("hierarchical", "false").lower() == "true"
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 700, type=int)
+    cursor = request.args.get("cursor")  # ✅ Keyset mode when present (empty value = first page)
+    estimate_total = request.args.get("count", "exact").lower() == "estimate"
+    response_format = request.args.get("format", "json").lower()  # json | ndjson | json-stream
+    include_meta = request.args.get("include_meta", "false").lower() == "true"  # Otherwise see /api/meta
+    try:
+        fields = parse_fields(request.args.get("fields"))  # ✅ Sparse fieldset, e.g. fields=id,name,status
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
 
     filters = {
         "is_archived": show_archived,
@@ -84,91 +126,91 @@ def list_tasks_json():
     filters = {k: v for k, v in filters.items() if v is not None}
     logger.debug(f"Filters used in API: {filters}")
 
+    # ✅ Read the version before querying: a write that lands mid-request changes the next ETag
+    etag = project_versions.etag(project_id)
+    if request.if_none_match.contains(etag):
+        logger.debug(f"Tasks unchanged since ETag {etag}, returning 304")
+        return with_task_etag(make_response("", 304), etag)
+
+    if response_format in STREAM_FORMATS:
+        if hierarchical:
+            return jsonify({"error": "Streaming formats do not support hierarchical listings."}), 400
+        return with_task_etag(stream_tasks(filters, response_format, fields), etag)
+    if response_format != "json":
+        return jsonify({"error": f"Unsupported format: {response_format}"}), 400
+
     try:
+        # ✅ Read before the tasks so clients can resume from /api/tasks/changes without gaps
+        change_version = TaskChange.latest_version()
+
         if project_id:
             if hierarchical:
-                # 🔥 Optimized Recursive SQL Query for Hierarchical Data
-                sql = """
-                WITH RECURSIVE task_hierarchy AS (
-                    SELECT 
-                        id, name, description, task_type, is_archived, completed, 
-                        parent_id, project_id, contributor_id, story_points, status, sort_order
-                    FROM task
-                    WHERE project_id = %s AND parent_id IS NULL
-                    UNION ALL
-                    SELECT 
-                        t.id, t.name, t.description, t.task_type, t.is_archived, t.completed, 
-                        t.parent_id, t.project_id, t.contributor_id, t.story_points, t.status, t.sort_order
-                    FROM task t
-                    INNER JOIN task_hierarchy th ON t.parent_id = th.id
-                )
-                SELECT * FROM task_hierarchy ORDER BY sort_order;
-                """
-                result = db.session.execute(sql, (project_id,))
-                all_tasks = [dict(row) for row in result]
+                # ✅ Serve the already-nested tree from the per-project cache when possible
+                tasks = task_tree_cache.get(project_id)
+                if tasks is None:
+                    tasks = fetch_task_tree(project_id)
+                if fields:
+                    tasks = project_task_tree(tasks, fields)
+
+                # Pagination metadata
+                pagination = {
+                    "page": page,
+                    "per_page": per_page,
+                    "total": len(tasks),
+                    "pages": (len(tasks) + per_page - 1) // per_page,
+                    "page_numbers": TaskService.generate_page_numbers(
+                        current_page=page,
+                        total_pages=(len(tasks) + per_page - 1) // per_page
+                    ),
+                }
 
-                # Convert flat result into a nested structure
-                task_map = {task["id"]: task for task in all_tasks}
-                for task in all_tasks:
-                    task.setdefault("children", [])
-                    if task["parent_id"]:
-                        task_map[task["parent_id"]]["children"].append(task)
+            else:
+                # 🔥 Optimized Flat Query with Pagination (plain rows, same shape as Task.to_dict())
+                tasks_query = select_task_rows(fields).where(Task.project_id == project_id).order_by(Task.sort_order)
 
-                tasks = [task for task in all_tasks if task["parent_id"] is None]
+                # ✅ Total is counted separately and cached, not derived from the current page
+                total, total_is_estimate = TaskService.count_tasks(
+                    {"project_id": project_id}, estimate=estimate_total
+                )
 
-            else:
-                # 🔥 Optimized Flat Query with Pagination
-                sql = """
-                SELECT id, name, description, task_type, is_archived, completed, 
-                       parent_id, project_id, contributor_id, story_points, status, sort_order
-                FROM task
-                WHERE project_id = %s
-                ORDER BY sort_order
-                LIMIT %s OFFSET %s;
-                """
-                result = db.session.execute(sql, (project_id, per_page, (page - 1) * per_page))
-                tasks = [dict(row) for row in result]
-
-            # Pagination metadata
-            pagination = {
-                "page": page,
-                "per_page": per_page,
-                "total": len(tasks),
-                "pages": (len(tasks) + per_page - 1) // per_page,
-                "page_numbers": TaskService.generate_page_numbers(
-                    current_page=page,
-                    total_pages=(len(tasks) + per_page - 1) // per_page
-                ),
-            }
+                if cursor is not None:
+                    rows, next_cursor = TaskService.paginate_by_cursor(tasks_query, cursor, per_page)
+                    tasks = serialize_task_rows(rows, fields)
+                    pagination = build_cursor_pagination(per_page, total, total_is_estimate, next_cursor)
+                else:
+                    tasks = TaskService.fetch_task_dicts(
+                        tasks_query.limit(per_page).offset((page - 1) * per_page), fields
+                    )
+                    pagination = build_offset_pagination(page, per_page, total, total_is_estimate)
 
         else:
             # 🔥 Use TaskService to Filter & Paginate Tasks Without Project Filtering
-            tasks_query = TaskService.filter_tasks(filters=filters)
-            pagination_obj = tasks_query.paginate(page=page, per_page=per_page, error_out=False)
-            tasks = [task.to_dict() for task in pagination_obj.items]
-
-            pagination = {
-                "page": pagination_obj.page,
-                "per_page": pagination_obj.per_page,
-                "total": pagination_obj.total,
-                "pages": pagination_obj.pages,
-                "page_numbers": TaskService.generate_page_numbers(
-                    current_page=pagination_obj.page,
-                    total_pages=pagination_obj.pages
-                ),
-            }
+            tasks_query = TaskService.filter_tasks(filters=filters, fields=fields)
 
-        # Fetch additional metadata
-        task_types = ["all"] + [t[0] for t in db.session.query(Task.task_type).distinct()]
-        projects = Project.query.options(db.lazyload(Project.contributors)).all()
+            if cursor is not None:
+                rows, next_cursor = TaskService.paginate_by_cursor(tasks_query, cursor, per_page)
+                tasks = serialize_task_rows(rows, fields)
+                total, total_is_estimate = TaskService.count_tasks(filters, estimate=estimate_total)
+                pagination = build_cursor_pagination(per_page, total, total_is_estimate, next_cursor)
+            else:
+                # ✅ Plain LIMIT/OFFSET over rows; the total comes from the cached count
+                tasks = TaskService.fetch_task_dicts(
+                    tasks_query.limit(per_page).offset((page - 1) * per_page), fields
+                )
+                total, total_is_estimate = TaskService.count_tasks(filters, estimate=estimate_total)
+                pagination = build_offset_pagination(page, per_page, total, total_is_estimate)
 
-        return jsonify({
+        payload = {
             "tasks": tasks,
             "pagination": pagination,
             "filters": filters,
-            "task_types": task_types,
-            "projects": [{"id": p.id, "name": p.name} for p in projects],
-        })
+            "change_version": change_version,
+        }
+        if include_meta:
+            metadata, _ = TaskService.get_task_metadata()
+            payload.update(metadata)
+
+        return with_task_etag(jsonify(payload), etag)
 
     except ValueError as ve:
         logger.error(f"ValueError in list_tasks_json: {str(ve)}")
@@ -185,6 +227,84 @@ def list_tasks_json():
     
 
 
+def with_task_etag(response, etag):
+    """
+    Tags a task listing with the project version ETag and asks clients to
+    revalidate on every use, so unchanged refetches get a 304.
+    """
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def stream_tasks(filters, response_format, fields=None):
+    """
+    Streams every task matching `filters` as NDJSON or as a JSON array.
+
+    Rows are read through a server-side cursor in batches of `STREAM_BATCH_SIZE`
+    and written to the response as they arrive, so worker memory stays flat
+    regardless of how many tasks match.
+    """
+    stmt = (
+        TaskService.filter_tasks(filters=filters, fields=fields)
+        .order_by(None)
+        .order_by(Task.sort_order, Task.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    iter_tasks, mimetype = STREAM_FORMATS[response_format]
+
+    def generate():
+        try:
+            yield from iter_tasks(db.session.execute(stmt), fields)
+        except db.exc.SQLAlchemyError as se:
+            # Headers are already sent; log and end the stream early
+            logger.error(f"SQLAlchemyError while streaming tasks: {str(se)}")
+
+    logger.info(f"Streaming tasks as {response_format} with filters: {filters}")
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+def fetch_task_tree(project_id):
+    """
+    Loads a project's task hierarchy with one query, nests it and
+    stores it in the per-project tree cache.
+    """
+    generation = task_tree_cache.generation(project_id)
+
+    # 🔥 Every task with a materialized path is reachable from a root, so one indexed
+    # scan of the project replaces the recursive CTE
+    stmt = select_task_rows().where(Task.project_id == project_id, Task.path.isnot(None)).order_by(Task.sort_order)
+    all_tasks = TaskService.fetch_task_dicts(stmt)
+
+    # Convert flat result into a nested structure
+    tree = build_task_tree(all_tasks)
+    task_tree_cache.set(project_id, tree, generation=generation)
+    return tree
+
+
+def build_offset_pagination(page, per_page, total, total_is_estimate=False):
+    """Builds the pagination metadata for page/per_page (LIMIT/OFFSET) listings."""
+    pages = (total + per_page - 1) // per_page if per_page > 0 else 0
+    return {
+        "page": page,
+        "per_page": per_page,
+        "total": total,
+        "total_is_estimate": total_is_estimate,
+        "pages": pages,
+        "page_numbers": TaskService.generate_page_numbers(current_page=page, total_pages=pages),
+    }
+
+
+def build_cursor_pagination(per_page, total, total_is_estimate, next_cursor):
+    """Builds the pagination metadata for keyset (cursor) listings."""
+    return {
+        "per_page": per_page,
+        "total": total,
+        "total_is_estimate": total_is_estimate,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
+
     
 def ensure_miscellaneous_project():
     misc_project = Project.query.filter_by(name="Miscellaneous").first()
@@ -192,9 +312,25 @@ def ensure_miscellaneous_project():
         misc_project = Project(name="Miscellaneous", description="Default project for uncategorized tasks")
         db.session.add(misc_project)
         db.session.commit()
+        TaskService.invalidate_task_metadata()  # ✅ The project list changed
         logger.info("✅ Created default 'Miscellaneous' project.")
     return misc_project.id  # Return its ID
 
+@api.route("/meta", methods=["GET"])
+def get_task_metadata():
+    """
+    API endpoint for the task listing filters (task types and projects).
+    Served from an in-process cache and revalidated with an ETag.
+    """
+    metadata, etag = TaskService.get_task_metadata()
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        response = jsonify(metadata)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
 @api.route("/projects/miscellaneous", methods=["GET"])
 def get_miscellaneous_project():
     """Fetches the 'Miscellaneous' project or creates it if missing."""
@@ -266,20 +402,12 @@ def manage_project_contributors(project_id):
             project.contributors.append(contributor)
             db.session.commit()
 
-            # ✅ Emit WebSocket event for real-time updates
-            if socketio is not None:
-                try:
-                    logger.info("📡 WebSocket: Emitting `update_contributors` event...")
-                    socketio.emit("update_contributors", {
-                        "id": contributor.id,
-                        "name": contributor.name,
-                        "project_id": project.id
-                    }, namespace="/", to=None)
-                    logger.info("✅ WebSocket Event Sent Successfully!")
-                except Exception as e:
-                    logger.error(f"🚨 Failed to send WebSocket event: {e}")
-            else:
-                logger.error("🚨 WebSocket (socketio) is still None! Check initialization.")
+            # ✅ Queue WebSocket event for real-time updates (sent when the request ends)
+            queue_event("update_contributors", {
+                "id": contributor.id,
+                "name": contributor.name,
+                "project_id": project.id
+            }, committed=True)
 
             return jsonify({
                 "message": "Contributor added successfully",
@@ -308,19 +436,13 @@ def manage_project_contributors(project_id):
             project.contributors.remove(contributor)
             db.session.commit()
 
-            # ✅ Emit WebSocket event for removal
-            try:
-                socketio.start_background_task(
-                    lambda: socketio.emit("update_contributors", {
-                        "id": contributor.id,
-                        "name": contributor.name,
-                        "project_id": project.id,
-                        "removed": True
-                    }, namespace="/", to=None)
-                )
-                logger.info("✅ WebSocket Event Sent Successfully!")
-            except Exception as e:
-                logger.error(f"🚨 WebSocket Event Failed: {e}")
+            # ✅ Queue WebSocket event for removal (sent when the request ends)
+            queue_event("update_contributors", {
+                "id": contributor.id,
+                "name": contributor.name,
+                "project_id": project.id,
+                "removed": True
+            }, committed=True)
 
             return jsonify({
                 "message": "Contributor removed successfully",
@@ -354,6 +476,18 @@ def get_all_contributors():
     except Exception as e:
         return jsonify({"error": f"Failed to fetch contributors: {str(e)}"}), 500
 
+@api.route('/stats/portfolio', methods=['GET'])
+def get_portfolio_stats():
+    """
+    API endpoint returning the portfolio counters shown on the dashboard
+    (projects by progress, contributors by assignment), from one cached query.
+    """
+    try:
+        return jsonify(get_portfolio_summary()), 200
+    except Exception as e:
+        logger.error(f"Error computing portfolio stats: {e}", exc_info=True)
+        return jsonify({"error": "Failed to compute portfolio stats"}), 500
+
 @csrf.exempt
 @api.route('/calculate_completion_percentage/<int:project_id>', methods=['GET'])
 def calculate_completion_percentage_api(project_id):
@@ -366,7 +500,7 @@ def calculate_completion_percentage_api(project_id):
         return jsonify({"error": f"Project with ID {project_id} not found."}), 404
 
     # Use TaskService to calculate completion percentage
-    completion_percentage = TaskService.calculate_completion_percentage(project)
+    completion_percentage = TaskService.calculate_completion_percentage(project.id)
 
     # Return the result as JSON
     return jsonify({"completion_percentage": completion_percentage})
@@ -383,16 +517,94 @@ def api_delete_project(project_id):
     else:
         return jsonify({'success': False, 'message': message}), 500
 
+@api.route("/tasks/changes", methods=["GET"])
+def list_task_changes():
+    """
+    API endpoint returning the tasks inserted, updated or deleted since a change version.
+
+    Query parameters:
+        since (int): The last `version` (or the listing's `change_version`) the client has seen.
+        project_id (int, optional): Only changes affecting this project.
+        limit (int, optional): Maximum number of change log rows to read (default and cap: 1000).
+
+    Deleted tasks (and, with `project_id`, tasks moved out of the project) are
+    returned as tombstones in `deleted`. If `has_more` is true, call again with
+    the returned `version`. A page never ends in the middle of a version; a
+    single version larger than `limit` is returned whole. Returns 410 when the
+    changes after `since` were already pruned: the client must reload its list.
+    """
+    since = request.args.get("since", type=int)
+    project_id = request.args.get("project_id", type=int)
+    limit = min(request.args.get("limit", TASK_CHANGES_LIMIT, type=int), TASK_CHANGES_LIMIT)
+
+    if since is None or since < 0:
+        return jsonify({"error": "A non-negative 'since' version is required."}), 400
+    if limit <= 0:
+        return jsonify({"error": "'limit' must be positive."}), 400
+
+    try:
+        pruned_through = TaskChangeVersion.current().pruned_through
+        if since < pruned_through:
+            return jsonify({
+                "error": f"Changes up to version {pruned_through} were pruned; reload the task list.",
+                "pruned_through": pruned_through,
+            }), 410
+
+        query = db.session.query(TaskChange.version, TaskChange.task_id).filter(TaskChange.version > since)
+        if project_id:
+            query = query.filter(TaskChange.project_id == project_id)
+        changes = query.order_by(TaskChange.version, TaskChange.id).limit(limit + 1).all()
+        has_more = len(changes) > limit
+        if has_more:
+            # ✅ Stop before the version that did not fit, so the next call resumes at a version boundary
+            cut_version = changes[limit].version
+            changes = [change for change in changes[:limit] if change.version != cut_version]
+            if not changes:
+                changes = query.filter(TaskChange.version == cut_version).order_by(TaskChange.id).all()
+
+        # ✅ Several changes to one task collapse into its current state (or a tombstone)
+        task_ids = list(dict.fromkeys(change.task_id for change in changes))
+        current = {}
+        if task_ids:
+            stmt = select_task_rows().where(Task.id.in_(task_ids))
+            current = {task["id"]: task for task in TaskService.fetch_task_dicts(stmt)}
+
+        tasks, deleted = [], []
+        for task_id in task_ids:
+            task = current.get(task_id)
+            if task is None or (project_id and task["project_id"] != project_id):
+                deleted.append(task_id)
+            else:
+                tasks.append(task)
+
+        return jsonify({
+            "since": since,
+            "version": changes[-1].version if changes else since,
+            "tasks": tasks,
+            "deleted": deleted,
+            "has_more": has_more,
+        })
+
+    except db.exc.SQLAlchemyError as se:
+        logger.error(f"SQLAlchemyError in list_task_changes: {str(se)}")
+        return jsonify({"error": "A database error occurred while fetching task changes."}), 500
+
 @api.route('/tasks/<int:task_id>', methods=['GET'])
 def get_task_details(task_id):
     """
     Fetch task details by ID and return as JSON using the TaskService utility method.
+    Accepts an optional `fields` parameter (e.g. `fields=id,name,status`).
     """
     logger.info(f"Fetching task details for Task ID {task_id}.")
 
+    try:
+        fields = parse_fields(request.args.get("fields"), allowed=TASK_DETAIL_FIELDS)
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
     try:
         # Fetch the task as a dictionary using TaskService
-        task_data = TaskService.fetch_task_as_dict(task_id)
+        task_data = TaskService.fetch_task_as_dict(task_id, fields)
         logger.debug(f"Fetched Task Data: {task_data}")  # Log the fetched data
         logger.info(f"Task details fetched successfully for Task ID {task_id}.")
         return jsonify(task_data), 200
@@ -407,6 +619,108 @@ def get_task_details(task_id):
         }), 500
 
 
+@api.route('/tasks/<int:task_id>/subtree', methods=['GET'])
+def get_task_subtree(task_id):
+    """
+    Fetch a task and all of its descendants as a flat, depth-first ordered list.
+    Accepts an optional `fields` parameter (e.g. `fields=id,name,parent_id`).
+    """
+    try:
+        fields = parse_fields(request.args.get("fields"))
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    try:
+        tasks = TaskService.fetch_subtree(task_id, fields)
+    except ValueError as e:
+        logger.error(f"Subtree not available: {e}")
+        return jsonify({"error": str(e)}), 404
+
+    return jsonify({"tasks": tasks, "rollup": TaskService.get_subtree_rollup(task_id)}), 200
+
+
+@csrf.exempt
+@api.route('/tasks/archive', methods=['POST'])
+def archive_tasks():
+    """
+    Archive (or, with `"archived": false`, unarchive) tasks and all their descendants.
+
+    Expects JSON `{"task_ids": [...], "archived": true}`. The subtrees are updated with
+    one statement and one commit; a single `tasks_archived` event lists every affected ID.
+    """
+    data = request.get_json(silent=True) or {}
+    task_ids = data.get("task_ids")
+    archived = data.get("archived", True)
+    if not isinstance(task_ids, list) or not task_ids or not all(isinstance(i, int) for i in task_ids):
+        return jsonify({"error": "task_ids must be a non-empty list of integers"}), 400
+    if not isinstance(archived, bool):
+        return jsonify({"error": "archived must be a boolean"}), 400
+
+    try:
+        affected_ids = TaskService.bulk_set_archived(task_ids, archived)
+    except Exception as e:
+        logger.error(f"Error in archive_tasks: {e}", exc_info=True)
+        return jsonify({"error": "Unexpected error occurred"}), 500
+
+    queue_event("tasks_archived", {"task_ids": affected_ids, "is_archived": archived}, committed=True)
+    return jsonify({"success": True, "archived": archived, "task_ids": affected_ids}), 200
+
+
+@csrf.exempt
+@api.route('/tasks/import', methods=['POST'])
+def import_tasks_route():
+    """
+    Bulk-import tasks from JSON or CSV.
+
+    JSON: `{"project_id": 1, "tasks": [...]}` (or a bare list of rows).
+    CSV: a `text/csv` body or a `file` upload, with a header row; `?project_id=` sets
+    the default project. Rows reference each other with `temp_id`/`parent_temp_id`
+    (see `app.tasks.importer.normalize_row` for the accepted columns).
+
+    The batch is validated as a whole and inserted in one transaction; the response
+    maps every `temp_id` to the ID of the created task.
+    """
+    default_project_id = request.args.get("project_id", type=int)
+    try:
+        if request.mimetype == "text/csv" or "file" in request.files:
+            upload = request.files.get("file")
+            rows = parse_csv_rows((upload.read() if upload else request.get_data()).decode("utf-8-sig"))
+        else:
+            data = request.get_json(silent=True)
+            if isinstance(data, dict):
+                default_project_id = data.get("project_id", default_project_id)
+                data = data.get("tasks")
+            rows = data
+    except (UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": f"Could not read CSV: {e}"}), 400
+
+    if not isinstance(rows, list) or not rows:
+        return jsonify({"error": "Expected a non-empty list of task rows."}), 400
+    if len(rows) > MAX_IMPORT_ROWS:
+        return jsonify({"error": f"At most {MAX_IMPORT_ROWS} tasks can be imported per request."}), 400
+
+    try:
+        id_map, created = import_tasks(rows, default_project_id)
+        project_ids = sorted({project_id for _, project_id in created})
+        queue_event("tasks_imported", {"project_ids": project_ids, "count": len(created)})
+        db.session.commit()
+    except TaskImportError as e:
+        db.session.rollback()
+        logger.error(f"Rejected task import: {e}")
+        return jsonify({"error": str(e), "errors": e.errors}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in import_tasks_route: {e}", exc_info=True)
+        return jsonify({"error": "Unexpected error occurred"}), 500
+
+    logger.info(f"Imported {len(created)} task(s) into projects {project_ids}")
+    return jsonify({
+        "message": f"{len(created)} task(s) imported.",
+        "created": len(created),
+        "ids": id_map,
+    }), 201
+
+
 def validate_task_payload(data):
     """Validates task payload for required fields and hierarchy rules."""
     required_fields = ['title', 'project_id', 'task_type']
@@ -437,8 +751,8 @@ def validate_task_payload(data):
                 logger.error(f"Contributor ID {data['contributor_id']} does not exist.")
                 return False, "Invalid contributor ID."
 
-        # ✅ Enforce hierarchy validation only if parent_id exists
-        if data['parent_id']:
+        # ✅ Enforce hierarchy validation only if parent_id exists (the database triggers check it otherwise)
+        if data['parent_id'] and hierarchy_prechecks_enabled():
             parent_task = Task.query.get(data['parent_id'])
             if not parent_task:
                 return False, f"Parent task with ID {data['parent_id']} does not exist."
@@ -761,6 +1075,64 @@ def update_task_route(task_id):
         return jsonify({"error": "Unexpected error occurred"}), 500
 
 
+@csrf.exempt
+@api.route('/tasks', methods=['PATCH'])
+def batch_update_tasks_route():
+    """
+    API endpoint to update many tasks at once.
+
+    Expects a JSON array (or `{"updates": [...]}`) of `{"id": ..., "changes": {...}}`
+    entries; `changes` takes the same fields as `PATCH /api/tasks/<id>`. All targets
+    are preloaded in bulk and the batch is applied in one transaction: either every
+    change is saved or none is. One `tasks_updated` event describes the whole batch.
+    """
+    data = request.get_json(silent=True)
+    updates = data.get("updates") if isinstance(data, dict) else data
+
+    if not isinstance(updates, list) or not updates:
+        return jsonify({"error": "Expected a non-empty list of {id, changes} entries."}), 400
+    if len(updates) > TASK_BATCH_LIMIT:
+        return jsonify({"error": f"At most {TASK_BATCH_LIMIT} tasks can be updated per request."}), 400
+    for entry in updates:
+        if not isinstance(entry, dict) or not isinstance(entry.get("id"), int) or not isinstance(entry.get("changes"), dict):
+            return jsonify({"error": "Each entry must be an object with an integer 'id' and a 'changes' object."}), 400
+        unknown = set(entry["changes"]) - BATCH_TASK_FIELDS
+        if unknown:
+            return jsonify({"error": f"Task {entry['id']}: unknown field(s): {', '.join(sorted(unknown))}"}), 400
+
+    try:  # ✅ Covers the commit too: deferred hierarchy triggers report there on Postgres
+        updated, contributor_events = apply_task_batch(updates)
+        # ✅ One consolidated WebSocket event for the whole batch, sent only if the commit succeeds
+        if updated:
+            queue_event("tasks_updated", {
+                "tasks": [{"taskId": task_id, **fields} for task_id, fields in updated.items()],
+                "contributors": contributor_events,
+            })
+        db.session.commit()
+    except LookupError as le:
+        db.session.rollback()
+        return jsonify({"error": str(le)}), 404
+    except ValueError as ve:
+        db.session.rollback()
+        logger.error(f"Rejected task batch: {ve}")
+        return jsonify({"error": str(ve)}), 400
+    except IntegrityError as ie:
+        db.session.rollback()
+        logger.error(f"Task batch rejected by the database: {ie}")
+        return jsonify({"error": hierarchy_violation(ie) or "Database constraint error"}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error in batch_update_tasks_route: {e}", exc_info=True)
+        return jsonify({"error": "Unexpected error occurred"}), 500
+
+    logger.info(f"Batch updated {len(updated)} of {len(updates)} task(s)")
+    return jsonify({
+        "message": f"{len(updated)} task(s) updated.",
+        "updated": [{"id": task_id, "updated_fields": sorted(fields)} for task_id, fields in updated.items()],
+        "unchanged": [entry["id"] for entry in updates if entry["id"] not in updated],
+    }), 200
+
+
 def update_task(data, task_id):
     """
     Updates an existing task by delegating specific updates to helper functions.
@@ -835,7 +1207,13 @@ def update_task(data, task_id):
     # ✅ Commit changes only if something was actually updated
     if updated_fields:
         task.updated_at = datetime.utcnow()
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as ie:
+            # ✅ Hierarchy triggers report here (at COMMIT on Postgres, where they are deferred)
+            db.session.rollback()
+            logger.error(f"Update of Task {task_id} rejected by the database: {ie}")
+            return jsonify({"error": hierarchy_violation(ie) or "Database constraint error"}), 400
         logger.info(f"Task ID {task_id} updated successfully. Updated fields: {updated_fields}")
 
         return jsonify({
@@ -877,7 +1255,8 @@ def update_task_project(task, new_project_id):
     if not project:
         return jsonify({"error": f"Project with ID {new_project_id} not found."}), 400
 
-    task.project_id = new_project_id
+    # ✅ The whole subtree follows the task, in one statement
+    Task.move_subtree_to_project([task.id], new_project_id)
     logger.info(f"Task ID {task.id}: Moved to Project ID {new_project_id}")
 
     # ✅ Ensure the contributor remains part of the new project
@@ -888,23 +1267,18 @@ def update_task_project(task, new_project_id):
             db.session.commit()  # ✅ Commit contributor update separately
             logger.info(f"Contributor {contributor.id} added to Project {project.id}")
 
-            # ✅ Emit WebSocket event for contributor update
-            socketio.emit("update_contributors", {
+            # ✅ Queue WebSocket event for contributor update
+            queue_event("update_contributors", {
                 "id": contributor.id,
                 "name": contributor.name,
                 "project_id": project.id
-            }, namespace="/", to=None)
+            }, committed=True)
 
-    # ✅ Commit immediately for autosave behavior
+    # ✅ Queue WebSocket event for project update, then commit immediately for autosave behavior
+    queue_task_update(task.id, project_id=new_project_id)
     task.updated_at = datetime.utcnow()
     db.session.commit()
 
-    # ✅ Emit WebSocket event for project update
-    socketio.emit("update_task", {
-        "taskId": task.id,
-        "project_id": task.project_id
-    }, namespace="/")
-
     return True
 
 # DONE ✅
@@ -926,14 +1300,13 @@ def update_task_status(task, new_status):
         task.completed = False
         task.completed_date = None
 
-    # ✅ Emit WebSocket event for real-time frontend updates
-    socketio.emit("update_task", {
-        "taskId": task.id,
-        "status": task.status,
-        
-        "completed": task.completed,
-        "completed_date": task.completed_date.isoformat() if task.completed_date else None
-    }, namespace="/")
+    # ✅ Queue WebSocket event for real-time frontend updates
+    queue_task_update(
+        task.id,
+        status=task.status,
+        completed=task.completed,
+        completed_date=task.completed_date.isoformat() if task.completed_date else None,
+    )
 
     return True
 
@@ -950,11 +1323,8 @@ def update_task_priority(task, new_priority, is_epic=False):
         task.epic_priority = new_priority
         logger.debug(f"Updated epic priority for Task ID {task.id} to: {task.epic_priority}")
 
-        # ✅ Emit WebSocket event for epic priority update
-        socketio.emit("update_task", {
-            "taskId": task.id,
-            "epic_priority": task.epic_priority
-        }, namespace="/")
+        # ✅ Queue WebSocket event for epic priority update
+        queue_task_update(task.id, epic_priority=task.epic_priority)
 
         return True
 
@@ -970,11 +1340,8 @@ def update_task_priority(task, new_priority, is_epic=False):
         task.priority = new_priority
         logger.debug(f"Updated priority for Task ID {task.id} to: {task.priority}")
 
-        # ✅ Emit WebSocket event for priority update
-        socketio.emit("update_task", {
-            "taskId": task.id,
-            "priority": task.priority
-        }, namespace="/")
+        # ✅ Queue WebSocket event for priority update
+        queue_task_update(task.id, priority=task.priority)
 
         return True
 
@@ -1002,25 +1369,22 @@ def update_task_type(task, new_task_type):
             logger.info(f"Removing epic_priority from Task ID {task.id} (no longer an Epic).")
             task.epic_priority = None
 
-    # ✅ Ensure User Stories are only assigned to Epics
-    if new_task_type == "User Story" and task.parent_id:
+    # ✅ Ensure User Stories are only assigned to Epics (the database triggers check it otherwise)
+    if new_task_type == "User Story" and task.parent_id and hierarchy_prechecks_enabled():
         parent_task = Task.query.get(task.parent_id)
         if parent_task and parent_task.task_type != "Epic":
             return jsonify({"error": "User Stories must have an Epic as a parent."}), 400
 
     # ✅ Ensure Subtasks are only assigned to User Stories
-    if new_task_type == "Subtask" and task.parent_id:
+    if new_task_type == "Subtask" and task.parent_id and hierarchy_prechecks_enabled():
         parent_task = Task.query.get(task.parent_id)
         if parent_task and parent_task.task_type != "User Story":
             return jsonify({"error": "Subtasks must have a User Story as a parent."}), 400
 
     task.task_type = new_task_type
 
-    # ✅ Emit WebSocket event
-    socketio.emit("update_task", {
-        "taskId": task.id,
-        "task_type": task.task_type
-    }, namespace="/")
+    # ✅ Queue WebSocket event
+    queue_task_update(task.id, task_type=task.task_type)
 
     return True
 
@@ -1055,12 +1419,8 @@ def update_task_estimate(task, estimate_value, estimate_type="story_points"):
     if updated:
         logger.debug(f"Updated {estimate_type} for Task ID {task.id} to: {estimate_value}")
 
-        # ✅ Emit WebSocket event
-        socketio.emit("update_task", {
-            "taskId": task.id,
-            "estimate_type": task.estimate_type,
-            "estimate_value": estimate_value
-        }, namespace="/")
+        # ✅ Queue WebSocket event
+        queue_task_update(task.id, estimate_type=task.estimate_type, estimate_value=estimate_value)
 
         return True
 
@@ -1089,21 +1449,17 @@ def update_task_contributor(task, new_contributor_id):
         logger.info(f"✅ Contributor {contributor.id} added to Project {project.id}")
 
         # ✅ WebSocket event for project contributor update
-        socketio.emit("update_contributors", {
+        queue_event("update_contributors", {
             "id": contributor.id,
             "name": contributor.name,
             "project_id": project.id
-        }, namespace="/", to=None)
+        }, committed=True)
 
     # ✅ Assign contributor to task
     task.contributor_id = new_contributor_id
 
     # ✅ WebSocket event for task update
-    socketio.emit("update_task", {
-        "taskId": task.id,
-        "contributor_id": task.contributor_id,
-        "contributor_name": contributor.name
-    }, namespace="/", to=None)
+    queue_task_update(task.id, contributor_id=task.contributor_id, contributor_name=contributor.name)
 
     return True  # Contributor successfully updated
 
@@ -1115,17 +1471,181 @@ def update_task_field(task, field, value):
 
     setattr(task, field, value)
 
-    # ✅ Emit WebSocket event for real-time frontend updates
-    socketio.emit("update_task", {
-        "taskId": task.id,
-        field: value
-    }, namespace="/")
+    # ✅ Queue WebSocket event for real-time frontend updates
+    queue_task_update(task.id, **{field: value})
 
     return True
 
 
     
 
+def apply_task_batch(updates):
+    """
+    Applies a batch of `{id, changes}` entries in the current transaction (no commit, no events).
+
+    Tasks, projects, contributors and the parents' task types are each loaded with one
+    query. Project moves are grouped per target project and move whole subtrees.
+
+    Returns:
+        tuple: `(updated, contributor_events)`: `{task_id: {field: new_value}}` for the
+        tasks that changed, and the project/contributor links that were added.
+
+    Raises:
+        LookupError: If a task does not exist.
+        ValueError: If a project or contributor does not exist or a value is invalid.
+    """
+    changes_by_id = {}
+    for entry in updates:
+        changes_by_id.setdefault(entry["id"], {}).update(entry["changes"])  # Later entries win
+    task_ids = list(changes_by_id)
+
+    tasks = {task.id: task for task in Task.query.filter(Task.id.in_(task_ids))}
+    missing = sorted(set(task_ids) - set(tasks))
+    if missing:
+        raise LookupError(f"Task(s) not found: {missing}")
+
+    project_ids = {task.project_id for task in tasks.values()}
+    project_ids |= {changes["project_id"] for changes in changes_by_id.values() if "project_id" in changes}
+    projects = {
+        project.id: project
+        for project in Project.query.options(selectinload(Project.contributors)).filter(Project.id.in_(project_ids))
+    }
+    contributor_ids = {
+        changes["contributor_id"] for changes in changes_by_id.values() if changes.get("contributor_id") is not None
+    }
+    contributors = {c.id: c for c in Contributor.query.filter(Contributor.id.in_(contributor_ids))} if contributor_ids else {}
+
+    updated = {}
+
+    # ✅ Project moves first (they expire the session), one statement per target project
+    moves = {}
+    for task_id, changes in changes_by_id.items():
+        new_project_id = changes.get("project_id")
+        if "project_id" in changes and new_project_id != tasks[task_id].project_id:
+            if new_project_id not in projects:
+                raise ValueError(f"Task {task_id}: project {new_project_id} not found.")
+            moves.setdefault(new_project_id, []).append(task_id)
+    for new_project_id, moved_ids in moves.items():
+        Task.move_subtree_to_project(moved_ids, new_project_id)
+        for task_id in moved_ids:
+            updated[task_id] = {"project_id": new_project_id}
+    if moves:
+        tasks = {task.id: task for task in Task.query.filter(Task.id.in_(task_ids))}  # Reload in one query
+
+    parent_ids = {
+        tasks[task_id].parent_id for task_id, changes in changes_by_id.items()
+        if "task_type" in changes and tasks[task_id].parent_id
+    }
+    # ✅ One query; also answers the `task_type` validators below. Skipped when the triggers alone check types
+    parent_types = load_task_types(parent_ids) if hierarchy_prechecks_enabled() else None
+
+    contributor_events = []
+    for task_id, changes in changes_by_id.items():
+        task = tasks[task_id]
+        fields = apply_task_changes(task, changes, projects, contributors, parent_types, contributor_events)
+        if fields:
+            task.updated_at = datetime.utcnow()
+            updated.setdefault(task_id, {}).update(fields)
+
+    # ✅ Surfaces immediate constraint errors (and SQLite's trigger errors) inside the caller's try.
+    # On Postgres the hierarchy trigger is deferred and only fires at COMMIT, so the caller's
+    # commit must stay inside its try as well.
+    db.session.flush()
+    return updated, contributor_events
+
+
+def apply_task_changes(task, changes, projects, contributors, parent_types, contributor_events):
+    """
+    Applies one task's batch changes in memory, mirroring the single-field helpers above.
+
+    Unlike those helpers it neither commits nor emits, and it rejects invalid values
+    instead of skipping them, so a batch is applied completely or not at all.
+
+    Returns:
+        dict: The fields that changed and their new values.
+
+    Raises:
+        ValueError: If a value is invalid.
+    """
+    ALLOWED_PRIORITIES = ["Unset", "Low", "Medium", "High", "Critical"]
+    ALLOWED_EPIC_PRIORITIES = ["Unset", "P0", "P1", "P2", "P3", "P4"]
+    fields = {}
+
+    if "task_type" in changes and changes["task_type"] != task.task_type:
+        new_task_type = changes["task_type"]
+        valid_parent_types = TaskService.validate_hierarchy(task_type=new_task_type)  # Raises for unknown types
+        if parent_types is not None and task.parent_id and parent_types.get(task.parent_id) not in valid_parent_types:
+            raise ValueError(f"Task {task.id}: type '{new_task_type}' cannot have a '{parent_types.get(task.parent_id)}' parent.")
+        if new_task_type == "Epic":
+            task.priority = None  # ✅ Cleared before the type changes, Epics cannot hold a priority
+        else:
+            task.epic_priority = None
+        task.task_type = new_task_type
+        fields["task_type"] = new_task_type
+
+    if "status" in changes and changes["status"] != task.status:
+        if changes["status"] not in Task.ALLOWED_STATUSES:
+            raise ValueError(f"Task {task.id}: invalid status '{changes['status']}'.")
+        task.status = changes["status"]  # The status validator keeps completed/completed_date in step
+        fields.update({
+            "status": task.status,
+            "completed": task.completed,
+            "completed_date": task.completed_date.isoformat() if task.completed_date else None,
+        })
+
+    new_contributor_id = changes.get("contributor_id")
+    if new_contributor_id is not None and new_contributor_id != task.contributor_id:
+        contributor = contributors.get(new_contributor_id)
+        if not contributor:
+            raise ValueError(f"Task {task.id}: contributor {new_contributor_id} not found.")
+        project = projects[task.project_id]
+        if contributor not in project.contributors:
+            project.contributors.append(contributor)
+            contributor_events.append({"id": contributor.id, "name": contributor.name, "project_id": project.id})
+        task.contributor_id = new_contributor_id
+        fields.update({"contributor_id": new_contributor_id, "contributor_name": contributor.name})
+
+    if "priority" in changes:
+        if task.task_type == "Epic":
+            if task.priority is not None:
+                task.priority = None
+                fields["priority"] = None
+        elif changes["priority"] != task.priority:
+            if changes["priority"] not in ALLOWED_PRIORITIES:
+                raise ValueError(f"Task {task.id}: invalid priority '{changes['priority']}'.")
+            task.priority = changes["priority"]
+            fields["priority"] = task.priority
+
+    if "epic_priority" in changes:
+        if task.task_type != "Epic":
+            if task.epic_priority is not None:
+                task.epic_priority = None
+                fields["epic_priority"] = None
+        elif changes["epic_priority"] != task.epic_priority:
+            if changes["epic_priority"] not in ALLOWED_EPIC_PRIORITIES:
+                raise ValueError(f"Task {task.id}: invalid epic priority '{changes['epic_priority']}'.")
+            task.epic_priority = changes["epic_priority"]
+            fields["epic_priority"] = task.epic_priority
+
+    if "estimate" in changes:
+        estimate_type = changes.get("estimate_type", "story_points")
+        if estimate_type not in Task.ALLOWED_ESTIMATE_TYPES:
+            raise ValueError(f"Task {task.id}: invalid estimate type '{estimate_type}'.")
+        estimate_field = "story_points" if estimate_type == "story_points" else "time_estimate"
+        if task.estimate_type != estimate_type or getattr(task, estimate_field) != changes["estimate"]:
+            task.estimate_type = estimate_type  # ✅ Type first, so the estimate validator accepts the value
+            task.story_points = changes["estimate"] if estimate_type == "story_points" else None
+            task.time_estimate = changes["estimate"] if estimate_type == "time" else None
+            fields.update({"estimate_type": estimate_type, "estimate_value": changes["estimate"]})
+
+    for field in ["name", "description"]:
+        if field in changes and getattr(task, field) != changes[field]:
+            setattr(task, field, changes[field])
+            fields[field] = changes[field]
+
+    return fields
+
+
 def create_task(data):
     """
     Creates a new task with status and priority support.
@@ -1195,15 +1715,8 @@ def create_task(data):
                 logger.error(f"Invalid priority value: {priority}")
                 return jsonify({"error": f"Invalid priority value. Allowed values: {ALLOWED_PRIORITIES}"}), 400
             
-        # ✅ Determine `sort_order` for the new task
-        if data.get("parent_id"):
-            last_sort_order = db.session.query(db.func.max(Task.sort_order)).filter_by(parent_id=data["parent_id"]).scalar()
-        else:
-            last_sort_order = db.session.query(db.func.max(Task.sort_order)).filter_by(project_id=data["project_id"]).scalar()
-
-        # If there are no existing tasks, default to 0
-        new_sort_order = (last_sort_order or 0) + 1
-        data["sort_order"] = new_sort_order
+        # ✅ Determine `sort_order` for the new task (ranked after its last sibling, no max() scan)
+        data["sort_order"] = allocate_rank(parent_id=data.get("parent_id"), project_id=data["project_id"])
             
 
         new_task = Task(
@@ -1224,14 +1737,16 @@ def create_task(data):
             epic_priority=data.get('epic_priority') if data.get("task_type") == "Epic" else None
         )
 
-        try:
-            db.session.add(new_task)
-            db.session.commit()
+        # ✅ Outside the try below: constraint errors (e.g. a hierarchy trigger) must reach the
+        #    IntegrityError handler, which rolls back and reports them
+        db.session.add(new_task)
+        db.session.commit()
 
+        try:
             task_data = new_task.to_dict()
 
-            print(f"✅ WebSocket Emitting task_created: {task_data}")  # LOGGING
-            socketio.emit("task_created", {"task": task_data}, namespace="/")  # EMITTING
+            logger.debug(f"✅ WebSocket Queuing task_created: {task_data}")
+            queue_event("task_created", {"task": task_data}, committed=True)
 
             logger.info(f"New task created successfully: {new_task.id} (Priority: {new_task.priority}, Status: {new_task.status})")
 
@@ -1267,7 +1782,7 @@ def create_task(data):
     except IntegrityError as e:
         logger.error(f"Integrity error during creation: {e}")
         db.session.rollback()
-        return jsonify({"error": "Database constraint error"}), 400
+        return jsonify({"error": hierarchy_violation(e) or "Database constraint error"}), 400
     except Exception as e:
         logger.error(f"Unexpected error in create_task: {str(e)}", exc_info=True)
         db.session.rollback()
@@ -1308,9 +1823,22 @@ def delete_task(task_id):
 # Backend cleanup script (Runs periodically or on session close)
 @api.route('/api/cleanup_empty_tasks', methods=['DELETE'])
 def cleanup_empty_tasks():
-    deleted_count = Task.query.filter(
+    empty_tasks = Task.query.filter(
         Task.name == "", Task.description == ""
-    ).delete()
+    )
+    # ✅ Bulk deletes skip the flush hooks, so log the tombstones, clear the closure rows
+    #    and subtract the tasks from the project stats explicitly
+    connection = db.session.connection()
+    removed = empty_tasks.with_entities(Task.id, Task.project_id).all()
+    removed_ids = [t.id for t in removed]
+    removed_stats = collect_project_stats(connection, Task.id.in_(removed_ids)) if removed_ids else {}
+    record_task_changes(connection, [(t.id, t.project_id, "delete") for t in removed])
+    delete_task_closure(connection, removed_ids)
+    deleted_count = empty_tasks.delete()
+    deltas = {}
+    for project_id, totals in removed_stats.items():
+        add_project_stats_delta(deltas, project_id, totals, sign=-1)
+    apply_project_stats_deltas(connection, deltas)
     db.session.commit()
     return jsonify({"deleted_tasks": deleted_count})
 
@@ -1401,60 +1929,38 @@ def update_task_sort(task_id):
     if new_order_index is None:
         return jsonify({"error": "new_order_index is required"}), 400
 
+    if not isinstance(new_order_index, int) or new_order_index < 0:
+        return jsonify({"error": "new_order_index must be a non-negative integer"}), 400
+
     # Fetch the task
     task = Task.query.get(task_id)
     if not task:
         return jsonify({"error": "Task not found"}), 404
 
-    # parent_id = task.parent_id  # ✅ Ensure sorting happens within the same parent
-
-    # Fetch all sibling tasks (same parent)
-    # sibling_tasks = Task.query.filter_by(parent_id=parent_id).order_by(Task.sort_order).all()
-    
     logger.info(f"Sorting Task {task.id} - {task.name} (Type: {task.task_type}) to index {new_order_index}")
-    
-    # ✅ Determine Sorting Scope (Stay Within Parent)
-    parent_id = task.parent_id
-    
-    if task.task_type == "User Story" and parent_id is None:
-        logger.info(f"⚠️ User Story {task.id} has no parent! Sorting within 'No Epic'.")
-        
-        # ✅ Ensure sorting happens within User Stories without a parent
-        sibling_tasks = Task.query.filter(
-            Task.task_type == "User Story",
-            Task.parent_id.is_(None),
-            Task.project_id == task.project_id
-        ).order_by(Task.sort_order).all()
-        
-    else:
-        sibling_tasks = Task.query.filter_by(parent_id=parent_id).order_by(Task.sort_order).all()
 
-    if not sibling_tasks:
-        return jsonify({"error": "No tasks found in this hierarchy level"}), 400
-    
-    if task not in sibling_tasks:
-        return jsonify({"error": "Task not found in sorting list"}), 400
-
-    # ✅ Remove task from its current position
-    sibling_tasks.remove(task)
-
-    # ✅ Insert at new position
-    sibling_tasks.insert(new_order_index, task)
-
-    # ✅ Update `sort_order` for all tasks in this level
-    for index, t in enumerate(sibling_tasks):
-        t.sort_order = index
+    # ✅ Sorting stays within the parent; only the moved task's rank is written
+    parent_id = task.parent_id
+    try:
+        new_rank, needs_rebalance = move_to_index(task, new_order_index)
+        db.session.commit()
+    except Exception as e:
+        logger.error(f"Error sorting task {task_id}: {e}", exc_info=True)
+        db.session.rollback()
+        return jsonify({"error": "Unexpected error occurred"}), 500
 
-    db.session.commit()
+    if needs_rebalance:
+        schedule_rebalance(current_app._get_current_object(), task_id)
 
     # ✅ Emit WebSocket event for real-time updates
-    socketio.emit("task_sorted", {
-        "task_id": task.id,
+    queue_event("task_sorted", {
+        "task_id": task_id,
         "new_order": new_order_index,
+        "sort_order": new_rank,
         "new_parent_id": parent_id  # Ensure frontend updates hierarchy
-    }, to='/')
+    }, committed=True)
 
-    logger.info(f"✅ Task {task.id} sorted to index {new_order_index} successfully.")
+    logger.info(f"✅ Task {task_id} sorted to index {new_order_index} successfully.")
 
     response = jsonify({"message": "Task order updated"})
     response.headers["Access-Control-Allow-Origin"] = "http://localhost:3000"
@@ -1508,7 +2014,8 @@ def update_task_parent(task_id):
 
         new_parent_id = no_epic.id  # Assign to "No Epic"
 
-    else:
+    elif hierarchy_prechecks_enabled():
+        # ✅ Optional: the database triggers enforce the same rules (and report a missing parent as a 400)
         new_parent = Task.query.get(new_parent_id)
         if not new_parent:
             return jsonify({"error": "New parent task not found"}), 404
@@ -1522,11 +2029,20 @@ def update_task_parent(task_id):
             return jsonify({"error": "Epics cannot have a parent task."}), 400
 
     # ✅ Update parent relationship
-    task.parent_id = new_parent_id
-    db.session.commit()
+    try:
+        task.parent_id = new_parent_id
+        raise_rank_floor(new_parent_id, task.project_id, task.sort_order)  # ✅ Keep the sort counter ahead of the moved task
+        db.session.commit()
+    except ValueError as ve:
+        db.session.rollback()
+        return jsonify({"error": str(ve)}), 400
+    except IntegrityError as ie:
+        db.session.rollback()
+        logger.error(f"Parent change of Task {task_id} rejected by the database: {ie}")
+        return jsonify({"error": hierarchy_violation(ie) or "Database constraint error"}), 400
 
     # ✅ Emit WebSocket event for real-time frontend updates
-    socketio.emit("task_parent_updated", {"task_id": task.id, "new_parent_id": new_parent_id}, namespace="/")
+    queue_event("task_parent_updated", {"task_id": task.id, "new_parent_id": new_parent_id}, committed=True)
 
     response = jsonify({"message": "Task parent updated successfully"})
     response.headers["Access-Control-Allow-Origin"] = "http://localhost:3000"
@@ -1,31 +1,26 @@
 import logging
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, get_flashed_messages, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, get_flashed_messages, jsonify, make_response
 from sqlalchemy.orm import joinedload
 from datetime import datetime
 
 from app.charts.burnup_chart import generate_burnup_chart
+from app.charts.renderer import PLACEHOLDER_PNG, ChartRenderError, chart_renderer
 from app.forms.forms import ProjectForm, AddContributorForm, DeleteProjectForm, TaskForm
 from app.models import Project, Contributor
 from app.extensions.db import db
 from app.tasks.models import Task
-from app.utils.common_utils import (
-    count_ongoing_projects,
-    count_completed_projects,
-    count_unstarted_projects,
-    count_all_projects,
-    count_all_contributors,
-    count_assigned_contributors,
-    count_unassigned_contributors,
-    log_interaction
-)
+from app.utils.common_utils import get_portfolio_summary, log_interaction
 from app.tasks.utils import TaskService
+from app.tasks.stats import empty_project_stats, get_project_stats
 
 logger = logging.getLogger(__name__)  # Creates a logger for the current module
 logger.debug("This is a debug message from the page_routes module")
 
 page = Blueprint('page', __name__)
 
+CHART_MAX_AGE = 365 * 24 * 3600  # Chart URLs are content-addressed, so their images can be cached for good
+
 # Route for the homepage
 @page.route('/', methods=['GET', 'POST'])
 def index():
@@ -50,6 +45,7 @@ def index():
         try:
             db.session.add(new_project)
             db.session.commit()
+            TaskService.invalidate_task_metadata()  # ✅ The project list changed
             logging.info(f"Project '{project_name}' added successfully.")
             return redirect(url_for('page.project', project_name=project_name))
         except Exception as e:
@@ -88,32 +84,33 @@ def dashboard():
 
     form = ProjectForm()  # Create an instance of the form
 
-    projects = Project.query.options(joinedload(Project.tasks)).all()
+    projects = Project.query.all()
+    stats_by_project = get_project_stats()  # ✅ One GROUP BY for every project's totals, no tasks loaded
     project_data = []
 
     for project in projects:
-        total_scope = TaskService.calculate_total_story_points(project.id)
-        completed_points = TaskService.calculate_completed_story_points(project.id)
-
-        completion_percentage = TaskService.calculate_completion_percentage(project.id)
+        stats = stats_by_project.get(project.id) or empty_project_stats()
         formatted_start_date = project.start_date.strftime('%b-%d-%Y')
         formatted_end_date = project.end_date.strftime('%b-%d-%Y')
 
         project_data.append({
             'project': project,
-            'completion_percentage': completion_percentage,
+            'total_story_points': stats['total_story_points'],
+            'completed_story_points': stats['completed_story_points'],
+            'completion_percentage': stats['completion_percentage'],
             'formatted_start_date': formatted_start_date,
             'formatted_end_date': formatted_end_date
         })
 
-    contributors_count = Contributor.query.count()
-    ongoing_count = count_ongoing_projects()
-    completed_count = count_completed_projects()
-    unstarted_count = count_unstarted_projects()
-    all_count = count_all_projects()
-    all_contributors_count = count_all_contributors()
-    assigned_contributors_count = count_assigned_contributors()
-    unassigned_contributors_count = count_unassigned_contributors()
+    summary = get_portfolio_summary()  # ✅ Every counter below in one (cached) query
+    contributors_count = summary["all_contributors"]
+    ongoing_count = summary["ongoing_projects"]
+    completed_count = summary["completed_projects"]
+    unstarted_count = summary["unstarted_projects"]
+    all_count = summary["all_projects"]
+    all_contributors_count = summary["all_contributors"]
+    assigned_contributors_count = summary["assigned_contributors"]
+    unassigned_contributors_count = summary["unassigned_contributors"]
 
     # Generate charts
     from app.charts.project_breakdown_chart import generate_project_breakdown_chart
@@ -139,6 +136,33 @@ def dashboard():
         contributor_breakdown_chart_url=contributor_breakdown_chart_url
     )
 
+# Route serving rendered charts by content key
+@page.route('/charts/<chart_key>.png')
+def chart_image(chart_key):
+    """
+    Serves a chart image, waiting for its render if it is still running. The key is a
+    hash of the chart's inputs, so the image behind a URL never changes and browsers
+    may keep it for a year. Until a render is available (also when another worker
+    took the request for it), a placeholder is served with 202.
+    """
+    try:
+        png = chart_renderer.wait(chart_key)
+    except ChartRenderError as e:
+        logger.warning(f"Serving placeholder for chart {chart_key[:12]}: {e}")
+        # ✅ Not cacheable, so the next page view asks again and gets the real chart
+        response = make_response(PLACEHOLDER_PNG, 202)
+        response.headers["Content-Type"] = "image/png"
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    if png is None:
+        return "Error: Chart not found.", 404
+
+    response = make_response(png)
+    response.headers["Content-Type"] = "image/png"
+    response.headers["Cache-Control"] = f"public, max-age={CHART_MAX_AGE}, immutable"
+    response.set_etag(chart_key)
+    return response.make_conditional(request)
+
 # Route to display project details and add progress
 @page.route('/project/<project_name>', methods=['GET', 'POST'])
 def project(project_name):
@@ -198,6 +222,7 @@ def create_project():
         new_project = Project(name=project_name, start_date=start_date, end_date=end_date)
         db.session.add(new_project)
         db.session.commit()
+        TaskService.invalidate_task_metadata()  # ✅ The project list changed
 
         # Log success and respond
         logging.info(f"Project '{project_name}' created successfully.")
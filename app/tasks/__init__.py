@@ -1 +1 @@
-from app.tasks.models import Task
+from app.tasks.models import ProjectStats, Task, TaskChange, TaskChangeVersion, TaskClosure, TaskSortCounter
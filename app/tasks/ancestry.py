@@ -0,0 +1,195 @@
+import logging
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from app.extensions.db import db
+from app.tasks.models import Task
+
+logger = logging.getLogger(__name__)  # Logger for this module
+
+PARENT_MAP_KEY = "task_parent_map"  # session.info key of the cached {task_id: parent_id} map
+TASK_TYPE_MAP_KEY = "task_type_map"  # session.info key of the cached {task_id: task_type} map
+
+
+def get_parent_map(session=None):
+    """
+    Returns the session's cached `{task_id: parent_id}` map.
+
+    The map only lives until the session commits or rolls back, so it never
+    outlives the transaction whose reads filled it.
+    """
+    session = session or db.session
+    return session.info.setdefault(PARENT_MAP_KEY, {})
+
+
+def load_ancestor_chains(task_ids, session=None):
+    """
+    Makes sure the parent map holds every given task and all of its ancestors.
+
+    Whatever is not cached yet is fetched with a single recursive query, however
+    many tasks and levels are involved.
+
+    Args:
+        task_ids (iterable[int]): The tasks whose ancestor chains are needed.
+
+    Returns:
+        dict: The session's parent map.
+    """
+    session = session or db.session
+    parent_map = get_parent_map(session)
+
+    # Walk what is already cached; only chains that leave the cache need a query
+    missing = set()
+    for task_id in task_ids:
+        seen = set()
+        while task_id and task_id in parent_map and task_id not in seen:
+            seen.add(task_id)
+            task_id = parent_map[task_id]
+        if task_id and task_id not in seen:
+            missing.add(task_id)
+
+    if missing:
+        task_table = Task.__table__
+        chain = (
+            select(task_table.c.id, task_table.c.parent_id, task_table.c.task_type)
+            .where(task_table.c.id.in_(missing))
+            .cte("ancestor_chain", recursive=True)
+        )
+        parent = task_table.alias("parent")
+        # UNION (not UNION ALL) so a corrupt cycle in the data still terminates
+        chain = chain.union(
+            select(parent.c.id, parent.c.parent_id, parent.c.task_type).where(parent.c.id == chain.c.parent_id)
+        )
+        rows = session.execute(select(chain.c.id, chain.c.parent_id, chain.c.task_type)).all()
+        parent_map.update({row.id: row.parent_id for row in rows})
+        get_task_type_map(session).update({row.id: row.task_type for row in rows})  # ✅ Free with the same rows
+        logger.debug(f"Loaded ancestor chains for tasks {sorted(missing)} ({len(rows)} rows)")
+
+    return parent_map
+
+
+def get_ancestor_ids(task_id, session=None):
+    """
+    Returns the ancestors of a task, nearest parent first.
+
+    Raises:
+        ValueError: If the stored hierarchy already contains a cycle.
+    """
+    parent_map = load_ancestor_chains([task_id], session)
+    ancestors = []
+    current = parent_map.get(task_id)
+    while current:
+        if current in ancestors or current == task_id:
+            raise ValueError("Circular reference detected in task hierarchy.")
+        ancestors.append(current)
+        current = parent_map.get(current)
+    return ancestors
+
+
+def validate_reparent_batch(moves, session=None):
+    """
+    Validates a batch of parent changes against each other and the stored hierarchy.
+
+    All ancestor chains are loaded in one query; the moves are then applied to an
+    in-memory copy of the parent map and every moved task is checked. On success the
+    moves are recorded in the session's parent map, so the per-row `@validates`
+    checks that follow are answered from memory.
+
+    Args:
+        moves (iterable[tuple]): `(task_id, new_parent_id)` pairs.
+
+    Raises:
+        ValueError: If any task would become its own ancestor.
+    """
+    moves = dict(moves)
+    parent_map = load_ancestor_chains(
+        list(moves) + [parent_id for parent_id in moves.values() if parent_id], session
+    )
+    proposed = {**parent_map, **moves}
+
+    for task_id in moves:
+        seen = set()
+        current = proposed.get(task_id)
+        while current:
+            if current == task_id:
+                logger.error(f"Task {task_id} would become its own ancestor.")
+                raise ValueError(f"Task {task_id} cannot be its own ancestor.")
+            if current in seen:
+                raise ValueError("Circular reference detected in task hierarchy.")
+            seen.add(current)
+            current = proposed.get(current)
+
+    parent_map.update(moves)
+
+
+def record_parent_change(task_id, parent_id, session=None):
+    """Keeps the session's parent map in step with a parent assignment that passed validation."""
+    if task_id:
+        get_parent_map(session)[task_id] = parent_id
+
+
+def get_task_type_map(session=None):
+    """
+    Returns the session's cached `{task_id: task_type}` map.
+
+    Like the parent map, it is dropped when the transaction ends.
+    """
+    session = session or db.session
+    return session.info.setdefault(TASK_TYPE_MAP_KEY, {})
+
+
+def load_task_types(task_ids, session=None):
+    """
+    Makes sure the type map holds the given tasks.
+
+    Tasks already loaded in the session are read from their objects; the rest
+    are fetched with a single IN query. Missing tasks stay out of the map.
+
+    Args:
+        task_ids (iterable[int]): The tasks whose types are needed.
+
+    Returns:
+        dict: The session's type map.
+    """
+    session = session or db.session
+    type_map = get_task_type_map(session)
+
+    missing = set()
+    for task_id in task_ids:
+        if not task_id or task_id in type_map:
+            continue
+        task = session.identity_map.get(identity_key(Task, task_id))
+        task_type = task.__dict__.get("task_type") if task is not None else None  # Expired attributes are absent
+        if task_type is not None:
+            type_map[task_id] = task_type
+        else:
+            missing.add(task_id)
+
+    if missing:
+        task_table = Task.__table__
+        rows = session.execute(
+            select(task_table.c.id, task_table.c.task_type).where(task_table.c.id.in_(missing))
+        ).all()
+        type_map.update({row.id: row.task_type for row in rows})
+        logger.debug(f"Loaded task types for {len(rows)} of {len(missing)} task(s)")
+
+    return type_map
+
+
+def get_task_type(task_id, session=None):
+    """Returns the type of a task (None if it does not exist), querying only on a cache miss."""
+    return load_task_types([task_id], session).get(task_id)
+
+
+def record_task_type(task_id, task_type, session=None):
+    """Keeps the session's type map in step with a type change that passed validation."""
+    if task_id:
+        get_task_type_map(session)[task_id] = task_type
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_soft_rollback")
+def _clear_parent_map(session, *args):
+    """Drops the cached parent and type maps once the transaction that filled them ends."""
+    session.info.pop(PARENT_MAP_KEY, None)
+    session.info.pop(TASK_TYPE_MAP_KEY, None)
@@ -0,0 +1,60 @@
+import logging
+from datetime import datetime, timedelta, timezone
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, select, update
+from app.extensions.db import db
+from app.tasks.models import TaskChange, TaskChangeVersion
+
+logger = logging.getLogger(__name__)  # Logger for this module
+
+
+def prune_task_changes(retention_days=None):
+    """
+    Deletes change log rows older than the retention period.
+
+    Whole versions are removed (never part of a transaction's changes), and the
+    last pruned version is kept in `TaskChangeVersion.pruned_through`: clients
+    that ask for changes since an earlier version must reload their task list.
+    The caller commits.
+
+    Args:
+        retention_days (int, optional): Days of changes to keep (defaults to `TASK_CHANGE_RETENTION_DAYS`).
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    if retention_days is None:
+        retention_days = current_app.config["TASK_CHANGE_RETENTION_DAYS"]
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+
+    threshold = db.session.execute(
+        select(func.max(TaskChange.version)).where(TaskChange.changed_at < cutoff)
+    ).scalar()
+    if threshold is None:
+        return 0
+
+    deleted = db.session.execute(delete(TaskChange).where(TaskChange.version <= threshold)).rowcount
+    db.session.execute(
+        update(TaskChangeVersion)
+        .where(TaskChangeVersion.id == 1, TaskChangeVersion.pruned_through < threshold)
+        .values(pruned_through=threshold)
+    )
+    logger.info(f"Pruned {deleted} task change(s) through version {threshold}")
+    return deleted
+
+
+@click.command("prune-task-changes")
+@click.option("--days", type=int, default=None, help="Days of changes to keep (default: TASK_CHANGE_RETENTION_DAYS).")
+@with_appcontext
+def prune_task_changes_command(days):
+    """Deletes task change log rows older than the retention period."""
+    try:
+        count = prune_task_changes(days)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Pruning task changes failed: {e}")
+        raise click.ClickException(str(e))
+    click.echo(f"Deleted {count} task change(s).")
@@ -0,0 +1,175 @@
+# Database-side enforcement of the task hierarchy (parent types and cycles)
+import logging
+from flask import current_app, has_app_context
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)  # Logger for this module
+
+HIERARCHY_ERROR = "task hierarchy violation"  # Prefix of every error raised by the triggers below
+
+# Postgres: one deferred constraint trigger, checked at commit against each written row's final
+# state, so a batch may pass through intermediate states (e.g. a story and its subtasks changing
+# type together). Also rejects type changes that would strand existing children.
+POSTGRES_HIERARCHY_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION task_check_hierarchy() RETURNS trigger AS $$
+    DECLARE
+        current_task task%ROWTYPE;
+        parent_type VARCHAR(10);
+    BEGIN
+        SELECT * INTO current_task FROM task WHERE id = NEW.id;
+        IF NOT FOUND THEN
+            RETURN NULL;  -- Deleted later in the same transaction
+        END IF;
+
+        IF current_task.parent_id IS NOT NULL THEN
+            IF current_task.parent_id = current_task.id THEN
+                RAISE EXCEPTION 'task hierarchy violation: A task cannot be its own parent.'
+                    USING ERRCODE = 'check_violation';
+            END IF;
+            SELECT task_type INTO parent_type FROM task WHERE id = current_task.parent_id;
+            IF parent_type IS NULL THEN
+                RAISE EXCEPTION 'task hierarchy violation: Parent task does not exist.'
+                    USING ERRCODE = 'check_violation';
+            ELSIF current_task.task_type = 'Epic' THEN
+                RAISE EXCEPTION 'task hierarchy violation: Epics cannot have a parent task.'
+                    USING ERRCODE = 'check_violation';
+            ELSIF current_task.task_type = 'User Story' AND parent_type <> 'Epic' THEN
+                RAISE EXCEPTION 'task hierarchy violation: A User Story can only have an Epic as a parent.'
+                    USING ERRCODE = 'check_violation';
+            ELSIF current_task.task_type = 'Subtask' AND parent_type <> 'User Story' THEN
+                RAISE EXCEPTION 'task hierarchy violation: A Subtask can only have a User Story as a parent.'
+                    USING ERRCODE = 'check_violation';
+            END IF;
+
+            -- UNION (not UNION ALL) so a cycle already in the data still terminates
+            IF EXISTS (
+                WITH RECURSIVE ancestors(id) AS (
+                    SELECT current_task.parent_id
+                    UNION
+                    SELECT t.parent_id FROM task t JOIN ancestors a ON t.id = a.id WHERE t.parent_id IS NOT NULL
+                )
+                SELECT 1 FROM ancestors WHERE id = current_task.id
+            ) THEN
+                RAISE EXCEPTION 'task hierarchy violation: A task cannot be its own ancestor.'
+                    USING ERRCODE = 'check_violation';
+            END IF;
+        END IF;
+
+        IF TG_OP = 'UPDATE' AND EXISTS (
+            SELECT 1 FROM task child
+            WHERE child.parent_id = current_task.id
+              AND NOT ((child.task_type = 'User Story' AND current_task.task_type = 'Epic')
+                    OR (child.task_type = 'Subtask' AND current_task.task_type = 'User Story'))
+        ) THEN
+            RAISE EXCEPTION 'task hierarchy violation: Task % has children that its type cannot hold.', current_task.id
+                USING ERRCODE = 'check_violation';
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS task_hierarchy_check ON task",
+    """
+    CREATE CONSTRAINT TRIGGER task_hierarchy_check
+    AFTER INSERT OR UPDATE OF parent_id, task_type ON task
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION task_check_hierarchy()
+    """,
+]
+
+# SQLite: no deferred triggers and no WITH inside a trigger, so rows are checked when written and
+# cycles are detected through `task_closure`. Moves applied together in one executemany are only
+# checked against the closure rows as they were before the batch, and a parent and its children
+# changing type together must be written parent-last.
+_SQLITE_PARENT_CHECKS = """
+        SELECT RAISE(ABORT, 'task hierarchy violation: Parent task does not exist.')
+        WHERE NOT EXISTS (SELECT 1 FROM task WHERE id = NEW.parent_id);
+        SELECT RAISE(ABORT, 'task hierarchy violation: Epics cannot have a parent task.')
+        WHERE NEW.task_type = 'Epic';
+        SELECT RAISE(ABORT, 'task hierarchy violation: A User Story can only have an Epic as a parent.')
+        WHERE NEW.task_type = 'User Story' AND (SELECT task_type FROM task WHERE id = NEW.parent_id) <> 'Epic';
+        SELECT RAISE(ABORT, 'task hierarchy violation: A Subtask can only have a User Story as a parent.')
+        WHERE NEW.task_type = 'Subtask' AND (SELECT task_type FROM task WHERE id = NEW.parent_id) <> 'User Story';
+"""
+
+SQLITE_HIERARCHY_DDL = [
+    "DROP TRIGGER IF EXISTS task_hierarchy_insert",
+    f"""
+    CREATE TRIGGER task_hierarchy_insert
+    BEFORE INSERT ON task
+    FOR EACH ROW WHEN NEW.parent_id IS NOT NULL
+    BEGIN
+        {_SQLITE_PARENT_CHECKS}
+    END
+    """,
+    "DROP TRIGGER IF EXISTS task_hierarchy_update",
+    f"""
+    CREATE TRIGGER task_hierarchy_update
+    BEFORE UPDATE OF parent_id, task_type ON task
+    FOR EACH ROW WHEN NEW.parent_id IS NOT NULL
+    BEGIN
+        SELECT RAISE(ABORT, 'task hierarchy violation: A task cannot be its own ancestor.')
+        WHERE NEW.parent_id = NEW.id OR EXISTS (
+            SELECT 1 FROM task_closure WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_id
+        );
+        {_SQLITE_PARENT_CHECKS}
+    END
+    """,
+    "DROP TRIGGER IF EXISTS task_hierarchy_children",
+    """
+    CREATE TRIGGER task_hierarchy_children
+    BEFORE UPDATE OF task_type ON task
+    FOR EACH ROW WHEN NEW.task_type IS NOT OLD.task_type
+    BEGIN
+        SELECT RAISE(ABORT, 'task hierarchy violation: Task has children that its type cannot hold.')
+        WHERE EXISTS (
+            SELECT 1 FROM task child
+            WHERE child.parent_id = NEW.id
+              AND NOT ((child.task_type = 'User Story' AND NEW.task_type = 'Epic')
+                    OR (child.task_type = 'Subtask' AND NEW.task_type = 'User Story'))
+        );
+    END
+    """,
+]
+
+
+def install_hierarchy_triggers(target, connection, **kw):
+    """
+    Creates the hierarchy triggers on the `task` table (`after_create` hook of the table).
+
+    Databases built with `db.create_all()` get the same enforcement as migrated ones.
+    """
+    statements = {
+        "postgresql": POSTGRES_HIERARCHY_DDL,
+        "sqlite": SQLITE_HIERARCHY_DDL,
+    }.get(connection.dialect.name)
+    if statements is None:
+        logger.warning(f"No task hierarchy triggers for dialect '{connection.dialect.name}'")
+        return
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def hierarchy_prechecks_enabled():
+    """
+    Whether writes run the Python hierarchy/cycle checks before reaching the database.
+
+    The triggers enforce the same rules either way; turning `TASK_HIERARCHY_PRECHECKS`
+    off saves the lookup queries and lets the database reject invalid writes instead.
+    """
+    if not has_app_context():
+        return True
+    return current_app.config.get("TASK_HIERARCHY_PRECHECKS", True)
+
+
+def hierarchy_violation(exc):
+    """
+    Returns the rule a hierarchy trigger rejected a write for, or None if the
+    integrity error came from another constraint.
+    """
+    message = str(getattr(exc, "orig", exc))
+    if HIERARCHY_ERROR not in message:
+        return None
+    return message.split(f"{HIERARCHY_ERROR}: ", 1)[-1].splitlines()[0]
@@ -0,0 +1,307 @@
+import csv
+import io
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from sqlalchemy import bindparam, select, update
+from app.extensions.db import db
+from app.models import Project, Contributor
+from app.tasks.models import (
+    ALLOWED_TASK_TYPES, EPIC_PRIORITY_ENUM, TASK_PRIORITY_ENUM, Task, TaskClosure,
+    add_project_stats_delta, apply_project_stats_deltas, record_task_changes, task_stats_delta,
+)
+from app.tasks.ranking import RANK_STEP, allocate_rank
+
+logger = logging.getLogger(__name__)  # Logger for this module
+
+MAX_IMPORT_ROWS = 50_000  # Rows accepted per import request
+IMPORT_BATCH_SIZE = 1000  # Rows per multi-row INSERT / executemany page
+MAX_REPORTED_ERRORS = 50  # Invalid rows listed in an error response
+
+# Parent type each task type requires (None: top level only), and the error when it is not met
+PARENT_TYPES = {"Epic": None, "User Story": "Epic", "Subtask": "User Story"}
+PARENT_TYPE_ERRORS = {
+    "Epic": "Epics cannot have a parent task.",
+    "User Story": "User Stories must have an Epic as a parent.",
+    "Subtask": "Subtasks must have a User Story as a parent.",
+}
+
+
+class TaskImportError(ValueError):
+    """Raised when import rows are invalid; `errors` lists `{"row": n, "error": message}` entries."""
+
+    def __init__(self, errors):
+        self.errors = errors[:MAX_REPORTED_ERRORS]
+        super().__init__(f"{len(errors)} invalid row(s); nothing was imported.")
+
+
+def parse_csv_rows(text):
+    """Parses CSV text with a header row into a list of dicts."""
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def _optional_int(value, field):
+    """Returns `value` as an int, or None for empty values (CSV cells arrive as strings)."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"'{field}' must be an integer.")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{field}' must be an integer.")
+
+
+def _optional_str(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def normalize_row(raw, default_project_id=None):
+    """
+    Validates one import row on its own and converts it to column values.
+
+    Accepts `name` (or `title`), `task_type`, `project_id`, `temp_id`, `parent_temp_id`
+    (another row of the import) or `parent_id` (an existing task), `description`,
+    `status`, `priority`, `epic_priority`, `contributor_id`, `estimate_type`,
+    `story_points` and `time_estimate`.
+
+    Raises:
+        ValueError: If the row is invalid.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("Row must be an object.")
+
+    name = _optional_str(raw.get("name") or raw.get("title"))
+    if not name:
+        raise ValueError("'name' is required.")
+    if len(name) > Task.name.type.length:
+        raise ValueError(f"'name' is longer than {Task.name.type.length} characters.")
+
+    task_type = _optional_str(raw.get("task_type")) or "Subtask"
+    if task_type not in ALLOWED_TASK_TYPES:
+        raise ValueError(f"Invalid task_type '{task_type}'. Allowed: {ALLOWED_TASK_TYPES}")
+
+    status = _optional_str(raw.get("status")) or "Not Started"
+    if status not in Task.ALLOWED_STATUSES:
+        raise ValueError(f"Invalid status '{status}'. Allowed: {Task.ALLOWED_STATUSES}")
+
+    if task_type == "Epic":
+        priority = None
+        epic_priority = _optional_str(raw.get("epic_priority"))
+        if epic_priority is not None and epic_priority not in EPIC_PRIORITY_ENUM.enums:
+            raise ValueError(f"Invalid epic_priority '{epic_priority}'. Allowed: {list(EPIC_PRIORITY_ENUM.enums)}")
+    else:
+        epic_priority = None
+        priority = _optional_str(raw.get("priority")) or "Unset"
+        if priority not in TASK_PRIORITY_ENUM.enums:
+            raise ValueError(f"Invalid priority '{priority}'. Allowed: {list(TASK_PRIORITY_ENUM.enums)}")
+
+    estimate_type = _optional_str(raw.get("estimate_type")) or "story_points"
+    if estimate_type not in Task.ALLOWED_ESTIMATE_TYPES:
+        raise ValueError(f"Invalid estimate_type '{estimate_type}'. Allowed: {Task.ALLOWED_ESTIMATE_TYPES}")
+    story_points = _optional_int(raw.get("story_points"), "story_points")
+    time_estimate = _optional_int(raw.get("time_estimate"), "time_estimate")
+
+    parent_temp_id = _optional_str(raw.get("parent_temp_id"))
+    parent_id = _optional_int(raw.get("parent_id"), "parent_id")
+    if parent_temp_id and parent_id:
+        raise ValueError("Use either 'parent_temp_id' or 'parent_id', not both.")
+
+    completed = status == "Completed"
+    return {
+        "temp_id": _optional_str(raw.get("temp_id")),
+        "parent_temp_id": parent_temp_id,
+        "values": {
+            "name": name,
+            "description": raw.get("description") or None,
+            "task_type": task_type,
+            "status": status,
+            "completed": completed,
+            "completed_date": datetime.now(timezone.utc) if completed else None,
+            "priority": priority,
+            "epic_priority": epic_priority,
+            "estimate_type": estimate_type,
+            "story_points": story_points if estimate_type == "story_points" else None,
+            "time_estimate": time_estimate if estimate_type == "time" else None,
+            "contributor_id": _optional_int(raw.get("contributor_id"), "contributor_id"),
+            "project_id": _optional_int(raw.get("project_id"), "project_id") or default_project_id,
+            "parent_id": parent_id,
+            "is_archived": False,
+        },
+    }
+
+
+def import_tasks(raw_rows, default_project_id=None):
+    """
+    Validates and bulk-inserts a batch of tasks in the current transaction (no commit).
+
+    Rows may reference each other through `temp_id`/`parent_temp_id`. The whole batch
+    is validated in memory after one lookup query each for projects, contributors and
+    existing parents. Tasks are inserted level by level (Epics, User Stories, Subtasks)
+    with multi-row INSERTs; `sort_order` ranks are reserved per parent/project from the
+    sort counters, and `path`/`depth`, the closure table and the change log are filled
+    in bulk as well.
+
+    Returns:
+        tuple: `(id_map, created)`: `{temp_id: task_id}` and `(task_id, project_id)` of every new task.
+
+    Raises:
+        TaskImportError: If any row is invalid; nothing is written in that case.
+    """
+    errors, rows = [], []
+    for index, raw in enumerate(raw_rows, start=1):
+        try:
+            row = normalize_row(raw, default_project_id)
+            row["index"] = index
+            rows.append(row)
+        except ValueError as e:
+            errors.append({"row": index, "error": str(e)})
+
+    by_temp_id = {}
+    for row in rows:
+        if row["temp_id"] is None:
+            continue
+        if row["temp_id"] in by_temp_id:
+            errors.append({"row": row["index"], "error": f"Duplicate temp_id '{row['temp_id']}'."})
+        by_temp_id[row["temp_id"]] = row
+    if errors:
+        raise TaskImportError(errors)
+
+    # ✅ One lookup query each for projects, contributors and existing parents
+    values = [row["values"] for row in rows]
+    parent_ids = {v["parent_id"] for v in values if v["parent_id"]}
+    parents = {
+        p.id: p for p in db.session.execute(
+            select(Task.id, Task.task_type, Task.project_id, Task.path, Task.depth).where(Task.id.in_(parent_ids))
+        )
+    } if parent_ids else {}
+    project_ids = {v["project_id"] for v in values if v["project_id"]} | {p.project_id for p in parents.values()}
+    known_projects = set(db.session.scalars(select(Project.id).where(Project.id.in_(project_ids)))) if project_ids else set()
+    contributor_ids = {v["contributor_id"] for v in values if v["contributor_id"]}
+    known_contributors = (
+        set(db.session.scalars(select(Contributor.id).where(Contributor.id.in_(contributor_ids)))) if contributor_ids else set()
+    )
+
+    # ✅ Validate the hierarchy in memory, parents before children; the type rules also rule out cycles
+    for row in sorted(rows, key=lambda r: ALLOWED_TASK_TYPES.index(r["values"]["task_type"])):
+        v = row["values"]
+        required_parent_type = PARENT_TYPES[v["task_type"]]
+        if row["parent_temp_id"]:
+            parent_row = by_temp_id.get(row["parent_temp_id"])
+            if parent_row is None:
+                errors.append({"row": row["index"], "error": f"Unknown parent_temp_id '{row['parent_temp_id']}'."})
+                continue
+            parent_type, parent_project_id = parent_row["values"]["task_type"], parent_row["values"]["project_id"]
+        elif v["parent_id"]:
+            parent = parents.get(v["parent_id"])
+            if parent is None:
+                errors.append({"row": row["index"], "error": f"Parent task {v['parent_id']} does not exist."})
+                continue
+            parent_type, parent_project_id = parent.task_type, parent.project_id
+        else:
+            parent_type = parent_project_id = None
+
+        if parent_type is not None and parent_type != required_parent_type:
+            errors.append({"row": row["index"], "error": PARENT_TYPE_ERRORS[v["task_type"]]})
+        if v["project_id"] is None:
+            v["project_id"] = parent_project_id
+        if v["project_id"] is None or v["project_id"] not in known_projects:
+            errors.append({"row": row["index"], "error": f"Project {v['project_id']} does not exist."})
+        elif parent_project_id is not None and parent_project_id != v["project_id"]:
+            errors.append({"row": row["index"], "error": "A task must be in the same project as its parent."})
+        if v["contributor_id"] and v["contributor_id"] not in known_contributors:
+            errors.append({"row": row["index"], "error": f"Contributor {v['contributor_id']} does not exist."})
+    if errors:
+        raise TaskImportError(sorted(errors, key=lambda e: e["row"]))
+
+    # ✅ Ranks: one block reservation per existing parent / project; new parents start from scratch
+    scope_sizes = defaultdict(int)
+    for row in rows:
+        v = row["values"]
+        if row["parent_temp_id"]:
+            row["rank_scope"] = ("temp", row["parent_temp_id"])
+        elif v["parent_id"]:
+            row["rank_scope"] = ("parent", v["parent_id"])
+        else:
+            row["rank_scope"] = ("project", v["project_id"])
+        scope_sizes[row["rank_scope"]] += 1
+    next_rank = {}
+    for (kind, key), size in scope_sizes.items():
+        if kind == "parent":
+            next_rank[(kind, key)] = allocate_rank(parent_id=key, count=size)
+        elif kind == "project":
+            next_rank[(kind, key)] = allocate_rank(project_id=key, count=size)
+        else:
+            next_rank[(kind, key)] = RANK_STEP
+    for row in rows:
+        row["values"]["sort_order"] = next_rank[row["rank_scope"]]
+        next_rank[row["rank_scope"]] += RANK_STEP
+
+    # ✅ Ancestors of the existing parents, for the closure rows of their new children
+    closure_table = TaskClosure.__table__
+    ancestors = defaultdict(list)
+    if parent_ids:
+        for link in db.session.execute(
+            select(closure_table.c.descendant_id, closure_table.c.ancestor_id, closure_table.c.depth)
+            .where(closure_table.c.descendant_id.in_(parent_ids))
+        ):
+            ancestors[link.descendant_id].append((link.ancestor_id, link.depth))
+    hierarchy = {parent_id: (parent.path, parent.depth) for parent_id, parent in parents.items()}
+
+    task_table = Task.__table__
+    now = datetime.now(timezone.utc)
+    id_map, created, placements, closure_rows, stats_deltas = {}, [], [], [], {}
+    for task_type in ALLOWED_TASK_TYPES:  # Epics first, so every parent has an ID before its children
+        level = [row for row in rows if row["values"]["task_type"] == task_type]
+        for start in range(0, len(level), IMPORT_BATCH_SIZE):
+            chunk = level[start:start + IMPORT_BATCH_SIZE]
+            for row in chunk:
+                if row["parent_temp_id"]:
+                    row["values"]["parent_id"] = id_map[row["parent_temp_id"]]
+            new_ids = db.session.execute(
+                task_table.insert().returning(task_table.c.id, sort_by_parameter_order=True),
+                [{**row["values"], "created_at": now, "updated_at": now} for row in chunk],
+            ).scalars().all()
+
+            for row, task_id in zip(chunk, new_ids):
+                v = row["values"]
+                if row["temp_id"]:
+                    id_map[row["temp_id"]] = task_id
+                created.append((task_id, v["project_id"]))
+                add_project_stats_delta(stats_deltas, v["project_id"], task_stats_delta(
+                    v["story_points"], v["completed"], v["status"], v["task_type"]
+                ))
+
+                parent_id = v["parent_id"]
+                if parent_id is None:
+                    path, depth = f"/{task_id}/", 0
+                else:
+                    parent_path, parent_depth = hierarchy.get(parent_id, (None, None))
+                    path, depth = (f"{parent_path}{task_id}/", parent_depth + 1) if parent_path else (None, None)
+                hierarchy[task_id] = (path, depth)
+                placements.append({"b_id": task_id, "b_path": path, "b_depth": depth})
+
+                chain = [(task_id, 0)] + [(ancestor_id, d + 1) for ancestor_id, d in ancestors.get(parent_id, [])]
+                ancestors[task_id] = chain
+                closure_rows.extend(
+                    {"ancestor_id": ancestor_id, "descendant_id": task_id, "depth": d} for ancestor_id, d in chain
+                )
+
+    # ✅ Bulk inserts skip the flush hooks: hierarchy columns, closure rows, change log and stats in bulk
+    for start in range(0, len(placements), IMPORT_BATCH_SIZE):
+        db.session.execute(
+            update(task_table)
+            .where(task_table.c.id == bindparam("b_id"))
+            .values(path=bindparam("b_path"), depth=bindparam("b_depth")),
+            placements[start:start + IMPORT_BATCH_SIZE],
+        )
+    for start in range(0, len(closure_rows), IMPORT_BATCH_SIZE):
+        db.session.execute(closure_table.insert(), closure_rows[start:start + IMPORT_BATCH_SIZE])
+    record_task_changes(db.session.connection(), [(task_id, project_id, "upsert") for task_id, project_id in created])
+    apply_project_stats_deltas(db.session.connection(), stats_deltas)
+
+    logger.info(f"Imported {len(created)} task(s) into project(s) {sorted({p for _, p in created})}")
+    return id_map, created
@@ -1,12 +1,15 @@
 import logging
 from datetime import datetime, timezone
-from sqlalchemy import func, cast, CheckConstraint
-from sqlalchemy.orm import validates
+from sqlalchemy import case, func, cast, CheckConstraint, event, inspect, literal, select
+from sqlalchemy import delete as sa_delete, update as sa_update
+from sqlalchemy.orm import Session, validates
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.types import Enum
 from sqlalchemy.dialects.postgresql import ENUM
 from app.extensions.db import db
 from app.models import Project, Contributor
 from app.utils.common_utils import log_interaction
+from app.tasks.hierarchy_triggers import hierarchy_prechecks_enabled, install_hierarchy_triggers
 
 logger = logging.getLogger(__name__)  # Logger for this module
 
@@ -22,7 +25,7 @@ class Task(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    sort_order = db.Column(db.Integer, nullable=False, default=0, index=True)
+    sort_order = db.Column(db.Float, nullable=False, default=0, index=True)  # Fractional rank, see app.tasks.ranking
     description = db.Column(db.Text)
     task_type = db.Column(db.String(10), nullable=False, server_default='Subtask')
     
@@ -69,6 +72,12 @@ class Task(db.Model):
         onupdate=lambda: datetime.now(timezone.utc),
     )
     completed_date = db.Column(db.DateTime, nullable=True)
+
+    # ✅ Materialized path ("/epic_id/story_id/task_id/") and depth (Epic = 0), kept up to
+    # date by `maintain_task_hierarchy` below. A subtree is the range [path, task_path_upper_bound(path)).
+    # Byte-wise ("C") collation on Postgres so the range matches the prefix exactly.
+    path = db.Column(db.String(255).with_variant(db.String(255, collation="C"), "postgresql"), nullable=True)
+    depth = db.Column(db.Integer, nullable=True)
     
     
     ALLOWED_ESTIMATE_TYPES = ["story_points", "time"]
@@ -135,19 +144,21 @@ class Task(db.Model):
 
     
     __table_args__ = (
-    # ✅ Ensure proper task hierarchy
-        CheckConstraint(
-            "(task_type = 'Epic' AND parent_id IS NULL) OR "
-            "(task_type = 'User Story' AND parent_id IN (SELECT id FROM task WHERE task_type = 'Epic')) OR "
-            "(task_type = 'Subtask' AND parent_id IN (SELECT id FROM task WHERE task_type = 'User Story'))",
-            name="task_hierarchy_constraint"
-        ),
-        
+        # ✅ The task hierarchy (parent types, no cycles) is enforced by triggers,
+        #    see app.tasks.hierarchy_triggers: CHECK constraints cannot hold subqueries
+
         # ✅ Ensure Epics cannot have priority
         CheckConstraint(
             "(task_type != 'Epic' OR priority IS NULL)",
             name="check_epic_priority_null"
         ),
+
+        # ✅ Keyset pagination indexes: seek on (sort_order, id), optionally within a project
+        db.Index("ix_task_sort_order_id", "sort_order", "id"),
+        db.Index("ix_task_project_id_sort_order_id", "project_id", "sort_order", "id"),
+
+        # ✅ Subtree and ancestor lookups are range scans on the materialized path
+        db.Index("ix_task_path", "path"),
     )
 
     @validates('parent_id', 'task_type')
@@ -169,7 +180,7 @@ class Task(db.Model):
                 raise ValueError("A task cannot be its own parent.")
 
             # Check for circular references
-            if value:
+            if value and hierarchy_prechecks_enabled():
                 Task.check_circular_reference(self.id, value)
 
         elif key == 'task_type':
@@ -178,9 +189,16 @@ class Task(db.Model):
                 logger.info(f"Task {self.id}: Updating 'task_type' from {self.task_type} to {value}")
 
         # Check hierarchy rules without triggering further validation
-        if key in ['parent_id', 'task_type']:
+        if key in ['parent_id', 'task_type'] and hierarchy_prechecks_enabled():
             self._validate_hierarchy_change(key, value)
 
+        # Keep the session's cached parent and type maps in step with the accepted change
+        from app.tasks.ancestry import record_parent_change, record_task_type
+        if key == 'parent_id':
+            record_parent_change(self.id, value)
+        else:
+            record_task_type(self.id, value)
+
         logger.info(f"Validation passed for {key}: {value}")
         return value
 
@@ -188,25 +206,30 @@ class Task(db.Model):
         """
         Validates hierarchy changes based on task_type and parent_id.
         This method avoids setting attributes and focuses only on validation.
+
+        The parent's type comes from the session's type map (see `app.tasks.ancestry`),
+        so only the first lookup of a parent in a transaction costs a query.
         """
+        from app.tasks.ancestry import get_task_type
+
         if key == 'parent_id' and value:
-            parent_task = Task.query.with_entities(Task.task_type).filter_by(id=value).first()
-            if not parent_task:
+            parent_type = get_task_type(value)
+            if not parent_type:
                 raise ValueError("Parent task does not exist.")
 
-            logger.debug(f"Validating hierarchy: Task {self.id}, Parent Type: {parent_task.task_type}")
+            logger.debug(f"Validating hierarchy: Task {self.id}, Parent Type: {parent_type}")
             # Hierarchy rules
-            if self.task_type == "User Story" and parent_task.task_type != "Epic":
+            if self.task_type == "User Story" and parent_type != "Epic":
                 raise ValueError("A User Story can only have an Epic as a parent.")
-            if self.task_type == "Subtask" and parent_task.task_type != "User Story":
+            if self.task_type == "Subtask" and parent_type != "User Story":
                 raise ValueError("A Subtask can only have a User Story as a parent.")
         elif key == 'task_type' and self.parent_id:
-            parent_task = Task.query.with_entities(Task.task_type).filter_by(id=self.parent_id).first()
-            if parent_task:
-                logger.debug(f"Validating hierarchy: Task Type: {value}, Parent Type: {parent_task.task_type}")
-                if value == "User Story" and parent_task.task_type != "Epic":
+            parent_type = get_task_type(self.parent_id)
+            if parent_type:
+                logger.debug(f"Validating hierarchy: Task Type: {value}, Parent Type: {parent_type}")
+                if value == "User Story" and parent_type != "Epic":
                     raise ValueError("A User Story can only have an Epic as a parent.")
-                if value == "Subtask" and parent_task.task_type != "User Story":
+                if value == "Subtask" and parent_type != "User Story":
                     raise ValueError("A Subtask can only have a User Story as a parent.")
                 
         logger.info(f"Hierarchy validation passed for Task {self.id if self.id else 'New Task'}.")
@@ -215,31 +238,24 @@ class Task(db.Model):
     @staticmethod
     def check_circular_reference(task_id, parent_id):
         """
-        Iteratively checks for circular references in the task hierarchy.
-        Prevents stack overflow on deep hierarchies.
+        Checks that `task_id` is not an ancestor of (or equal to) `parent_id`.
+
+        The parent's whole ancestor chain comes from one recursive query, or from
+        the session's parent map if a batch validation already loaded it.
         """
-        visited = set()
-        current_parent_id = parent_id
-        
+        from app.tasks.ancestry import get_ancestor_ids
+
         logger.info(f"Checking circular reference for Task {task_id} with Parent ID: {parent_id}")
 
-        while current_parent_id:
-            if current_parent_id in visited:
-                logger.error("Circular reference detected!")
-                raise ValueError("Circular reference detected in task hierarchy.")
-            visited.add(current_parent_id)
-
-            if current_parent_id == task_id:
-                logger.error("A task cannot be its own ancestor.")
-                raise ValueError("A task cannot be its own ancestor.")
-
-            # Fetch the next parent_id in the hierarchy
-            task = Task.query.with_entities(Task.parent_id).filter_by(id=current_parent_id).first()
-            if not task:
-                # Exit when the task does not exist
-                break
-            current_parent_id = task.parent_id
-            
+        if task_id and parent_id == task_id:
+            logger.error("A task cannot be its own ancestor.")
+            raise ValueError("A task cannot be its own ancestor.")
+
+        ancestors = get_ancestor_ids(parent_id)  # Raises if the stored chain already loops
+        if task_id and task_id in ancestors:
+            logger.error("A task cannot be its own ancestor.")
+            raise ValueError("A task cannot be its own ancestor.")
+
         logger.info("Circular reference check passed.")
             
     @staticmethod
@@ -253,25 +269,10 @@ class Task(db.Model):
         Raises:
             ValueError: If a circular reference is detected.
         """
-        visited = set()
-        current_parent_id = new_parent_id
+        from app.tasks.ancestry import get_ancestor_ids
 
         logger.info(f"Validating circular references for parent ID: {new_parent_id}")
-
-        while current_parent_id:
-            if current_parent_id in visited:
-                logger.error(
-                    f"Circular reference detected: Parent ID {current_parent_id} already visited."
-                )
-                raise ValueError("Circular reference detected in task hierarchy.")
-            visited.add(current_parent_id)
-
-            # Fetch the next parent_id in the hierarchy
-            parent = Task.query.with_entities(Task.parent_id).filter_by(id=current_parent_id).first()
-            if not parent:
-                break  # Exit if no parent is found
-            current_parent_id = parent.parent_id
-
+        get_ancestor_ids(new_parent_id)
         logger.info("No circular reference detected.")
             
     def to_dict(self):
@@ -349,10 +350,10 @@ class Task(db.Model):
                 no_epic = Task.find_or_create_no_epic(self.project_id)
                 self.parent_id = no_epic.id
 
-            # ✅ Ensure sort order is set correctly for new tasks
+            # ✅ Ensure sort order is set correctly for new tasks (next rank of its parent/project)
             if self.sort_order is None:
-                max_sort_order = db.session.query(func.coalesce(func.max(Task.sort_order), 0)).scalar()
-                self.sort_order = max_sort_order + 1
+                from app.tasks.ranking import allocate_rank
+                self.sort_order = allocate_rank(parent_id=self.parent_id, project_id=self.project_id)
 
             db.session.add(self)
             db.session.commit()
@@ -369,6 +370,7 @@ class Task(db.Model):
         Deletes the task and optionally its children.
         If deleting an Epic, reassign its User Stories to 'No Epic'.
         """
+        task_id = self.id
         if self.task_type == "Epic":
             no_epic = Task.find_or_create_no_epic(self.project_id)
             for child in self.children:
@@ -378,25 +380,24 @@ class Task(db.Model):
                     db.session.add(child)
 
         if confirm:
-            for child in self.children:
-                db.session.delete(child)
-        db.session.delete(self)
+            db.session.flush()  # ✅ Re-parented User Stories leave the subtree before it is deleted
+            Task.delete_subtree([task_id])  # Whole subtree, however deep, in one statement
+        else:
+            db.session.delete(self)
         db.session.commit()
-        logger.info(f"Deleted task: {self.id}")
+        logger.info(f"Deleted task: {task_id}")
     
     def archive(self):
         """Archives the task and its subtasks."""
-        self.is_archived = True
         try:
-            for subtask in self.children:
-                subtask.archive()
+            archived = Task.set_subtree_archived([self.id], True)
             log_interaction(
                 caller="Task Model",
                 callee="Database",
                 action="Archive Task",
                 data={
                     "task_id": self.id,
-                    "subtasks_archived": [subtask.id for subtask in self.children],
+                    "subtasks_archived": [task_id for task_id, _ in archived if task_id != self.id],
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 }
             )
@@ -417,11 +418,99 @@ class Task(db.Model):
 
     def unarchive(self):
         """Unarchives the task and its subtasks."""
-        self.is_archived = False
-        for subtask in self.children:
-            subtask.unarchive()
+        Task.set_subtree_archived([self.id], False)
         db.session.commit()
 
+    @staticmethod
+    def subtree_ids(task_ids):
+        """Returns a subquery of the given tasks' ids plus all of their descendants (closure table)."""
+        return select(TaskClosure.descendant_id).where(TaskClosure.ancestor_id.in_(list(task_ids)))
+
+    @staticmethod
+    def set_subtree_archived(task_ids, archived=True):
+        """
+        Archives or unarchives the given tasks and their whole subtrees with one UPDATE.
+
+        Tasks already in the requested state are left alone. Logs the changes but
+        does not commit; the caller commits.
+
+        Returns:
+            list[tuple]: `(task_id, project_id)` of every updated task.
+        """
+        db.session.flush()
+        rows = db.session.execute(
+            sa_update(Task)
+            .where(Task.id.in_(Task.subtree_ids(task_ids)), Task.is_archived.is_distinct_from(archived))
+            .values(is_archived=archived)
+            .returning(Task.id, Task.project_id),
+            execution_options={"synchronize_session": False},
+        ).all()
+        record_task_changes(db.session.connection(), [(row.id, row.project_id, "upsert") for row in rows])
+        db.session.expire_all()  # ✅ Loaded tasks must not keep the old is_archived
+        logger.info(f"{'Archived' if archived else 'Unarchived'} {len(rows)} task(s) under {list(task_ids)}")
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    def delete_subtree(task_ids):
+        """
+        Deletes the given tasks and their whole subtrees with one DELETE.
+
+        Logs tombstones, clears the closure rows and subtracts the tasks from the
+        project stats, but does not commit.
+
+        Returns:
+            list[tuple]: `(task_id, project_id)` of every deleted task.
+        """
+        db.session.flush()
+        connection = db.session.connection()
+        removed = collect_project_stats(connection, Task.id.in_(Task.subtree_ids(task_ids)))
+        rows = db.session.execute(
+            sa_delete(Task)
+            .where(Task.id.in_(Task.subtree_ids(task_ids)))
+            .returning(Task.id, Task.project_id),
+            execution_options={"synchronize_session": False},
+        ).all()
+        delete_task_closure(connection, [row.id for row in rows])
+        record_task_changes(connection, [(row.id, row.project_id, "delete") for row in rows])
+        deltas = {}
+        for project_id, totals in removed.items():
+            add_project_stats_delta(deltas, project_id, totals, sign=-1)
+        apply_project_stats_deltas(connection, deltas)
+        logger.info(f"Deleted {len(rows)} task(s) under {list(task_ids)}")
+        return [tuple(row) for row in rows]
+
+    @staticmethod
+    def move_subtree_to_project(task_ids, project_id):
+        """
+        Moves the given tasks and their whole subtrees to another project with one UPDATE.
+
+        Logs the changes (a tombstone for the old project, an upsert for the new
+        one) and moves their totals between the project stats, but does not commit.
+
+        Returns:
+            list[tuple]: `(task_id, old_project_id)` of every moved task.
+        """
+        db.session.flush()
+        connection = db.session.connection()
+        subtree = Task.subtree_ids(task_ids)
+        old_rows = db.session.execute(select(Task.id, Task.project_id).where(Task.id.in_(subtree))).all()
+        moved = collect_project_stats(connection, Task.id.in_(subtree) & (Task.project_id != project_id))
+        db.session.execute(
+            sa_update(Task).where(Task.id.in_(subtree)).values(project_id=project_id),
+            execution_options={"synchronize_session": False},
+        )
+        changes = [(row.id, row.project_id, "delete") for row in old_rows if row.project_id != project_id]
+        changes += [(row.id, project_id, "upsert") for row in old_rows]
+        record_task_changes(connection, changes)
+        deltas = {}
+        for old_project_id, totals in moved.items():
+            add_project_stats_delta(deltas, old_project_id, totals, sign=-1)
+            add_project_stats_delta(deltas, project_id, totals)
+        apply_project_stats_deltas(connection, deltas)
+        db.session.expire_all()
+        logger.info(f"Moved {len(old_rows)} task(s) under {list(task_ids)} to project {project_id}")
+        return [tuple(row) for row in old_rows]
+
     def mark_completed(self):
         """Marks the task as completed."""
         self.completed = True
@@ -445,4 +534,555 @@ class Task(db.Model):
         return task_dict
 
     def __repr__(self):
-        return f"<Task {self.name} (ID: {self.id}, Type: {self.task_type})>"
\ No newline at end of file
+        return f"<Task {self.name} (ID: {self.id}, Type: {self.task_type})>"
+
+
+# ✅ Tables built by create_all() (tests, local SQLite) get the same hierarchy triggers as migrated databases
+event.listen(Task.__table__, "after_create", install_hierarchy_triggers)
+
+
+class TaskChange(db.Model):
+    """
+    Append-only log of task writes, used by clients to catch up on missed changes.
+
+    Rows are written in the same transaction as the task write (see
+    `record_task_changes`) with no version; `stamp_task_changes` gives them one
+    when that transaction commits, from the single `TaskChangeVersion` row. The
+    counter row stays locked until the commit, so versions increase in commit
+    order (unlike ids, which are handed out at flush time): a client that
+    remembers the last version it saw can ask for everything after it without
+    missing a transaction that committed later. All rows of one transaction
+    share a version.
+    """
+    __tablename__ = "task_change"
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False, index=True)  # No FK: deleted tasks keep their tombstone
+    project_id = db.Column(db.Integer, nullable=True)
+    change_type = db.Column(db.String(10), nullable=False)  # "upsert" or "delete"
+    changed_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    version = db.Column(db.BigInteger, nullable=True, index=True)  # NULL until the writing transaction commits
+
+    __table_args__ = (
+        db.Index("ix_task_change_project_id_version", "project_id", "version"),
+    )
+
+    @staticmethod
+    def latest_version():
+        """Returns the version of the newest committed change, or 0 if nothing was logged yet."""
+        return TaskChangeVersion.current().version
+
+    def __repr__(self):
+        return f"<TaskChange {self.id} v{self.version} ({self.change_type} task {self.task_id})>"
+
+
+class TaskChangeVersion(db.Model):
+    """
+    Single row (id 1) holding the last change version stamped, the version up to
+    which the change log was pruned (see `app.tasks.changes.prune_task_changes`),
+    and the epoch of every project version (see `app.tasks.versions.ProjectVersions`).
+    """
+    __tablename__ = "task_change_version"
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    pruned_through = db.Column(db.BigInteger, nullable=False, default=0)
+    epoch = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def current():
+        """Returns the counter row (a blank one if it was never created)."""
+        row = db.session.get(TaskChangeVersion, 1)
+        return row if row is not None else TaskChangeVersion(id=1, version=0, pruned_through=0, epoch=0)
+
+    def __repr__(self):
+        return f"<TaskChangeVersion {self.version} (pruned through {self.pruned_through})>"
+
+
+def seed_task_change_version(target, connection, **kw):
+    """Creates the counter row alongside its table, so stamping never has to."""
+    connection.execute(target.insert().values(id=1, version=0, pruned_through=0, epoch=0))
+
+
+event.listen(TaskChangeVersion.__table__, "after_create", seed_task_change_version)
+
+
+class TaskSortCounter(db.Model):
+    """
+    Last `sort_order` handed out per sorting scope ("parent:<task_id>" or
+    "project:<project_id>" for top-level tasks).
+
+    Lets new tasks get the next rank with one atomic UPDATE instead of a
+    `max(sort_order)` scan (see `app.tasks.ranking.allocate_rank`). A scope's row is
+    created, from the current maximum, the first time it is used.
+    """
+    __tablename__ = "task_sort_counter"
+
+    scope = db.Column(db.String(40), primary_key=True)
+    last_rank = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TaskSortCounter {self.scope}: {self.last_rank}>"
+
+
+class TaskClosure(db.Model):
+    """
+    Closure table of the task hierarchy: one row per (ancestor, descendant) pair,
+    including each task paired with itself at depth 0.
+
+    Maintained by `maintain_task_hierarchy` below; lets subtree operations
+    (archive, delete, move, rollups) run as single set-based statements.
+    """
+    __tablename__ = "task_closure"
+
+    ancestor_id = db.Column(db.Integer, db.ForeignKey("task.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = db.Column(db.Integer, db.ForeignKey("task.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<TaskClosure {self.ancestor_id} -> {self.descendant_id} ({self.depth})>"
+
+
+PROJECT_STATS_STATUS_COLUMNS = {
+    "Not Started": "not_started_count",
+    "In Progress": "in_progress_count",
+    "Completed": "completed_count",
+    "Archived": "archived_count",
+}
+PROJECT_STATS_TYPE_COLUMNS = {"Epic": "epic_count", "User Story": "user_story_count", "Subtask": "subtask_count"}
+PROJECT_STATS_COLUMNS = (
+    "task_count", "total_story_points", "completed_story_points",
+    *PROJECT_STATS_STATUS_COLUMNS.values(), *PROJECT_STATS_TYPE_COLUMNS.values(),
+)
+
+
+class ProjectStats(db.Model):
+    """
+    Running task totals of one project: story points, and task counts by status and type.
+
+    Kept up to date with delta arithmetic in the writing transaction: by
+    `maintain_project_stats` below for ORM flushes, and by the bulk helpers
+    through `apply_project_stats_deltas`. `refresh_project_stats` rebuilds rows
+    from the tasks (`flask repair-project-stats`).
+    """
+    __tablename__ = "project_stats"
+
+    project_id = db.Column(db.Integer, db.ForeignKey("project.id", ondelete="CASCADE"), primary_key=True)
+    task_count = db.Column(db.Integer, nullable=False, default=0)
+    total_story_points = db.Column(db.Integer, nullable=False, default=0)
+    completed_story_points = db.Column(db.Integer, nullable=False, default=0)
+    not_started_count = db.Column(db.Integer, nullable=False, default=0)
+    in_progress_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    archived_count = db.Column(db.Integer, nullable=False, default=0)
+    epic_count = db.Column(db.Integer, nullable=False, default=0)
+    user_story_count = db.Column(db.Integer, nullable=False, default=0)
+    subtask_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ProjectStats {self.project_id}: {self.task_count} task(s), {self.total_story_points} points>"
+
+
+TASK_CHANGES_PENDING_KEY = "task_changes_pending"  # session.info flag: the transaction logged changes to stamp
+
+
+def record_task_changes(connection, changes, session=None):
+    """
+    Appends rows to the change log on the given connection (i.e. inside the caller's transaction).
+
+    Bulk `Query.update()`/`Query.delete()` calls bypass the flush hook below and
+    must call this themselves, before the rows disappear. The rows get their
+    version when the session commits (see `stamp_task_changes`).
+
+    Args:
+        connection: The connection of the session doing the write (`db.session.connection()`).
+        changes (list[tuple]): `(task_id, project_id, change_type)` tuples.
+        session (Session, optional): The session owning `connection` (defaults to `db.session`).
+    """
+    if not changes:
+        return
+    (session or db.session).info[TASK_CHANGES_PENDING_KEY] = True
+    now = datetime.now(timezone.utc)
+    connection.execute(TaskChange.__table__.insert(), [
+        {"task_id": task_id, "project_id": project_id, "change_type": change_type, "changed_at": now}
+        for task_id, project_id, change_type in changes
+    ])
+
+
+@event.listens_for(Session, "after_flush")
+def log_task_changes(session, flush_context):
+    """Records every Task inserted, updated or deleted by a flush in the change log."""
+    changes = []
+    for task in session.new:
+        if isinstance(task, Task):
+            changes.append((task.id, task.project_id, "upsert"))
+    for task in session.dirty:
+        if isinstance(task, Task) and session.is_modified(task, include_collections=False):
+            old_project_ids = inspect(task).attrs.project_id.history.deleted
+            # ✅ Moving to another project removes the task from the old project's view
+            changes.extend((task.id, old_id, "delete") for old_id in old_project_ids if old_id != task.project_id)
+            changes.append((task.id, task.project_id, "upsert"))
+    for task in session.deleted:
+        if isinstance(task, Task):
+            changes.append((task.id, task.project_id, "delete"))
+    record_task_changes(session.connection(), changes, session)
+
+
+def next_change_version(connection):
+    """
+    Increments the change version counter and returns the new value.
+
+    The UPDATE locks the counter row until the transaction ends, so concurrent
+    committers take versions one after another, in commit order.
+    """
+    table = TaskChangeVersion.__table__
+    version = connection.execute(
+        sa_update(table).where(table.c.id == 1).values(version=table.c.version + 1).returning(table.c.version)
+    ).scalar()
+    if version is None:
+        # ✅ Databases created before the counter existed: start after the versions already handed out
+        last = connection.execute(select(func.coalesce(func.max(TaskChange.version), 0))).scalar()
+        version = last + 1
+        connection.execute(table.insert().values(id=1, version=version, pruned_through=0, epoch=0))
+    return version
+
+
+@event.listens_for(Session, "before_commit")
+def stamp_task_changes(session):
+    """Gives the change log rows written by the committing transaction the next change version."""
+    session.flush()  # ✅ before_commit runs before the final flush, which may still log changes
+    if not session.info.pop(TASK_CHANGES_PENDING_KEY, False):
+        return
+    connection = session.connection()
+    version = next_change_version(connection)
+    connection.execute(
+        sa_update(TaskChange.__table__).where(TaskChange.version.is_(None)).values(version=version)
+    )
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_pending_changes(session, transaction):
+    """Forgets unstamped changes once the outermost transaction ends (they were rolled back with it)."""
+    if transaction.parent is None:
+        session.info.pop(TASK_CHANGES_PENDING_KEY, None)
+
+
+def task_path_upper_bound(path):
+    """
+    Returns the exclusive upper bound of the subtree under `path`.
+
+    Every descendant path starts with `path`, which ends in "/"; replacing that
+    final "/" with the next character ("0") gives a bound no descendant reaches,
+    so `path <= x < bound` is a plain index range scan.
+    """
+    return path[:-1] + "0"
+
+
+def update_task_hierarchy(connection, moves):
+    """
+    Recomputes `path` and `depth` for tasks that were inserted or got a new parent,
+    shifts their existing descendants along with them and relinks their subtrees
+    in the closure table.
+
+    Bulk `Query.update()` calls that change `parent_id` bypass the flush hook
+    below and must call this themselves.
+
+    Args:
+        connection: The connection of the session doing the write (`db.session.connection()`).
+        moves (list[tuple]): `(task_id, new_parent_id)` pairs.
+
+    Returns:
+        dict: `{task_id: (path, depth)}` for the moved tasks.
+
+    Raises:
+        ValueError: If the moves would make a task its own ancestor.
+    """
+    task_table = Task.__table__
+    pending = dict(moves)
+    moved_ids = set(pending)
+    parent_ids = {parent_id for parent_id in pending.values() if parent_id and parent_id not in pending}
+    known = {}
+    if parent_ids:
+        rows = connection.execute(
+            select(task_table.c.id, task_table.c.path, task_table.c.depth).where(task_table.c.id.in_(parent_ids))
+        )
+        known = {row.id: (row.path, row.depth) for row in rows}
+
+    while pending:
+        # ✅ Parents first, so a task moved together with its parent sees the parent's new path
+        ready = [task_id for task_id, parent_id in pending.items() if parent_id not in pending]
+        if not ready:
+            raise ValueError("Circular reference detected in task hierarchy.")
+        for task_id in ready:
+            parent_id = pending.pop(task_id)
+            if parent_id:
+                parent_path, parent_depth = known.get(parent_id, (None, None))
+                if parent_path is None:
+                    new_path, new_depth = None, None  # Parent has no path (yet); leave unset
+                elif f"/{task_id}/" in parent_path:
+                    raise ValueError("A task cannot be its own ancestor.")
+                else:
+                    new_path, new_depth = f"{parent_path}{task_id}/", parent_depth + 1
+            else:
+                new_path, new_depth = f"/{task_id}/", 0
+
+            old = connection.execute(
+                select(task_table.c.path, task_table.c.depth).where(task_table.c.id == task_id)
+            ).first()
+            connection.execute(
+                task_table.update().where(task_table.c.id == task_id).values(path=new_path, depth=new_depth)
+            )
+            if old is not None and old.path and new_path and old.path != new_path:
+                # ✅ Re-prefix the whole subtree in one statement
+                connection.execute(
+                    task_table.update()
+                    .where(
+                        task_table.c.path > old.path,
+                        task_table.c.path < task_path_upper_bound(old.path),
+                    )
+                    .values(
+                        path=literal(new_path) + func.substr(task_table.c.path, len(old.path) + 1),
+                        depth=task_table.c.depth + (new_depth - (old.depth or 0)),
+                    )
+                )
+            relink_task_closure(connection, task_id, parent_id)
+            known[task_id] = (new_path, new_depth)
+
+    return {task_id: known[task_id] for task_id in moved_ids}
+
+
+def relink_task_closure(connection, task_id, parent_id):
+    """
+    Attaches a task's subtree to its (new) parent in the closure table.
+
+    Works for new tasks too: the task's own `(task, task, 0)` row is created if
+    missing, links from its former ancestors to anything in its subtree are
+    removed, and every ancestor of the new parent is linked to every node of the
+    subtree, all with set-based statements.
+    """
+    closure = TaskClosure.__table__
+    connection.execute(
+        closure.insert().from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(literal(task_id), literal(task_id), literal(0)).where(
+                ~select(closure.c.ancestor_id)
+                .where(closure.c.ancestor_id == task_id, closure.c.descendant_id == task_id)
+                .exists()
+            ),
+        )
+    )
+
+    subtree = select(closure.c.descendant_id).where(closure.c.ancestor_id == task_id).scalar_subquery()
+    connection.execute(
+        closure.delete().where(
+            closure.c.descendant_id.in_(subtree),
+            closure.c.ancestor_id.not_in(subtree),
+        )
+    )
+
+    if parent_id:
+        above = closure.alias("above")
+        below = closure.alias("below")
+        connection.execute(
+            closure.insert().from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1)
+                .select_from(above.join(below, below.c.ancestor_id == task_id))  # Every ancestor x every node
+                .where(above.c.descendant_id == parent_id),
+            )
+        )
+
+
+def delete_task_closure(connection, task_ids):
+    """Removes every closure row of the given tasks (bulk deletes must call this themselves)."""
+    if not task_ids:
+        return
+    closure = TaskClosure.__table__
+    connection.execute(
+        closure.delete().where(
+            closure.c.descendant_id.in_(task_ids) | closure.c.ancestor_id.in_(task_ids)
+        )
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def maintain_task_hierarchy(session, flush_context):
+    """Keeps `path`/`depth` and the closure table in sync for every Task a flush inserted, moved or deleted."""
+    deleted_ids = [task.id for task in session.deleted if isinstance(task, Task)]
+    delete_task_closure(session.connection(), deleted_ids)
+
+    tasks = [task for task in session.new if isinstance(task, Task)]
+    tasks.extend(
+        task for task in session.dirty
+        if isinstance(task, Task) and inspect(task).attrs.parent_id.history.has_changes()
+    )
+    if not tasks:
+        return
+    paths = update_task_hierarchy(session.connection(), [(task.id, task.parent_id) for task in tasks])
+    for task in tasks:
+        # ✅ Reflect the new values on the loaded objects without marking them dirty again
+        set_committed_value(task, "path", paths[task.id][0])
+        set_committed_value(task, "depth", paths[task.id][1])
+
+
+TASK_STATS_ATTRIBUTES = ("project_id", "story_points", "completed", "status", "task_type")
+
+# ✅ Stats deltas subtract the value a set replaces, so load it even when it was not loaded yet
+for _attribute in TASK_STATS_ATTRIBUTES:
+    event.listen(getattr(Task, _attribute), "set", lambda target, value, oldvalue, initiator: None, active_history=True)
+
+
+def task_stats_delta(story_points, completed, status, task_type, sign=1):
+    """Returns the `project_stats` column deltas of adding (sign=1) or removing (sign=-1) one task."""
+    points = story_points or 0
+    delta = {
+        "task_count": sign,
+        "total_story_points": sign * points,
+        "completed_story_points": sign * points if completed else 0,
+    }
+    if status in PROJECT_STATS_STATUS_COLUMNS:
+        delta[PROJECT_STATS_STATUS_COLUMNS[status]] = sign
+    if task_type in PROJECT_STATS_TYPE_COLUMNS:
+        delta[PROJECT_STATS_TYPE_COLUMNS[task_type]] = sign
+    return delta
+
+
+def add_project_stats_delta(deltas, project_id, delta, sign=1):
+    """Accumulates column deltas (or totals, negated with sign=-1) into `{project_id: {column: delta}}`."""
+    target = deltas.setdefault(project_id, {})
+    for column, value in delta.items():
+        target[column] = target.get(column, 0) + sign * value
+
+
+def project_stats_aggregates(task_table):
+    """Returns labelled aggregates computing every `project_stats` column over rows of `task_table`."""
+    points = func.coalesce(task_table.c.story_points, 0)
+
+    def count_where(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    return [
+        func.count(task_table.c.id).label("task_count"),
+        func.coalesce(func.sum(points), 0).label("total_story_points"),
+        func.coalesce(func.sum(case((task_table.c.completed.is_(True), points), else_=0)), 0)
+        .label("completed_story_points"),
+        *[count_where(task_table.c.status == status).label(column) for status, column in PROJECT_STATS_STATUS_COLUMNS.items()],
+        *[count_where(task_table.c.task_type == task_type).label(column) for task_type, column in PROJECT_STATS_TYPE_COLUMNS.items()],
+    ]
+
+
+def collect_project_stats(connection, condition):
+    """
+    Sums the `project_stats` columns of the tasks matching `condition`, per project,
+    with one GROUP BY. Bulk deletes and moves call this before their write.
+
+    Returns:
+        dict: `{project_id: {column: total}}`.
+    """
+    task_table = Task.__table__
+    rows = connection.execute(
+        select(task_table.c.project_id, *project_stats_aggregates(task_table))
+        .where(condition)
+        .group_by(task_table.c.project_id)
+    ).mappings()
+    return {row["project_id"]: {column: row[column] for column in PROJECT_STATS_COLUMNS} for row in rows}
+
+
+def apply_project_stats_deltas(connection, deltas):
+    """
+    Adds column deltas to `project_stats` with one UPDATE per project, inside the caller's transaction.
+
+    Must run after the task rows were written: a project without a stats row
+    gets it rebuilt from its tasks instead.
+
+    Args:
+        connection: The connection of the session doing the write (`db.session.connection()`).
+        deltas (dict): `{project_id: {column: delta}}`.
+    """
+    stats = ProjectStats.__table__
+    for project_id, delta in deltas.items():
+        delta = {column: value for column, value in delta.items() if value}
+        if not delta or project_id is None:
+            continue
+        result = connection.execute(
+            sa_update(stats)
+            .where(stats.c.project_id == project_id)
+            .values({stats.c[column]: stats.c[column] + value for column, value in delta.items()})
+        )
+        if result.rowcount == 0:
+            refresh_project_stats(connection, [project_id])
+
+
+def refresh_project_stats(connection, project_ids=None):
+    """
+    Rebuilds `project_stats` rows from the tasks with one INSERT ... SELECT.
+
+    Args:
+        project_ids (iterable[int] | None): The projects to rebuild; all projects when None.
+
+    Returns:
+        int: The number of rows written.
+    """
+    stats, project_table, task_table = ProjectStats.__table__, Project.__table__, Task.__table__
+    query = (
+        select(project_table.c.id, *project_stats_aggregates(task_table))
+        .select_from(project_table.outerjoin(task_table, task_table.c.project_id == project_table.c.id))
+        .group_by(project_table.c.id)
+    )
+    clear = sa_delete(stats)
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        query = query.where(project_table.c.id.in_(project_ids))
+        clear = clear.where(stats.c.project_id.in_(project_ids))
+    connection.execute(clear)
+    return connection.execute(stats.insert().from_select(["project_id", *PROJECT_STATS_COLUMNS], query)).rowcount
+
+
+def _task_stats_values(task, committed=False):
+    """Returns the stats attributes of a task, as of the flush (or as loaded, with `committed=True`)."""
+    state = inspect(task)
+    values = []
+    for name in TASK_STATS_ATTRIBUTES:
+        history = state.attrs[name].history
+        if committed and history.deleted:
+            values.append(history.deleted[0])
+        elif committed and history.unchanged:
+            values.append(history.unchanged[0])
+        else:
+            values.append(getattr(task, name))
+    return values
+
+
+@event.listens_for(Session, "after_flush")
+def maintain_project_stats(session, flush_context):
+    """Applies the stats deltas of every Task (and Project) a flush inserted, changed or deleted."""
+    connection = session.connection()
+    stats = ProjectStats.__table__
+
+    new_project_ids = [project.id for project in session.new if isinstance(project, Project)]
+    if new_project_ids:
+        connection.execute(stats.insert(), [{"project_id": project_id} for project_id in new_project_ids])
+    deleted_project_ids = [project.id for project in session.deleted if isinstance(project, Project)]
+    if deleted_project_ids:
+        connection.execute(sa_delete(stats).where(stats.c.project_id.in_(deleted_project_ids)))
+
+    deltas = {}
+    for task in session.new:
+        if isinstance(task, Task):
+            project_id, *values = _task_stats_values(task)
+            add_project_stats_delta(deltas, project_id, task_stats_delta(*values))
+    for task in session.deleted:
+        if isinstance(task, Task):
+            project_id, *values = _task_stats_values(task, committed=True)
+            add_project_stats_delta(deltas, project_id, task_stats_delta(*values, sign=-1))
+    for task in session.dirty:
+        if not isinstance(task, Task) or task in session.deleted:
+            continue
+        state = inspect(task)
+        if not any(state.attrs[name].history.has_changes() for name in TASK_STATS_ATTRIBUTES):
+            continue
+        old_project_id, *old_values = _task_stats_values(task, committed=True)
+        project_id, *values = _task_stats_values(task)
+        add_project_stats_delta(deltas, old_project_id, task_stats_delta(*old_values, sign=-1))
+        add_project_stats_delta(deltas, project_id, task_stats_delta(*values))
+    apply_project_stats_deltas(connection, deltas)
@@ -0,0 +1,240 @@
+import logging
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from app import socketio
+from app.extensions.db import db
+from app.tasks.models import Task, TaskSortCounter, record_task_changes
+
+logger = logging.getLogger(__name__)  # Logger for this module
+
+RANK_STEP = 1024.0  # Gap between neighbours after a (re)numbering, and after the last task
+MIN_RANK_GAP = 1e-6  # Below this two neighbours cannot be split reliably: renumber first
+REBALANCE_GAP = 1e-3  # A move that leaves a gap this small schedules a background renumbering
+REBALANCE_RETRIES = 3  # Background renumberings retried after losing a race with a concurrent move
+
+
+def rank_between(before, after):
+    """
+    Returns a `sort_order` strictly between two neighbouring ranks.
+
+    Either neighbour may be None (start or end of the level).
+    """
+    if before is None and after is None:
+        return RANK_STEP
+    if before is None:
+        return after - RANK_STEP
+    if after is None:
+        return before + RANK_STEP
+    return (before + after) / 2
+
+
+def counter_scope(parent_id=None, project_id=None):
+    """Returns the `TaskSortCounter` key of a parent's children, or of a project's top-level tasks."""
+    return f"parent:{parent_id}" if parent_id else f"project:{project_id}"
+
+
+def allocate_rank(parent_id=None, project_id=None, count=1, floor=None):
+    """
+    Reserves `count` ranks after the last task of a parent (or of a project when
+    `parent_id` is None), with one atomic UPDATE of the scope's counter row.
+
+    Concurrent callers are serialized by the row lock, so they never get the same
+    rank. The first use of a scope seeds its counter from the current maximum.
+
+    Args:
+        floor (float | None): A rank already used in the scope that the counter
+            must move past (e.g. a task just placed at the end).
+
+    Returns:
+        float: The first reserved rank; the others follow `RANK_STEP` apart.
+    """
+    counters = TaskSortCounter.__table__
+    scope = counter_scope(parent_id, project_id)
+    step = RANK_STEP * count
+    current = counters.c.last_rank
+    if floor is not None:
+        current = case((counters.c.last_rank < floor, floor), else_=counters.c.last_rank)
+    reserve = (
+        update(counters)
+        .where(counters.c.scope == scope)
+        .values(last_rank=current + step)
+        .returning(counters.c.last_rank)
+    )
+
+    last = db.session.execute(reserve).scalar()
+    if last is None:
+        _seed_counter(scope, parent_id, project_id)
+        last = db.session.execute(reserve).scalar()
+    return last - step + RANK_STEP
+
+
+def _seed_counter(scope, parent_id, project_id):
+    """Creates a scope's counter from the highest rank it currently holds (once per scope)."""
+    scope_filter = Task.parent_id == parent_id if parent_id else Task.project_id == project_id
+    seed = db.session.query(func.coalesce(func.max(Task.sort_order), 0.0)).filter(scope_filter).scalar()
+    try:
+        with db.session.begin_nested():
+            db.session.execute(TaskSortCounter.__table__.insert().values(scope=scope, last_rank=seed))
+    except IntegrityError:
+        logger.debug(f"Sort counter {scope} was created concurrently")  # The other request's row is used
+
+
+def raise_rank_floor(parent_id=None, project_id=None, rank=None):
+    """
+    Moves a scope's counter up to `rank` if a write placed a task beyond it.
+
+    Scopes without a counter row are left alone; their seed will include the rank.
+    """
+    if rank is None:
+        return
+    counters = TaskSortCounter.__table__
+    db.session.execute(
+        update(counters)
+        .where(counters.c.scope == counter_scope(parent_id, project_id), counters.c.last_rank < rank)
+        .values(last_rank=rank)
+    )
+
+
+def sibling_scope(task):
+    """
+    Returns the filter conditions of the level a task is sorted in: its siblings under
+    the same parent, or the top-level tasks of its project.
+    """
+    if task.parent_id is not None:
+        return [Task.parent_id == task.parent_id]
+    conditions = [Task.parent_id.is_(None), Task.project_id == task.project_id]
+    if task.task_type == "User Story":
+        conditions.append(Task.task_type == "User Story")  # ✅ Parentless stories sort among themselves
+    return conditions
+
+
+def move_to_index(task, new_index):
+    """
+    Moves a task to position `new_index` among its siblings by writing its rank only.
+
+    Only the two future neighbours are read. If they are too close to be split, the
+    level is renumbered first (in the caller's transaction). Does not commit.
+
+    Returns:
+        tuple: `(new_rank, needs_rebalance)`; `needs_rebalance` is True when the new gap
+        is small enough that the level should be renumbered in the background.
+    """
+    scope = sibling_scope(task)
+    new_index = max(int(new_index), 0)
+
+    def neighbours():
+        rows = db.session.execute(
+            select(Task.sort_order)
+            .where(*scope, Task.id != task.id)
+            .order_by(Task.sort_order, Task.id)
+            .offset(max(new_index - 1, 0))
+            .limit(2)
+        ).scalars().all()
+        if new_index == 0:
+            return None, rows[0] if rows else None
+        return (rows[0] if rows else None), (rows[1] if len(rows) > 1 else None)
+
+    before, after = neighbours()
+    if before is not None and after is not None and after - before < MIN_RANK_GAP:
+        logger.info(f"Rank space exhausted around index {new_index}; renumbering level of task {task.id}")
+        rebalance_level(scope, exclude_id=task.id)
+        before, after = neighbours()
+
+    if after is None:
+        # ✅ Moving to the end: take a fresh rank from the counter, past the current last task
+        task.sort_order = allocate_rank(task.parent_id, task.project_id, floor=before)
+    else:
+        task.sort_order = rank_between(before, after)
+    needs_rebalance = before is not None and after is not None and after - before < REBALANCE_GAP
+    return task.sort_order, needs_rebalance
+
+
+def rebalance_level(scope, exclude_id=None, lock=False):
+    """
+    Renumbers one sorting level to evenly spaced ranks (`RANK_STEP` apart), keeping its order.
+
+    Only rows whose rank changes are written, with a single executemany UPDATE that
+    only applies where a row still has the rank that was read, so a concurrent move
+    is never overwritten. The level's sort counter is moved past the new last rank.
+    Does not commit.
+
+    Args:
+        scope (list): Filter conditions of the level (see `sibling_scope`).
+        exclude_id (int | None): A task to leave out (e.g. the one being moved).
+        lock (bool): Lock the level's rows while reading them (`SELECT ... FOR UPDATE`,
+            ignored by SQLite). Used outside a request, where nothing else holds them.
+
+    Returns:
+        list[tuple]: `(task_id, project_id)` of every renumbered task.
+
+    Raises:
+        StaleDataError: If a task's rank changed between the read and the write.
+    """
+    db.session.flush()
+    conditions = list(scope) + ([Task.id != exclude_id] if exclude_id is not None else [])
+    query = select(Task.id, Task.project_id, Task.parent_id, Task.sort_order).where(*conditions).order_by(Task.sort_order, Task.id)
+    if lock:
+        query = query.with_for_update()
+    rows = db.session.execute(query).all()
+
+    changed = [
+        (row.id, row.project_id, row.sort_order, (index + 1) * RANK_STEP)
+        for index, row in enumerate(rows)
+        if row.sort_order != (index + 1) * RANK_STEP
+    ]
+    if changed:
+        task_table = Task.__table__
+        result = db.session.execute(
+            update(task_table)
+            .where(task_table.c.id == bindparam("b_id"), task_table.c.sort_order == bindparam("b_old_sort_order"))
+            .values(sort_order=bindparam("b_sort_order")),
+            [
+                {"b_id": task_id, "b_old_sort_order": old_rank, "b_sort_order": rank}
+                for task_id, _, old_rank, rank in changed
+            ],
+        )
+        # ✅ Compare-and-set: where the driver reports executemany counts, a row that moved meanwhile shows up here
+        if db.session.get_bind().dialect.supports_sane_multi_rowcount and result.rowcount != len(changed):
+            raise StaleDataError(
+                f"Level renumbering expected to update {len(changed)} task(s), updated {result.rowcount}"
+            )
+        record_task_changes(db.session.connection(), [(task_id, project_id, "upsert") for task_id, project_id, _, _ in changed])
+        db.session.expire_all()  # ✅ Loaded tasks must not keep their old rank
+    if rows:
+        # ✅ The level may hold more tasks than its counter handed out (e.g. after reparenting)
+        raise_rank_floor(rows[0].parent_id, rows[0].project_id, len(rows) * RANK_STEP)
+    logger.info(f"Renumbered {len(changed)} of {len(rows)} task(s) in a sorting level")
+    return [(task_id, project_id) for task_id, project_id, _, _ in changed]
+
+
+def schedule_rebalance(app, task_id):
+    """
+    Renumbers the level of `task_id` in a background task, outside the request.
+
+    The level is locked while it is read and written; if a move still slips in
+    between (SQLite has no row locks), the renumbering is retried from a fresh read.
+    """
+    def run():
+        with app.app_context():
+            try:
+                for attempt in range(1, REBALANCE_RETRIES + 1):
+                    task = db.session.get(Task, task_id)
+                    if task is None:
+                        return
+                    try:
+                        rebalance_level(sibling_scope(task), lock=True)
+                        db.session.commit()
+                    except StaleDataError as e:
+                        logger.warning(f"Background rebalance for task {task_id} raced a move (attempt {attempt}): {e}")
+                        db.session.rollback()
+                        continue
+                    return
+                logger.error(f"Background rebalance for task {task_id} gave up after {REBALANCE_RETRIES} attempts")
+            except Exception as e:
+                logger.error(f"Background rebalance for task {task_id} failed: {e}")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+    socketio.start_background_task(run)
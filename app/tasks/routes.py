@@ -4,10 +4,15 @@ from builtins import any
 from flask import Blueprint, render_template, request, flash, url_for, redirect, jsonify, make_response
 from flask_cors import CORS
 from app.forms.forms import csrf
+from sqlalchemy.exc import IntegrityError
 from app.extensions.db import db
 from app.tasks.models import Task
+from app.tasks.hierarchy_triggers import hierarchy_violation
 from app.models import Project
 from app.tasks.utils import TaskService
+from app.tasks.serializers import parse_fields, select_task_rows, serialize_task_row
+from app.tasks.tree_cache import task_tree_cache, build_task_tree
+from app.utils.socket_events import queue_event
 from app.models import Contributor
 
 
@@ -47,72 +52,74 @@ def list_tasks():
     logger.debug(f"Filters used: {filters}")
 
     try:
-        if project_id:
+        if project_id and hierarchical:
+            # ✅ Serve the already-nested tree from the per-project cache when possible
+            tasks = task_tree_cache.get(project_id, variant="active")
+            if tasks is None:
+                generation = task_tree_cache.generation(project_id)
+                all_tasks = TaskService.fetch_all_tasks_as_dicts(filters)
+                logger.debug(f"Tasks fetched: {all_tasks}")
+                if not all_tasks:
+                    logger.error("ERROR: No tasks returned. The function fetch_all_tasks_as_dicts might be filtering everything out.")
+
+                # Build hierarchy for the tasks
+                tasks = build_task_tree(all_tasks)
+                task_tree_cache.set(project_id, tasks, variant="active", generation=generation)
+            top_level_tasks = tasks
+
+            # Pagination metadata for hierarchical view (mocked)
+            pagination = {
+                "page": 1,
+                "per_page": len(top_level_tasks),
+                "total": len(top_level_tasks),
+                "pages": 1,
+                "page_numbers": [1],
+            }
+        elif project_id:
             # Fetch all tasks for the project
             all_tasks = TaskService.fetch_all_tasks_as_dicts(filters)
             logger.debug(f"Tasks fetched: {all_tasks}")
             if not all_tasks:
                 logger.error("ERROR: No tasks returned. The function fetch_all_tasks_as_dicts might be filtering everything out.")
 
-            if hierarchical:
-                # Build hierarchy for the tasks
-                task_map = {task["id"]: task for task in all_tasks}
-                top_level_tasks = [task for task in all_tasks if task["parent_id"] is None]
-
-                for task in all_tasks:
-                    if task.parent_id:
-                        parent = task_map.get(task.parent_id)
-                        if parent:
-                            parent.children.append(task)
-
-                # Serialize tasks for the hierarchical view
-                tasks = [task.to_dict_with_children() for task in top_level_tasks]
-
-                # Pagination metadata for hierarchical view (mocked)
-                pagination = {
-                    "page": 1,
-                    "per_page": len(top_level_tasks),
-                    "total": len(top_level_tasks),
-                    "pages": 1,
-                    "page_numbers": [1],
-                }
-            else:
-                # Flatten tasks for non-hierarchical view
-                tasks_flat = [task for task in all_tasks]
-                start = (page - 1) * per_page
-                end = start + per_page
-                tasks = [task.to_dict() for task in tasks_flat[start:end]]
-
-                # Pagination metadata for non-hierarchical view
-                pagination = {
-                    "page": page,
-                    "per_page": per_page,
-                    "total": len(tasks_flat),
-                    "pages": (len(tasks_flat) + per_page - 1) // per_page,
-                    "page_numbers": TaskService.generate_page_numbers(
-                        current_page=page,
-                        total_pages=(len(tasks_flat) + per_page - 1) // per_page
-                    ),
-                }
+            # Flatten tasks for non-hierarchical view
+            tasks_flat = [task for task in all_tasks]
+            start = (page - 1) * per_page
+            end = start + per_page
+            tasks = tasks_flat[start:end]  # ✅ Already serialized by fetch_all_tasks_as_dicts
+
+            # Pagination metadata for non-hierarchical view
+            pagination = {
+                "page": page,
+                "per_page": per_page,
+                "total": len(tasks_flat),
+                "pages": (len(tasks_flat) + per_page - 1) // per_page,
+                "page_numbers": TaskService.generate_page_numbers(
+                    current_page=page,
+                    total_pages=(len(tasks_flat) + per_page - 1) // per_page
+                ),
+            }
         else:
             # Default case when project_id is not provided
-            tasks_query = TaskService.filter_tasks(filters=filters)
-            pagination_obj = tasks_query.paginate(page=page, per_page=per_page, error_out=False)
-            tasks = [task.to_dict() for task in pagination_obj.items]
+            tasks_query = TaskService.filter_tasks(filters=filters, page=page, per_page=per_page)
+            tasks = TaskService.fetch_task_dicts(tasks_query)
+            total, _ = TaskService.count_tasks(filters)
+            pages = (total + per_page - 1) // per_page
             pagination = {
-                "page": pagination_obj.page,
-                "per_page": pagination_obj.per_page,
-                "total": pagination_obj.total,
-                "pages": pagination_obj.pages,
+                "page": page,
+                "per_page": per_page,
+                "total": total,
+                "pages": pages,
                 "page_numbers": TaskService.generate_page_numbers(
-                    current_page=pagination_obj.page,
-                    total_pages=pagination_obj.pages
+                    current_page=page,
+                    total_pages=pages
                 ),
             }
 
-        # Fetch additional data for the template
-        task_types = ["all"] + [t[0] for t in db.session.query(Task.task_type).distinct()]
-        projects = Project.query.options(db.lazyload(Project.contributors)).all()
+        # Fetch additional data for the template (task types come from the metadata cache;
+        # the template also needs each project's contributors, so load them in one go)
+        task_types = TaskService.get_task_metadata()[0]["task_types"]
+        projects = Project.query.options(db.selectinload(Project.contributors)).all()
 
         # Add logic for selected project and contributor for clarity in UI
         selected_project = Project.query.options(db.joinedload(Project.contributors)).get(project_id) if project_id else None
@@ -266,19 +273,22 @@ def archive_task(task_id):
     """Archive a task and its subtasks."""
     logger.info(f"Attempting to archive task with ID {task_id}")
     try:
-        task = TaskService.fetch_task_with_logging(task_id)
+        task = Task.query.get(task_id)
+        if not task:
+            raise ValueError(f"Task with ID {task_id} not found.")
         if task.is_archived:
             flash(f"Task '{task.name}' is already archived.", "info")
-            return redirect(url_for("tasks.list_tasks"))
+            return redirect(url_for("tasks_bp.list_tasks"))
 
-        TaskService.archive_task(task)
-        db.session.commit()
-        flash(f"Task '{task.name}' and its subtasks archived successfully!", "success")
+        task_name = task.name
+        archived_ids = TaskService.bulk_set_archived([task_id], True)
+        queue_event("tasks_archived", {"task_ids": archived_ids, "is_archived": True}, committed=True)
+        flash(f"Task '{task_name}' and its subtasks archived successfully!", "success")
     except Exception as e:
         logger.error(f"Error while archiving task '{task_id}': {e}")
         db.session.rollback()
         flash(f"An error occurred: {e}", "danger")
-    return redirect(url_for("tasks.list_tasks"))
+    return redirect(url_for("tasks_bp.list_tasks"))
 
 
 @bp.route("/unarchive/<int:task_id>", methods=["POST"])
@@ -286,19 +296,22 @@ def unarchive_task(task_id):
     """Unarchive a task and its subtasks."""
     logger.info(f"Unarchiving task with ID {task_id}")
     try:
-        task = TaskService.fetch_task_with_logging(task_id)
+        task = Task.query.get(task_id)
+        if not task:
+            raise ValueError(f"Task with ID {task_id} not found.")
         if not task.is_archived:
             flash(f"Task '{task.name}' is not archived.", "info")
-            return redirect(url_for("tasks.list_tasks"))
+            return redirect(url_for("tasks_bp.list_tasks"))
 
-        task.is_archived = False
-        db.session.commit()
-        flash(f"Task '{task.name}' and its subtasks unarchived successfully!", "success")
+        task_name = task.name
+        unarchived_ids = TaskService.bulk_set_archived([task_id], False)
+        queue_event("tasks_archived", {"task_ids": unarchived_ids, "is_archived": False}, committed=True)
+        flash(f"Task '{task_name}' and its subtasks unarchived successfully!", "success")
     except Exception as e:
         logger.error(f"Error unarchiving task '{task_id}': {e}")
         db.session.rollback()
         flash(f"An error occurred: {e}", "danger")
-    return redirect(url_for("tasks.list_tasks"))
+    return redirect(url_for("tasks_bp.list_tasks"))
 
 
 @bp.route("/disconnect/<int:task_id>", methods=["POST"])
@@ -342,6 +355,11 @@ def available_tasks():
         project_id = request.args.get("project_id", type=int)
         limit = request.args.get("limit", 30, type=int)
         page = request.args.get("page", 1, type=int)
+        try:
+            # ✅ Sparse fieldset; the picker only needs id, name and task_type by default
+            fields = parse_fields(request.args.get("fields") or "id,name,task_type")
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
 
         # Log query parameters
         logger.debug(f"Query parameters: task_type={task_type}, exclude_task_id={exclude_task_id}, search_term={search_term}, project_id={project_id}, limit={limit}, page={page}")
@@ -391,27 +409,28 @@ def available_tasks():
             return jsonify({"error": str(ve)}), 400
 
         # Build the query with explicit field selection
-        query = TaskService.filter_tasks(filters=filters, include_subtasks=False).with_entities(
-            Task.id, Task.name, Task.task_type
+        query = TaskService.apply_filters(
+            select_task_rows(fields).order_by(Task.sort_order),
+            filters,
+            include_subtasks=False,
         )
 
         # Apply search term if provided
         if search_term:
-            query = query.filter(Task.name.ilike(f"%{search_term}%"))
+            query = query.where(Task.name.ilike(f"%{search_term}%"))
 
         # Pagination logic
         offset = (page - 1) * limit
-        tasks = query.limit(limit + 1).offset(offset).all()
+        tasks = db.session.execute(query.limit(limit + 1).offset(offset)).all()
         has_more = len(tasks) > limit
         tasks = tasks[:limit]
 
-        # Serialize tasks
+        # Serialize tasks (the current parent is looked up once, not per row)
+        current_parent_id = current_task.parent_id if exclude_task_id else None
         task_list = [
             {
-                "id": task.id,
-                "name": task.name,
-                "task_type": task.task_type,
-                "is_parent": task.id == Task.query.get(exclude_task_id).parent_id if exclude_task_id else False,
+                **serialize_task_row(task, fields),
+                "is_parent": task.id == current_parent_id if exclude_task_id else False,
             }
             for task in tasks
         ]
@@ -420,14 +439,11 @@ def available_tasks():
         if exclude_task_id:
             current_task = Task.query.get(exclude_task_id)
             if current_task and current_task.parent_id:
-                parent_task = Task.query.get(current_task.parent_id)
-                if parent_task and not any(task["id"] == parent_task.id for task in task_list):
-                    task_list.append({
-                        "id": parent_task.id,
-                        "name": parent_task.name,
-                        "task_type": parent_task.task_type,
-                        "is_parent": True
-                    })
+                parent_row = db.session.execute(
+                    select_task_rows(fields).where(Task.id == current_task.parent_id)
+                ).first()
+                if parent_row and not any(task.id == parent_row.id for task in tasks):
+                    task_list.append({**serialize_task_row(parent_row, fields), "is_parent": True})
 
         logger.debug(f"Tasks returned: {task_list}")
     
@@ -565,6 +581,7 @@ def reorder_subtasks():
         # Step 2: Validate input
         if not isinstance(ordered_tasks, list) or not all(
             isinstance(task, dict) and "id" in task and "sort_order" in task and "parent_id" in task
+            and isinstance(task["sort_order"], (int, float)) and not isinstance(task["sort_order"], bool)
             for task in ordered_tasks
         ):
             logger.error(f"Invalid input received for ordered_tasks: {ordered_tasks}")
@@ -579,57 +596,41 @@ def reorder_subtasks():
                 logger.error(f"Parent task with ID {parent_id} not found.")
                 return jsonify({"error": f"Parent ID {parent_id} is invalid or does not exist."}), 400
 
-        logger.info("Input validation passed. Proceeding with task updates...")
-
-        # Step 4: Process updates for each subtask
-        updated_subtasks = []  # Keep track of updated subtasks for post-commit validation
-
-        for task_data in ordered_tasks:
-            subtask_id = task_data["id"]
-            sort_order = task_data["sort_order"]
-            new_parent_id = task_data["parent_id"]
-
-            # Fetch the subtask from the database
-            subtask = Task.query.get(subtask_id)
-            if not subtask:
-                logger.warning(f"Subtask ID {subtask_id} not found. Skipping...")
-                continue
-
-            # Log and update parent_id if it changes
-            if new_parent_id is not None and new_parent_id != subtask.parent_id:
-                logger.info(f"Reassigning subtask {subtask.id} to new parent {new_parent_id}")
-                subtask.parent_id = new_parent_id
-
-            # Update sort order
-            subtask.sort_order = sort_order
-            logger.debug(f"Updated subtask {subtask.id}: parent_id={subtask.parent_id}, sort_order={subtask.sort_order}")
-
-            # Add to the list of updated subtasks for validation
-            updated_subtasks.append(subtask)
+        # Step 4: Validate the whole ordering in memory and write only the changed rows
+        try:
+            updated_subtasks, changed = TaskService.bulk_reorder(ordered_tasks)
+        except ValueError as ve:
+            logger.error(f"Invalid reorder payload: {ve}")
+            db.session.rollback()
+            return jsonify({"error": str(ve)}), 400
+        except IntegrityError as ie:
+            logger.error(f"Reorder rejected by the database: {ie}")
+            db.session.rollback()
+            return jsonify({"error": hierarchy_violation(ie) or "Database constraint error"}), 400
 
         # Step 5: Commit changes to the database
         try:
             db.session.commit()
-            logger.info(f"Subtasks reordered successfully: {[task['id'] for task in ordered_tasks]}")
+            logger.info(f"Subtasks reordered successfully: {updated_subtasks}")
+        except IntegrityError as ie:
+            logger.error(f"Reorder rejected by the database: {ie}")
+            db.session.rollback()
+            return jsonify({"error": hierarchy_violation(ie) or "Database constraint error"}), 400
         except Exception as e:
             logger.error(f"Error committing changes to the database: {str(e)}")
             db.session.rollback()
             return jsonify({"error": "Failed to save changes to the database. Please try again."}), 500
 
-        # Step 6: Post-commit validation
-        for subtask in updated_subtasks:
-            logger.debug(f"Post-commit parent_id for task {subtask.id}: {subtask.parent_id}")
-            logger.debug(f"Post-commit sort_order for task {subtask.id}: {subtask.sort_order}")
-
-        # Step 7: Return success response
+        # Step 6: Return success response
         return jsonify({
             "success": True,
             "message": "Subtasks reordered successfully.",
-            "updated_subtasks": [subtask.id for subtask in updated_subtasks]
+            "updated_subtasks": updated_subtasks,
+            "changed_tasks": [task_id for task_id, _ in changed]
         }), 200
 
     except Exception as e:
-        # Step 8: Handle unexpected errors
+        # Step 7: Handle unexpected errors
         logger.error(f"Error while reordering subtasks: {str(e)}", exc_info=True)
         db.session.rollback()
         return jsonify({"error": "An unexpected error occurred while reordering subtasks."}), 500
@@ -652,14 +653,19 @@ def batch_update_tasks():
     if not task_ids or not action:
         return jsonify({"error": "Task IDs and action are required"}), 400
     try:
+        if action in ("archive", "unarchive"):
+            # ✅ Cascades to every descendant, in one UPDATE and one commit
+            archived = action == "archive"
+            affected_ids = TaskService.bulk_set_archived(task_ids, archived)
+            queue_event("tasks_archived", {"task_ids": affected_ids, "is_archived": archived}, committed=True)
+            return jsonify({"success": True, "task_ids": affected_ids})
+
         tasks = Task.query.filter(Task.id.in_(task_ids)).all()
         for task in tasks:
-            if action == "archive":
-                task.is_archived = True
-            elif action == "complete":
+            if action == "complete":
                 task.completed = True
         db.session.commit()
-        return jsonify({"success": True})
+        return jsonify({"success": True, "task_ids": [task.id for task in tasks]})
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,168 @@
+import json
+import logging
+from sqlalchemy import select
+from app.models import Project, Contributor
+from app.tasks.models import Task
+
+logger = logging.getLogger(__name__)  # Logger for this module
+
+
+# Output field -> the columns it is computed from, in `Task.to_dict()` key order
+_FIELD_COLUMNS = {
+    "id": (Task.id,),
+    "name": (Task.name,),
+    "description": (Task.description,),
+    "task_type": (Task.task_type,),
+    "priority": (Task.priority,),
+    "epic_priority": (Task.epic_priority, Task.task_type),
+    "is_archived": (Task.is_archived,),
+    "completed": (Task.completed,),
+    "parent_id": (Task.parent_id,),
+    "project_id": (Task.project_id,),
+    "project": (Project.name.label("project_name"),),
+    "contributor_id": (Task.contributor_id,),
+    "assigned_to": (Contributor.name.label("contributor_name"),),
+    "estimate_type": (Task.estimate_type,),
+    "estimate": (Task.estimate_type, Task.story_points, Task.time_estimate),
+    "status": (Task.status,),
+    "sort_order": (Task.sort_order,),
+    "created_at": (Task.created_at,),
+    "updated_at": (Task.updated_at,),
+}
+
+# Output field -> how to compute it from a row
+_FIELD_VALUES = {
+    "id": lambda row: row.id,
+    "name": lambda row: row.name,
+    "description": lambda row: row.description,
+    "task_type": lambda row: row.task_type,
+    "priority": lambda row: row.priority,
+    "epic_priority": lambda row: row.epic_priority if row.task_type == "Epic" else None,
+    "is_archived": lambda row: row.is_archived,
+    "completed": lambda row: row.completed,
+    "parent_id": lambda row: row.parent_id,
+    "project_id": lambda row: row.project_id,
+    "project": lambda row: row.project_name if row.project_name is not None else "No Project Assigned",
+    "contributor_id": lambda row: row.contributor_id,
+    "assigned_to": lambda row: row.contributor_name if row.contributor_name is not None else "Unassigned",
+    "estimate_type": lambda row: row.estimate_type,
+    "estimate": lambda row: row.story_points if row.estimate_type == "story_points" else row.time_estimate,
+    "status": lambda row: row.status,
+    "sort_order": lambda row: row.sort_order,
+    "created_at": lambda row: row.created_at.isoformat() if row.created_at else None,
+    "updated_at": lambda row: row.updated_at.isoformat() if row.updated_at else None,
+}
+
+TASK_FIELDS = tuple(_FIELD_VALUES)  # Every field `Task.to_dict()` returns
+TASK_DETAIL_FIELDS = TASK_FIELDS + ("contributor_name", "parent")  # Extra keys of GET /api/tasks/<id>
+
+
+def parse_fields(value, allowed=TASK_FIELDS):
+    """
+    Parses a sparse fieldset parameter such as `?fields=id,name,status`.
+
+    Args:
+        value (str): Comma-separated field names; empty or None means all fields.
+        allowed (tuple): The field names the endpoint accepts.
+
+    Returns:
+        tuple | None: The requested fields in `allowed` order, or None for all fields.
+
+    Raises:
+        ValueError: If an unknown field is requested.
+    """
+    if not value:
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return tuple(name for name in allowed if name in requested) or None
+
+
+def select_task_rows(fields=None):
+    """
+    Builds a Core SELECT that returns every column `Task.to_dict()` needs,
+    including the project and contributor names, in a single statement.
+
+    The result rows are plain tuples: no Task objects are hydrated, no
+    relationships are lazy-loaded and no model validators or `__init__` run.
+    Filter, order and paginate the returned statement like any other select.
+
+    Args:
+        fields (tuple, optional): Only select the columns these output fields need
+            (see `parse_fields`). `id` and `sort_order` are always selected so that
+            keyset pagination keeps working. The project and contributor joins are
+            only added when their names are requested.
+
+    Returns:
+        Select: The base statement.
+    """
+    names = TASK_FIELDS if fields is None else ("id", "sort_order") + tuple(fields)
+    columns = list(dict.fromkeys(column for name in names for column in _FIELD_COLUMNS[name]))
+
+    stmt = select(*columns).select_from(Task)
+    if "project" in names:
+        stmt = stmt.outerjoin(Project, Task.project_id == Project.id)
+    if "assigned_to" in names:
+        stmt = stmt.outerjoin(Contributor, Task.contributor_id == Contributor.id)
+    return stmt
+
+
+def serialize_task_row(row, fields=None):
+    """
+    Converts one row from `select_task_rows()` into the exact shape returned by `Task.to_dict()`,
+    or into just the requested `fields` when the row was selected with them.
+    """
+    if fields is not None:
+        return {name: _FIELD_VALUES[name](row) for name in fields}
+    return {
+        "id": row.id,
+        "name": row.name,
+        "description": row.description,
+        "task_type": row.task_type,
+        "priority": row.priority,
+        "epic_priority": row.epic_priority if row.task_type == "Epic" else None,
+        "is_archived": row.is_archived,
+        "completed": row.completed,
+        "parent_id": row.parent_id,
+        "project_id": row.project_id,
+        "project": row.project_name if row.project_name is not None else "No Project Assigned",
+        "contributor_id": row.contributor_id,
+        "assigned_to": row.contributor_name if row.contributor_name is not None else "Unassigned",
+        "estimate_type": row.estimate_type,
+        "estimate": row.story_points if row.estimate_type == "story_points" else row.time_estimate,
+        "status": row.status,
+        "sort_order": row.sort_order,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+    }
+
+
+def serialize_task_rows(rows, fields=None):
+    """Serializes an iterable of rows from `select_task_rows()` into a list of task dictionaries."""
+    return [serialize_task_row(row, fields) for row in rows]
+
+
+def project_task_tree(tree, fields):
+    """Returns a copy of an already-nested task tree with only `fields` (and `children`) kept."""
+    return [
+        {**{name: task[name] for name in fields}, "children": project_task_tree(task["children"], fields)}
+        for task in tree
+    ]
+
+
+def iter_task_ndjson(rows, fields=None):
+    """Yields one JSON document per task, newline-delimited (NDJSON)."""
+    for row in rows:
+        yield json.dumps(serialize_task_row(row, fields)) + "\n"
+
+
+def iter_task_json_array(rows, fields=None):
+    """Yields a JSON array of tasks piece by piece, so it never has to be built in memory."""
+    yield "["
+    separator = ""
+    for row in rows:
+        yield separator + json.dumps(serialize_task_row(row, fields))
+        separator = ","
+    yield "]"
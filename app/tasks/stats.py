@@ -0,0 +1,72 @@
+import logging
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from app.extensions.db import db
+from app.tasks.models import PROJECT_STATS_COLUMNS, ProjectStats, refresh_project_stats
+
+logger = logging.getLogger(__name__)  # Logger for this module
+
+
+def completion_percentage(completed_points, total_points):
+    """Completed share of a project's story points, in percent (2 decimals, 0 for an empty project)."""
+    return round((completed_points / total_points) * 100, 2) if total_points > 0 else 0
+
+
+def empty_project_stats():
+    """Stats of a project without tasks."""
+    stats = dict.fromkeys(PROJECT_STATS_COLUMNS, 0)
+    stats["completion_percentage"] = 0
+    return stats
+
+
+def get_project_stats(project_ids=None):
+    """
+    Reads the maintained `project_stats` rows of many projects with one query.
+
+    Args:
+        project_ids (iterable[int] | None): The projects to read; all projects when None.
+
+    Returns:
+        dict: `{project_id: {"task_count", "total_story_points", "completed_story_points",
+        "completion_percentage", <count by status/type>...}}`. Use `empty_project_stats()`
+        for projects that have no row.
+    """
+    stats_table = ProjectStats.__table__
+    query = select(stats_table)
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        if not project_ids:
+            return {}
+        query = query.where(stats_table.c.project_id.in_(project_ids))
+
+    stats = {}
+    for row in db.session.execute(query).mappings():
+        values = {column: row[column] for column in PROJECT_STATS_COLUMNS}
+        values["completion_percentage"] = completion_percentage(
+            values["completed_story_points"], values["total_story_points"]
+        )
+        stats[row["project_id"]] = values
+    logger.debug(f"Read stats of {len(stats)} project(s)")
+    return stats
+
+
+def get_single_project_stats(project_id):
+    """Stats of one project (a primary key lookup), zeros if it has no row."""
+    return get_project_stats([project_id]).get(project_id) or empty_project_stats()
+
+
+@click.command("repair-project-stats")
+@click.option("--project-id", "project_ids", type=int, multiple=True, help="Only rebuild these projects.")
+@with_appcontext
+def repair_project_stats_command(project_ids):
+    """Recomputes project_stats from the tasks (all projects, or the given ones)."""
+    try:
+        count = refresh_project_stats(db.session.connection(), project_ids or None)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Repairing project stats failed: {e}")
+        raise click.ClickException(str(e))
+    logger.info(f"Rebuilt {count} project_stats row(s)")
+    click.echo(f"Rebuilt {count} project_stats row(s).")
@@ -0,0 +1,86 @@
+import logging
+from app.tasks.versions import project_versions
+from app.utils.cache_utils import LRUCache
+
+logger = logging.getLogger(__name__)  # Logger for this module
+
+TASK_TREE_CACHE_SIZE = 64  # Number of (project, variant) trees kept in memory
+
+
+def build_task_tree(task_dicts):
+    """
+    Converts a flat list of task dictionaries into a nested structure.
+
+    Each dictionary gets a `children` list; the order of the input list is kept
+    at every level, so callers should pass tasks already ordered by `sort_order`.
+
+    Args:
+        task_dicts (list[dict]): Serialized tasks with `id` and `parent_id` keys.
+
+    Returns:
+        list[dict]: The top-level tasks, with their descendants nested under `children`.
+    """
+    task_map = {task["id"]: task for task in task_dicts}
+    roots = []
+    for task in task_dicts:
+        task.setdefault("children", [])
+    for task in task_dicts:
+        parent = task_map.get(task["parent_id"]) if task["parent_id"] else None
+        if parent is not None:
+            parent["children"].append(task)
+        elif not task["parent_id"]:
+            roots.append(task)
+    return roots
+
+
+class TaskTreeCache:
+    """
+    Per-project cache of already-nested task trees with LRU eviction.
+
+    Trees are keyed by `(project_id, variant)` so that listings with different
+    filters (e.g. with or without archived tasks) do not overwrite each other.
+
+    Each tree is stored with the project version (see `ProjectVersions`) read
+    before it was queried. Every committed task write moves that version, in any
+    worker process, so a tree built before a write is never served afterwards.
+    """
+
+    def __init__(self, maxsize=TASK_TREE_CACHE_SIZE, versions=project_versions):
+        self._trees = LRUCache(maxsize=maxsize)
+        self._versions = versions
+
+    def generation(self, project_id):
+        """Return the current version of a project; capture it before querying the tree."""
+        return self._versions.get(project_id)
+
+    def get(self, project_id, variant="all"):
+        """Return the cached tree for a project, or None on a miss or if the project changed since."""
+        entry = self._trees.get((project_id, variant))
+        tree = None
+        if entry is not None and entry[0] == self._versions.get(project_id):
+            tree = entry[1]
+        logger.debug(f"Task tree cache {'hit' if tree is not None else 'miss'} for project {project_id} ({variant})")
+        return tree
+
+    def set(self, project_id, tree, variant="all", generation=None):
+        """
+        Cache a project's tree.
+
+        Args:
+            project_id (int): The project the tree belongs to.
+            tree (list[dict]): The nested tree, as returned by `build_task_tree`.
+            variant (str): Distinguishes differently filtered trees of the same project.
+            generation (tuple, optional): The value of `generation(project_id)` read
+                before the tree was queried. Defaults to the current version.
+        """
+        if generation is None:
+            generation = self._versions.get(project_id)
+        self._trees.set((project_id, variant), (generation, tree))
+
+    def clear(self):
+        """Drop every cached tree."""
+        self._trees.clear()
+
+
+# Shared instance used by the task routes
+task_tree_cache = TaskTreeCache()
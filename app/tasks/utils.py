@@ -1,62 +1,252 @@
+import base64
+import binascii
+import hashlib
+import json
 import logging
-from sqlalchemy import func
+from datetime import datetime, timezone
+from sqlalchemy import bindparam, case, func, and_, or_, select, text, update
 from sqlalchemy.orm import joinedload
 from app.extensions.db import db
 from app.models import Project
-from app.tasks.models import Task
+from app.tasks.ancestry import validate_reparent_batch
+from app.tasks.hierarchy_triggers import hierarchy_prechecks_enabled
+from app.tasks.ranking import raise_rank_floor
+from app.tasks.models import (
+    Task, TaskClosure, delete_task_closure, record_task_changes, task_path_upper_bound, update_task_hierarchy
+)
+from app.tasks.serializers import TASK_FIELDS, select_task_rows, serialize_task_row, serialize_task_rows
+from app.tasks.versions import project_versions
+from app.utils.cache_utils import TTLCache
 
 logger = logging.getLogger(__name__)  # Logger for this module
 
+TASK_COUNT_CACHE_TTL = 30  # Seconds a cached task total stays valid
+
+TASK_METADATA_CACHE_TTL = 300  # Backstop for task_types; project changes invalidate explicitly
+
+# Totals for paginated listings, keyed by the normalized filters
+_task_count_cache = TTLCache(ttl=TASK_COUNT_CACHE_TTL)
+
+# Filter metadata (task types and projects) shared by every listing
+_task_metadata_cache = TTLCache(ttl=TASK_METADATA_CACHE_TTL, maxsize=1)
+
 
 class TaskService:
     @staticmethod
-    def filter_tasks(filters=None, include_subtasks=True, page=None, per_page=None):
+    def filter_tasks(filters=None, include_subtasks=True, page=None, per_page=None, fields=None):
         """
-        Dynamically filters tasks based on criteria provided in a dictionary, 
-        with optimized loading for related models.
+        Dynamically filters tasks based on criteria provided in a dictionary.
+
+        The statement selects plain rows (see `app.tasks.serializers.select_task_rows`)
+        with the project and contributor names joined in, so no Task objects are
+        hydrated. Serialize the results with `TaskService.fetch_task_dicts`.
 
         Args:
             filters (dict): A dictionary of filtering criteria.
             page (int, optional): The page number for pagination.
             per_page (int, optional): The number of items per page.
+            fields (tuple, optional): Only select the columns these output fields need.
 
         Returns:
-            Query or Pagination: A SQLAlchemy query object or paginated results.
+            Select: A SQLAlchemy select statement, limited to one page if `page` and `per_page` are given.
         """
-        query = Task.query.options(
-            db.joinedload(Task.project).joinedload(Project.contributors),  # Load project and its contributors
-            db.joinedload(Task.contributor),  # Load task's assigned contributor
-            db.joinedload(Task.children),     # Load child tasks
-        ).order_by(Task.sort_order)
+        query = select_task_rows(fields).order_by(Task.sort_order)
 
-        if filters:
-            logger.debug(f"Applying filters: {filters}")
-
-            # Apply standard filters
-            if "is_archived" in filters:
-                query = query.filter(Task.is_archived == filters["is_archived"])
-            if "project_id" in filters:
-                query = query.filter(Task.project_id == filters["project_id"])
-            if "task_type" in filters and filters["task_type"]:
-                if isinstance(filters["task_type"], list):
-                    query = query.filter(Task.task_type.in_(filters["task_type"]))
-                else:
-                    query = query.filter(Task.task_type == filters["task_type"])
-            if "completion_status" in filters:
-                completion_map = {"completed": True, "in_progress": False}
-                if filters["completion_status"] in completion_map:
-                    query = query.filter(Task.completed == completion_map[filters["completion_status"]])
-
-            # Optionally exclude subtasks
-            if not include_subtasks:
-                query = query.filter(Task.task_type != "Subtask")
+        query = TaskService.apply_filters(query, filters, include_subtasks=include_subtasks)
 
         logger.debug(f"Generated query: {query}")
 
         # Pagination
         if page and per_page:
-            return query.paginate(page=page, per_page=per_page, error_out=False)
+            return query.limit(per_page).offset((page - 1) * per_page)
         return query
+
+    @staticmethod
+    def fetch_task_dicts(stmt, fields=None):
+        """
+        Executes a statement built on `select_task_rows()` and returns the rows
+        in the same shape as `Task.to_dict()` (or with just `fields`, if given).
+        """
+        return serialize_task_rows(db.session.execute(stmt), fields)
+
+    @staticmethod
+    def apply_filters(query, filters=None, include_subtasks=True):
+        """
+        Applies the standard task filters to any query that selects from the task table.
+
+        Args:
+            query (Query | Select): The ORM query or Core select to narrow down.
+            filters (dict): A dictionary of filtering criteria.
+            include_subtasks (bool): Whether subtasks should be kept.
+
+        Returns:
+            Query: The filtered query.
+        """
+        if not filters:
+            return query
+
+        logger.debug(f"Applying filters: {filters}")
+
+        # Apply standard filters
+        if "is_archived" in filters:
+            query = query.filter(Task.is_archived == filters["is_archived"])
+        if "project_id" in filters:
+            query = query.filter(Task.project_id == filters["project_id"])
+        if "task_type" in filters and filters["task_type"]:
+            if isinstance(filters["task_type"], list):
+                query = query.filter(Task.task_type.in_(filters["task_type"]))
+            else:
+                query = query.filter(Task.task_type == filters["task_type"])
+        if "completion_status" in filters:
+            completion_map = {"completed": True, "in_progress": False}
+            if filters["completion_status"] in completion_map:
+                query = query.filter(Task.completed == completion_map[filters["completion_status"]])
+
+        # Optionally exclude subtasks
+        if not include_subtasks:
+            query = query.filter(Task.task_type != "Subtask")
+
+        return query
+
+    @staticmethod
+    def encode_cursor(sort_order, task_id):
+        """
+        Encodes the keyset position `(sort_order, id)` of a task into an opaque cursor string.
+        """
+        raw = json.dumps([sort_order, task_id], separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Decodes a cursor produced by `encode_cursor`.
+
+        Returns:
+            tuple | None: `(sort_order, id)`, or None for an empty cursor (first page).
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        if not cursor:
+            return None
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            sort_order, task_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            return float(sort_order), int(task_id)
+        except (ValueError, TypeError, binascii.Error) as e:
+            logger.error(f"Invalid pagination cursor '{cursor}': {e}")
+            raise ValueError("Invalid pagination cursor.")
+
+    @staticmethod
+    def paginate_by_cursor(query, cursor=None, per_page=50):
+        """
+        Fetches one page of tasks with keyset pagination on `(sort_order, id)`.
+
+        Unlike LIMIT/OFFSET, the database seeks straight to the cursor position
+        through the `(sort_order, id)` indexes, so deep pages cost the same as the first one.
+
+        Args:
+            query (Select): A task select, already filtered.
+            cursor (str, optional): The `next_cursor` returned with the previous page.
+            per_page (int): The number of tasks per page.
+
+        Returns:
+            tuple: `(rows, next_cursor)`; `next_cursor` is None on the last page.
+        """
+        position = TaskService.decode_cursor(cursor)
+        query = query.order_by(None).order_by(Task.sort_order, Task.id)
+        if position:
+            last_sort_order, last_id = position
+            query = query.filter(or_(
+                Task.sort_order > last_sort_order,
+                and_(Task.sort_order == last_sort_order, Task.id > last_id),
+            ))
+
+        # Fetch one extra row to know whether another page exists
+        items = db.session.execute(query.limit(per_page + 1)).all()
+        has_more = len(items) > per_page
+        items = items[:per_page]
+
+        next_cursor = None
+        if has_more and items:
+            last = items[-1]
+            next_cursor = TaskService.encode_cursor(last.sort_order, last.id)
+        return items, next_cursor
+
+    @staticmethod
+    def count_tasks(filters=None, estimate=False):
+        """
+        Returns the number of tasks matching `filters`, cached for a short time.
+
+        Args:
+            filters (dict, optional): The same filters accepted by `filter_tasks`.
+            estimate (bool): On PostgreSQL, use the planner's row estimate instead
+                of an exact COUNT(*). Ignored on other databases.
+
+        Returns:
+            tuple: `(total, is_estimate)`.
+        """
+        use_estimate = estimate and db.engine.dialect.name == "postgresql"
+        cache_key = (TaskService._filters_cache_key(filters), use_estimate)
+        cached = _task_count_cache.get(cache_key)
+        if cached is not None:
+            return cached, use_estimate
+
+        if use_estimate:
+            stmt = TaskService.apply_filters(db.session.query(Task.id), filters).statement
+            compiled = stmt.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+            plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            total = int(plan[0]["Plan"]["Plan Rows"])
+        else:
+            total = TaskService.apply_filters(db.session.query(func.count(Task.id)), filters).scalar()
+
+        _task_count_cache.set(cache_key, total)
+        return total, use_estimate
+
+    @staticmethod
+    def get_task_metadata():
+        """
+        Returns the metadata the task listings need for their filters, cached in process.
+
+        Project create, delete and rename call `invalidate_task_metadata()`; the
+        task types fall back to a short expiry since any task write may change them.
+
+        Returns:
+            tuple: `(metadata, etag)` where metadata is
+            `{"task_types": [...], "projects": [{"id", "name"}, ...]}` and etag is
+            a hash of its content.
+        """
+        cached = _task_metadata_cache.get("metadata")
+        if cached is not None:
+            return cached
+
+        task_types = ["all"] + sorted(t[0] for t in db.session.query(Task.task_type).distinct())
+        projects = db.session.query(Project.id, Project.name).order_by(Project.id).all()
+        metadata = {
+            "task_types": task_types,
+            "projects": [{"id": p.id, "name": p.name} for p in projects],
+        }
+        etag = hashlib.sha1(json.dumps(metadata, sort_keys=True).encode()).hexdigest()
+
+        _task_metadata_cache.set("metadata", (metadata, etag))
+        return metadata, etag
+
+    @staticmethod
+    def invalidate_task_metadata():
+        """Drops the cached task metadata; call after committing a project create, delete or rename."""
+        _task_metadata_cache.clear()
+        project_versions.bump_all()  # ✅ Listings requested with include_meta embed the project list
+
+    @staticmethod
+    def _filters_cache_key(filters):
+        """Builds a hashable cache key from a filters dictionary."""
+        if not filters:
+            return ()
+        return tuple(sorted(
+            (k, tuple(v) if isinstance(v, list) else v) for k, v in filters.items()
+        ))
     
     @staticmethod
     def debug_parent_child_relationships(project_id=None):
@@ -179,10 +369,11 @@ class TaskService:
 
     @staticmethod
     def calculate_completion_percentage(project_id):
-        """Calculates the completion percentage of a project."""
-        total_points = TaskService.calculate_total_story_points(project_id)
-        completed_points = TaskService.calculate_completed_story_points(project_id)
-        return round((completed_points / total_points) * 100, 2) if total_points > 0 else 0
+        """Calculates the completion percentage of a project (both sums in one query)."""
+        from app.tasks.stats import get_project_stats
+
+        stats = get_project_stats([project_id]).get(project_id)
+        return stats["completion_percentage"] if stats else 0
 
     @staticmethod
     def delete_project_and_tasks(project_id):
@@ -190,9 +381,14 @@ class TaskService:
         logger.info(f"Deleting project and its tasks: Project ID {project_id}")
         project_to_delete = Project.query.get_or_404(project_id)
         try:
+            # ✅ Bulk deletes skip the flush hook, so log the tombstones explicitly
+            task_ids = [t.id for t in Task.query.filter_by(project_id=project_id).with_entities(Task.id)]
+            record_task_changes(db.session.connection(), [(task_id, project_id, "delete") for task_id in task_ids])
+            delete_task_closure(db.session.connection(), task_ids)
             Task.query.filter_by(project_id=project_id).delete()
             db.session.delete(project_to_delete)
             db.session.commit()
+            TaskService.invalidate_task_metadata()  # ✅ The project list changed
             return True, f"Project {project_id} deleted successfully."
         except Exception as e:
             logger.error(f"Error deleting project: Project ID {project_id} - {e}")
@@ -230,35 +426,166 @@ class TaskService:
     
     
     @staticmethod
-    def archive_task(task, visited=None):
+    def archive_task(task):
         """
-        Archive a task and all its subtasks, preventing infinite recursion.
-        
+        Archive a task and all its subtasks with one set-based UPDATE (closure table).
+        The caller commits.
+
         Args:
             task (Task): The task to be archived.
-            visited (set): A set of task IDs already processed (for recursion guard).
+
+        Returns:
+            list[tuple]: `(task_id, project_id)` of every archived task.
         """
-        if visited is None:
-            visited = set()
-        
-        logger.info(f"Archiving task ID {task.id}")
-        
-        # Prevent infinite recursion
-        if task.id in visited:
-            logger.warning(f"Detected circular reference with task ID {task.id}. Skipping.")
-            return
+        logger.info(f"Archiving task ID {task.id} and its subtree")
+        return Task.set_subtree_archived([task.id], True)
+
+    @staticmethod
+    def bulk_set_archived(task_ids, archived=True):
+        """
+        Archives or unarchives the given root tasks and all their descendants.
 
-        visited.add(task.id)  # Mark task as visited
-        task.is_archived = True
+        The subtrees are resolved through the closure table and flipped with one
+        UPDATE, then committed once, so the cost does not grow with tree depth.
 
-        # Archive subtasks
-        for subtask in Task.query.filter_by(parent_id=task.id).all():
-            logger.info(f"Archiving subtask ID {subtask.id} of task ID {task.id}")
-            TaskService.archive_task(subtask, visited)
+        Args:
+            task_ids (iterable[int]): Root task IDs; overlapping subtrees are fine.
+            archived (bool): The new `is_archived` value.
+
+        Returns:
+            list[int]: IDs of the tasks whose state changed, for a single broadcast.
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        if not task_ids:
+            return []
+        try:
+            rows = Task.set_subtree_archived(task_ids, archived)
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error {'archiving' if archived else 'unarchiving'} tasks {task_ids}: {e}")
+            db.session.rollback()
+            raise
+        return [task_id for task_id, _ in rows]
+
+    @staticmethod
+    def bulk_reorder(ordered_tasks):
+        """
+        Applies a new ordering (and optional re-parenting) to many tasks at once.
+
+        The referenced tasks and their new parents are loaded with one `IN` query and
+        the whole ordering is validated in memory (hierarchy rules, plus one ancestor
+        query for cycles). Only rows whose `sort_order` or `parent_id` actually change
+        are written, with one executemany UPDATE. The caller commits.
+
+        Args:
+            ordered_tasks (list[dict]): Entries with `id`, `sort_order` and `parent_id`
+                (a None `parent_id` keeps the current parent).
+
+        Returns:
+            tuple: `(found_ids, changed)`: IDs of the tasks that exist, and
+            `(task_id, project_id)` of the rows that were written.
+
+        Raises:
+            ValueError: If a parent does not exist or the new hierarchy is invalid.
+        """
+        task_table = Task.__table__
+        entries = {entry["id"]: entry for entry in ordered_tasks}  # The last entry for an ID wins
+        parent_ids = {entry["parent_id"] for entry in entries.values() if entry["parent_id"] is not None}
+
+        db.session.flush()
+        rows = db.session.execute(
+            select(
+                task_table.c.id, task_table.c.task_type, task_table.c.parent_id,
+                task_table.c.sort_order, task_table.c.project_id,
+            ).where(task_table.c.id.in_(set(entries) | parent_ids))
+        ).all()
+        by_id = {row.id: row for row in rows}
+
+        missing_parents = parent_ids - set(by_id)
+        if missing_parents:
+            raise ValueError(f"Parent task(s) {sorted(missing_parents)} do not exist.")
+
+        found_ids, changed, moves = [], [], []
+        valid_parent_types = {}
+        for task_id, entry in entries.items():
+            row = by_id.get(task_id)
+            if row is None:
+                logger.warning(f"Task ID {task_id} not found. Skipping...")
+                continue
+            found_ids.append(task_id)
+
+            new_parent_id = entry["parent_id"] if entry["parent_id"] is not None else row.parent_id
+            if new_parent_id != row.parent_id:
+                if new_parent_id == task_id:
+                    raise ValueError("A task cannot be its own parent.")
+                if row.task_type not in valid_parent_types:
+                    valid_parent_types[row.task_type] = TaskService.validate_hierarchy(task_type=row.task_type)
+                parent_type = by_id[new_parent_id].task_type
+                if parent_type not in valid_parent_types[row.task_type]:
+                    raise ValueError(f"Task {task_id} ({row.task_type}) cannot have a parent of type '{parent_type}'.")
+                moves.append((task_id, new_parent_id))
+
+            if new_parent_id != row.parent_id or entry["sort_order"] != row.sort_order:
+                changed.append((task_id, row.project_id, new_parent_id, entry["sort_order"]))
+
+        if moves and hierarchy_prechecks_enabled():
+            validate_reparent_batch(moves)  # ✅ Cycles, with one ancestor query for the whole batch
+
+        if changed:
+            now = datetime.now(timezone.utc)
+            db.session.execute(
+                update(task_table)
+                .where(task_table.c.id == bindparam("b_id"))
+                .values(
+                    parent_id=bindparam("b_parent_id"),
+                    sort_order=bindparam("b_sort_order"),
+                    updated_at=bindparam("b_updated_at"),
+                ),
+                [
+                    {"b_id": task_id, "b_parent_id": parent_id, "b_sort_order": sort_order, "b_updated_at": now}
+                    for task_id, _, parent_id, sort_order in changed
+                ],
+            )
+            # ✅ Bulk updates skip the flush hooks: maintain the hierarchy and change log here
+            connection = db.session.connection()
+            if moves:
+                update_task_hierarchy(connection, moves)
+            record_task_changes(connection, [(task_id, project_id, "upsert") for task_id, project_id, _, _ in changed])
+            # ✅ Keep each level's sort counter ahead of the ranks written explicitly
+            highest = {}
+            for _, project_id, parent_id, sort_order in changed:
+                key = (parent_id, project_id)
+                highest[key] = max(highest.get(key, sort_order), sort_order)
+            for (parent_id, project_id), sort_order in highest.items():
+                raise_rank_floor(parent_id, project_id, sort_order)
+            db.session.expire_all()
+
+        logger.info(f"Reordered {len(found_ids)} task(s); {len(changed)} row(s) changed, {len(moves)} re-parented")
+        return found_ids, [(task_id, project_id) for task_id, project_id, _, _ in changed]
+
+    @staticmethod
+    def get_subtree_rollup(task_id):
+        """
+        Aggregates a task's descendants (at any depth) with one query over the closure table.
+
+        Returns:
+            dict: `task_count`, `completed_count`, `story_points` and `completed_story_points`.
+        """
+        row = db.session.query(
+            func.count(Task.id),
+            func.coalesce(func.sum(case((Task.completed.is_(True), 1), else_=0)), 0),
+            func.coalesce(func.sum(Task.story_points), 0),
+            func.coalesce(func.sum(case((Task.completed.is_(True), Task.story_points), else_=0)), 0),
+        ).join(TaskClosure, TaskClosure.descendant_id == Task.id).filter(
+            TaskClosure.ancestor_id == task_id, TaskClosure.depth > 0
+        ).one()
+        return {
+            "task_count": row[0],
+            "completed_count": row[1],
+            "story_points": row[2],
+            "completed_story_points": row[3],
+        }
 
-        # Add task to session for commit
-        db.session.add(task)
-        
     @staticmethod
     def validate_hierarchy(task=None, parent_id=None, task_type=None):
         """
@@ -298,6 +625,9 @@ class TaskService:
                 logger.error(f"Task {task.id} cannot be its own parent.")
                 raise ValueError("A task cannot be its own parent.")
 
+            if not hierarchy_prechecks_enabled():
+                return  # ✅ The database triggers check the parent's type on write
+
             # Fetch the parent task type
             parent_task_type = db.session.query(Task.task_type).filter_by(id=parent_id).scalar()
             if not parent_task_type:
@@ -357,27 +687,22 @@ class TaskService:
         """
         logger.info("Fetching all tasks with optional filters.")
         
-        # Build the query
-        query = Task.query.options(db.load_only(
-            Task.id, Task.name, Task.description, Task.task_type, 
-            Task.is_archived, Task.completed, Task.parent_id, Task.project_id,
-            Task.contributor_id, Task.story_points, Task.status,
-            Task.sort_order  # ✅ Ensure sort_order is explicitly included ADDED 25 FEB 2025
-        )).filter(Task.sort_order.isnot(None))  # ✅ Exclude tasks with NULL sort_order ADJUSTED 25 FEB 2025
+        # Build the query: plain rows with project and contributor names joined in
+        query = select_task_rows().where(Task.sort_order.isnot(None))  # ✅ Exclude tasks with NULL sort_order ADJUSTED 25 FEB 2025
         
         if filters:
             
             if "project_id" in filters and filters["project_id"] is not None:   
-                query = query.filter(Task.project_id == filters["project_id"])  
+                query = query.where(Task.project_id == filters["project_id"])  
             if "is_archived" in filters:
-                query = query.filter(Task.is_archived == filters["is_archived"]) 
+                query = query.where(Task.is_archived == filters["is_archived"]) 
             else:
-                query = query.filter(Task.is_archived == False)  # ✅ Exclude archived tasks by default
+                query = query.where(Task.is_archived == False)  # ✅ Exclude archived tasks by default
 
         # Execute the query and serialize the results
-        tasks = query.all()
+        task_dicts = TaskService.fetch_task_dicts(query.order_by(Task.sort_order))
         
-        logger.info(f"✅ Retrieved {len(tasks)} tasks from database.")
+        logger.info(f"✅ Retrieved {len(task_dicts)} tasks from database.")
         
         # ✅ Step 1: Find or Create "No Epic"
         project_id = filters.get("project_id") if filters else None
@@ -403,19 +728,19 @@ class TaskService:
 
         db.session.commit()  # ✅ Save changes
 
-        # ✅ Step 3: Convert tasks to dictionary format
-        task_dicts = [task.to_dict() for task in tasks]
         return task_dicts
     
     
     
     @staticmethod
-    def fetch_task_as_dict(task_id):
+    def fetch_task_as_dict(task_id, fields=None):
         """
         Fetches a task by ID and returns it as a dictionary.
 
         Args:
             task_id (int): The ID of the task to fetch.
+            fields (tuple, optional): Only return these fields (any of `TASK_FIELDS`,
+                plus `contributor_name` and `parent`). Only their columns are selected.
 
         Returns:
             dict: A dictionary representation of the task.
@@ -424,6 +749,9 @@ class TaskService:
             ValueError: If the task is not found.
         """
         logger.info(f"Fetching task with ID {task_id}.")
+
+        if fields is not None:
+            return TaskService._fetch_task_fields(task_id, fields)
         
         # Fetch the task from the database
         task = Task.query.get(task_id)
@@ -447,6 +775,63 @@ class TaskService:
         logger.info(f"Task with ID {task_id} fetched successfully.")
         return task_dict
 
+    @staticmethod
+    def fetch_subtree(task_id, fields=None):
+        """
+        Fetches a task and all of its descendants in depth-first order.
+
+        Uses the materialized path, so the whole subtree is a single index range scan.
+
+        Args:
+            task_id (int): The root of the subtree.
+            fields (tuple, optional): Only return these fields.
+
+        Returns:
+            list[dict]: The serialized tasks, the root first.
+
+        Raises:
+            ValueError: If the task is not found.
+        """
+        root = Task.query.with_entities(Task.path).filter_by(id=task_id).first()
+        if not root:
+            raise ValueError(f"Task with ID {task_id} not found.")
+        if not root.path:
+            raise ValueError(f"Task with ID {task_id} has no hierarchy path; run the path backfill migration.")
+
+        stmt = (
+            select_task_rows(fields)
+            .where(Task.path >= root.path, Task.path < task_path_upper_bound(root.path))
+            .order_by(Task.path)
+        )
+        return TaskService.fetch_task_dicts(stmt, fields)
+
+    @staticmethod
+    def _fetch_task_fields(task_id, fields):
+        """Sparse-fieldset variant of `fetch_task_as_dict`, built on plain rows."""
+        row_fields = tuple(name for name in fields if name in TASK_FIELDS)
+        if "contributor_name" in fields and "assigned_to" not in row_fields:
+            row_fields += ("assigned_to",)
+        if "parent" in fields and "parent_id" not in row_fields:
+            row_fields += ("parent_id",)
+
+        row = db.session.execute(select_task_rows(row_fields).where(Task.id == task_id)).first()
+        if row is None:
+            logger.error(f"Task with ID {task_id} not found.")
+            raise ValueError(f"Task with ID {task_id} not found.")
+
+        values = serialize_task_row(row, row_fields)
+        if "contributor_name" in fields:
+            values["contributor_name"] = values["assigned_to"]
+        if "parent" in fields:
+            parent_fields = tuple(name for name in fields if name in TASK_FIELDS) or None
+            parent_row = None
+            if values["parent_id"]:
+                stmt = select_task_rows(parent_fields).where(Task.id == values["parent_id"])
+                parent_row = db.session.execute(stmt).first()
+            values["parent"] = serialize_task_row(parent_row, parent_fields) if parent_row else None
+
+        return {name: values[name] for name in fields}
+
         
     @staticmethod
     def generate_page_numbers(current_page, total_pages, left_edge=1, right_edge=1, left_current=2, right_current=2):
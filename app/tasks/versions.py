@@ -0,0 +1,55 @@
+import logging
+from sqlalchemy import func, select, update
+from app.extensions.db import db
+from app.tasks.models import TaskChange, TaskChangeVersion
+
+logger = logging.getLogger(__name__)  # Logger for this module
+
+
+class ProjectVersions:
+    """
+    Versions of the tasks of each project, read from the database so that every
+    worker process agrees on them.
+
+    A project's version is the newest change log version affecting it (see
+    `TaskChange`). Change log rows are stamped by the commit of the task write
+    itself, so write paths have nothing to report and no reader can see new data
+    under an old version. The version of all tasks is the change counter.
+
+    A version is the tuple `(epoch, version)`: `bump_all()` increments the epoch,
+    which changes the version of every project at once, for data shown in every
+    listing that is not a task (such as the project list). Readers use the current
+    version to validate cached data (see `TaskTreeCache`) and as an ETag.
+    """
+
+    def get(self, project_id=None):
+        """Return the current version of a project, or of all tasks if `project_id` is None."""
+        counter = TaskChangeVersion.__table__
+        latest = select(func.max(TaskChange.version)).where(TaskChange.project_id == project_id).scalar_subquery()
+        row = db.session.execute(
+            select(counter.c.epoch, counter.c.version, counter.c.pruned_through, latest).where(counter.c.id == 1)
+        ).first()
+        if row is None:
+            return 0, 0
+        epoch, version, pruned_through, project_version = row
+        if project_id is None:
+            return epoch, version
+        # ✅ Pruning may remove a project's newest changes; the pruned version then stands in for them
+        return epoch, max(project_version or 0, pruned_through)
+
+    def bump_all(self):
+        """Mark the tasks of every project as changed; call after committing the change."""
+        counter = TaskChangeVersion.__table__
+        with db.engine.begin() as connection:
+            connection.execute(update(counter).where(counter.c.id == 1).values(epoch=counter.c.epoch + 1))
+        logger.debug("Bumped task version for all projects")
+
+    def etag(self, project_id=None):
+        """Return a strong ETag (without quotes) for the current version."""
+        epoch, version = self.get(project_id)
+        scope = f"p{project_id}" if project_id is not None else "all"
+        return f"{epoch}-{scope}-{version}"
+
+
+# Shared instance used by the task routes
+project_versions = ProjectVersions()
@@ -0,0 +1,95 @@
+# Utility file with small in-process caches shared by services and routes
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+# Initialize logger for the module
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Thread-safe key/value cache whose entries expire after a fixed number of seconds.
+
+    The cache lives in the worker process, so every worker keeps its own copy.
+    It is meant for values that are cheap to recompute but expensive to
+    recompute on every request (e.g. row counts).
+    """
+
+    def __init__(self, ttl=30, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for `key`, or `default` if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        """Store `value` under `key` for `ttl` seconds."""
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                # Drop the entry closest to expiry to make room
+                oldest_key = min(self._data, key=lambda k: self._data[k][0])
+                del self._data[oldest_key]
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._data.clear()
+
+
+class LRUCache:
+    """
+    Thread-safe key/value cache that evicts the least recently used entry once
+    `maxsize` entries are stored.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for `key` and mark it as recently used."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        """Store `value` under `key`, evicting the least recently used entry if full."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted_key, _ = self._data.popitem(last=False)
+                logger.debug(f"LRU cache evicted key: {evicted_key}")
+
+    def pop_matching(self, predicate):
+        """Remove every entry whose key satisfies `predicate`. Returns the number removed."""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
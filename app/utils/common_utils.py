@@ -1,8 +1,8 @@
 # Utility file handling business logic for shared functions
 import logging
-from sqlalchemy.sql import func, cast
-from sqlalchemy import Integer
+from sqlalchemy import Integer, cast, distinct, func, select
 from app.extensions.db import db  # Centralized SQLAlchemy instance
+from app.utils.cache_utils import TTLCache
 
 # Initialize logger for the module
 logger = logging.getLogger(__name__)
@@ -28,6 +28,71 @@ def log_interaction(caller, callee, action, data=None, result=None, error=None):
     logger.info(message)
 
 
+# ------------------------------
+# Portfolio Summary
+# ------------------------------
+
+PORTFOLIO_CACHE_TTL = 30  # Seconds a cached summary stays valid (bounds staleness of contributor counts)
+
+# Cached summary, keyed by the global task version so any task or project write invalidates it
+_portfolio_cache = TTLCache(ttl=PORTFOLIO_CACHE_TTL, maxsize=1)
+
+
+def get_portfolio_summary(use_cache=True):
+    """
+    Returns every dashboard counter from a single query.
+
+    Counts are aggregated in the database with FILTER clauses, so no project or
+    contributor rows are loaded. The project buckets keep their original
+    definitions over the tasks' summed story points (`SUM(story_points)` and
+    `SUM(story_points * completed)`): ongoing while the completed sum is below
+    the total, completed once it reaches the total (also when every task has 0
+    points), and unstarted while the completed sum is NULL (no tasks, or no task
+    with story points), so the three counts add up to `all_projects`.
+
+    Args:
+        use_cache (bool): Serve the summary cached for the current task version.
+
+    Returns:
+        dict: `all_projects`, `ongoing_projects`, `completed_projects`, `unstarted_projects`,
+        `all_contributors`, `assigned_contributors` and `unassigned_contributors`.
+    """
+    from app.models import Contributor, Project, project_contributor
+    from app.tasks.models import Task
+    from app.tasks.versions import project_versions
+
+    version = project_versions.get()
+    if use_cache:
+        cached = _portfolio_cache.get("portfolio")
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    project_table, task_table = Project.__table__, Task.__table__
+    # ✅ Raw sums, NULLs included: the bucket conditions below rely on SQL NULL comparisons
+    points = select(
+        task_table.c.project_id,
+        func.sum(task_table.c.story_points * cast(task_table.c.completed, Integer)).label("completed"),
+        func.sum(task_table.c.story_points).label("total"),
+    ).group_by(task_table.c.project_id).subquery()
+    row = db.session.execute(
+        select(
+            func.count(project_table.c.id).label("all_projects"),
+            func.count(project_table.c.id).filter(points.c.completed < points.c.total).label("ongoing_projects"),
+            func.count(project_table.c.id).filter(points.c.completed >= points.c.total).label("completed_projects"),
+            func.count(project_table.c.id).filter(points.c.completed.is_(None)).label("unstarted_projects"),
+            select(func.count()).select_from(Contributor.__table__).scalar_subquery().label("all_contributors"),
+            select(func.count(distinct(project_contributor.c.contributor_id)))
+            .scalar_subquery().label("assigned_contributors"),
+        ).select_from(project_table.outerjoin(points, points.c.project_id == project_table.c.id))
+    ).mappings().one()
+
+    summary = dict(row)
+    summary["unassigned_contributors"] = summary["all_contributors"] - summary["assigned_contributors"]
+    _portfolio_cache.set("portfolio", (version, summary))
+    logger.debug(f"Computed portfolio summary: {summary}")
+    return summary
+
+
 # ------------------------------
 # Project-Related Counting Functions
 # ------------------------------
@@ -37,69 +102,28 @@ def count_ongoing_projects():
     """
     Count ongoing projects based on their story points completion.
     """
-    from app.models import Project
-    from app.tasks.models import Task
-
-    ongoing_projects = (
-        db.session.query(Project)
-        .join(Task, Project.id == Task.project_id)
-        .group_by(Project.id)
-        .having(
-            func.sum(Task.story_points * cast(Task.completed, Integer)) 
-            < func.sum(Task.story_points)
-        )
-        .all()
-    )
-    return len(ongoing_projects)
+    return get_portfolio_summary()["ongoing_projects"]
 
 
 def count_completed_projects():
     """
     Count completed projects where all story points are finished.
     """
-    from app.models import Project
-    from app.tasks.models import Task
-
-    completed_projects = (
-        db.session.query(Project)
-        .join(Task, Project.id == Task.project_id)
-        .group_by(Project.id)
-        .having(
-            func.sum(Task.story_points * cast(Task.completed, Integer)) 
-            >= func.sum(Task.story_points)
-        )
-        .all()
-    )
-    return len(completed_projects)
+    return get_portfolio_summary()["completed_projects"]
 
 
 def count_unstarted_projects():
     """
     Count unstarted projects where no story points are completed.
     """
-    from app.models import Project
-    from app.tasks.models import Task
-
-    unstarted_projects = (
-        db.session.query(Project)
-        .outerjoin(Task, Project.id == Task.project_id)
-        .group_by(Project.id)
-        .having(
-            func.sum(Task.story_points * cast(Task.completed, Integer))
-            == None)
-        .all()
-    )
-    return len(unstarted_projects)
+    return get_portfolio_summary()["unstarted_projects"]
 
 
 def count_all_projects():
     """
     Count all projects in the database.
     """
-    from app.models import Project
-
-    all_projects = db.session.query(Project).all()
-    return len(all_projects)
+    return get_portfolio_summary()["all_projects"]
 
 
 # ------------------------------
@@ -111,30 +135,18 @@ def count_all_contributors():
     """
     Count all contributors in the database.
     """
-    from app.models import Contributor
-
-    return db.session.query(Contributor).count()
+    return get_portfolio_summary()["all_contributors"]
 
 
 def count_assigned_contributors():
     """
     Count contributors assigned to at least one project.
     """
-    from app.models import Contributor, project_contributor
-
-    return db.session.query(Contributor).join(project_contributor).distinct().count()
+    return get_portfolio_summary()["assigned_contributors"]
 
 
 def count_unassigned_contributors():
     """
     Count contributors not assigned to any project.
     """
-    from app.models import Contributor, project_contributor
-
-    return (
-        db.session.query(Contributor)
-        .outerjoin(project_contributor)
-        .filter(project_contributor.c.project_id == None)
-        .count()
-    )
-
+    return get_portfolio_summary()["unassigned_contributors"]
@@ -0,0 +1,126 @@
+# Request-scoped buffer for WebSocket events: emitted once, after the request's data is committed
+import logging
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import socketio
+from app.extensions.db import db
+
+# Initialize logger for the module
+logger = logging.getLogger(__name__)
+
+TASK_UPDATE_EVENT = "update_task"
+
+
+class SocketEventBuffer:
+    """
+    Collects the WebSocket events of one request.
+
+    Events start out pending; a successful commit of the request's session marks
+    them as committed and a rollback drops them, so clients never see changes
+    that were rolled back. `update_task` payloads for the same task are merged
+    into one event. Committed events are emitted once, when the request ends.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._committed = {}
+        self._sequence = 0
+
+    def add(self, event_name, payload, namespace="/", committed=False):
+        """Queue an event; use `committed=True` for data that is already committed."""
+        target = self._committed if committed else self._pending
+        self._sequence += 1
+        target[(event_name, namespace, self._sequence)] = payload
+
+    def add_task_update(self, task_id, fields, namespace="/", committed=False):
+        """Queue changed fields of a task, merged with any update already queued for it."""
+        target = self._committed if committed else self._pending
+        key = (TASK_UPDATE_EVENT, namespace, task_id)
+        target.setdefault(key, {"taskId": task_id}).update(fields)
+
+    def commit(self):
+        """Promote pending events; task updates merge into already committed ones."""
+        for key, payload in self._pending.items():
+            if key[0] == TASK_UPDATE_EVENT and key in self._committed:
+                self._committed[key].update(payload)
+            else:
+                self._committed[key] = payload
+        self._pending = {}
+
+    def rollback(self):
+        """Drop the events of the rolled back transaction."""
+        if self._pending:
+            logger.debug(f"Dropping {len(self._pending)} WebSocket event(s) after rollback")
+        self._pending = {}
+
+    def flush(self):
+        """Emit the committed events (once) and reset the buffer."""
+        events, self._committed = self._committed, {}
+        for (event_name, namespace, _), payload in events.items():
+            socketio.emit(event_name, payload, namespace=namespace)
+        if events:
+            logger.debug(f"Emitted {len(events)} buffered WebSocket event(s)")
+        return len(events)
+
+
+def _current_buffer(create=True):
+    """Returns the buffer of the current request (None outside a request)."""
+    if not has_request_context():
+        return None
+    buffer = g.get("_socket_events")
+    if buffer is None and create:
+        buffer = g._socket_events = SocketEventBuffer()
+    return buffer
+
+
+def queue_event(event_name, payload, namespace="/", committed=False):
+    """
+    Queue a WebSocket event for the end of the request.
+
+    Outside a request (background tasks, shell) the event is emitted right away.
+    """
+    buffer = _current_buffer()
+    if buffer is None:
+        socketio.emit(event_name, payload, namespace=namespace)
+        return
+    buffer.add(event_name, payload, namespace, committed)
+
+
+def queue_task_update(task_id, committed=False, **fields):
+    """Queue changed fields of a task; all updates of a task in one request become one `update_task` event."""
+    buffer = _current_buffer()
+    if buffer is None:
+        socketio.emit(TASK_UPDATE_EVENT, {"taskId": task_id, **fields}, namespace="/")
+        return
+    buffer.add_task_update(task_id, fields, committed=committed)
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_socket_events(session):
+    """Marks the request's pending events as committed."""
+    buffer = _current_buffer(create=False)
+    if buffer is not None and session is db.session():
+        buffer.commit()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _rollback_socket_events(session, previous_transaction):
+    """Drops the request's pending events when its transaction is rolled back."""
+    buffer = _current_buffer(create=False)
+    if buffer is not None and session is db.session():
+        buffer.rollback()
+
+
+def init_socket_events(app):
+    """Emits each request's committed events once the response is ready."""
+
+    @app.after_request
+    def flush_socket_events(response):
+        buffer = _current_buffer(create=False)
+        if buffer is not None:
+            try:
+                buffer.flush()
+            except Exception as e:
+                logger.error(f"🚨 WebSocket Event Failed: {e}")
+        return response
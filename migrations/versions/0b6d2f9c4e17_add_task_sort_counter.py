@@ -0,0 +1,29 @@
+"""Add per-scope task sort counters
+
+Revision ID: 0b6d2f9c4e17
+Revises: f4a8d61e0b93
+Create Date: 2025-03-28 16:20:03.671842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6d2f9c4e17'
+down_revision = 'f4a8d61e0b93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # No backfill: each scope's counter is seeded from its current maximum on first use
+    op.create_table('task_sort_counter',
+    sa.Column('scope', sa.String(length=40), nullable=False),
+    sa.Column('last_rank', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('scope')
+    )
+
+
+def downgrade():
+    op.drop_table('task_sort_counter')
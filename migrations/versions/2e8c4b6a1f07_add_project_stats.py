@@ -0,0 +1,55 @@
+"""Add maintained project stats
+
+Revision ID: 2e8c4b6a1f07
+Revises: 7d3f1a9c5b62
+Create Date: 2025-04-02 14:05:51.730912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e8c4b6a1f07'
+down_revision = '7d3f1a9c5b62'
+branch_labels = None
+depends_on = None
+
+STATUS_COLUMNS = {
+    'Not Started': 'not_started_count',
+    'In Progress': 'in_progress_count',
+    'Completed': 'completed_count',
+    'Archived': 'archived_count',
+}
+TYPE_COLUMNS = {'Epic': 'epic_count', 'User Story': 'user_story_count', 'Subtask': 'subtask_count'}
+
+
+def upgrade():
+    count_columns = ['task_count', 'total_story_points', 'completed_story_points',
+                     *STATUS_COLUMNS.values(), *TYPE_COLUMNS.values()]
+    op.create_table('project_stats',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    *[sa.Column(name, sa.Integer(), nullable=False, server_default='0') for name in count_columns],
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+
+    # Backfill every project (zeros for projects without tasks) with one grouped INSERT ... SELECT
+    status_sums = ", ".join(
+        f"COALESCE(SUM(CASE WHEN t.status = '{status}' THEN 1 ELSE 0 END), 0)" for status in STATUS_COLUMNS
+    )
+    type_sums = ", ".join(
+        f"COALESCE(SUM(CASE WHEN t.task_type = '{task_type}' THEN 1 ELSE 0 END), 0)" for task_type in TYPE_COLUMNS
+    )
+    op.execute(
+        f"INSERT INTO project_stats (project_id, {', '.join(count_columns)}) "
+        "SELECT p.id, COUNT(t.id), COALESCE(SUM(COALESCE(t.story_points, 0)), 0), "
+        "COALESCE(SUM(CASE WHEN t.completed THEN COALESCE(t.story_points, 0) ELSE 0 END), 0), "
+        f"{status_sums}, {type_sums} "
+        "FROM project p LEFT OUTER JOIN task t ON t.project_id = p.id "
+        "GROUP BY p.id"
+    )
+
+
+def downgrade():
+    op.drop_table('project_stats')
@@ -0,0 +1,44 @@
+"""Reject task type changes that strand children on SQLite
+
+Revision ID: 5a9e2d7c3b18
+Revises: 2e8c4b6a1f07
+Create Date: 2025-04-03 10:12:37.518604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a9e2d7c3b18'
+down_revision = '2e8c4b6a1f07'
+branch_labels = None
+depends_on = None
+
+# Same statement as app/tasks/hierarchy_triggers.py at the time of this revision; the
+# Postgres trigger function already performs this check
+SQLITE_CHILDREN_TRIGGER = """
+    CREATE TRIGGER task_hierarchy_children
+    BEFORE UPDATE OF task_type ON task
+    FOR EACH ROW WHEN NEW.task_type IS NOT OLD.task_type
+    BEGIN
+        SELECT RAISE(ABORT, 'task hierarchy violation: Task has children that its type cannot hold.')
+        WHERE EXISTS (
+            SELECT 1 FROM task child
+            WHERE child.parent_id = NEW.id
+              AND NOT ((child.task_type = 'User Story' AND NEW.task_type = 'Epic')
+                    OR (child.task_type = 'Subtask' AND NEW.task_type = 'User Story'))
+        );
+    END
+    """
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS task_hierarchy_children")
+        op.execute(sa.text(SQLITE_CHILDREN_TRIGGER))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS task_hierarchy_children")
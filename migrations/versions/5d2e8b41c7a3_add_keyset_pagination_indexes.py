@@ -0,0 +1,28 @@
+"""Add keyset pagination indexes on task
+
+Revision ID: 5d2e8b41c7a3
+Revises: 934aa412784c
+Create Date: 2025-03-18 10:12:44.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8b41c7a3'
+down_revision = '934aa412784c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.create_index('ix_task_sort_order_id', ['sort_order', 'id'], unique=False)
+        batch_op.create_index('ix_task_project_id_sort_order_id', ['project_id', 'sort_order', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_project_id_sort_order_id')
+        batch_op.drop_index('ix_task_sort_order_id')
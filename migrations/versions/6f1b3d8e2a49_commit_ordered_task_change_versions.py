@@ -0,0 +1,50 @@
+"""Stamp task changes with commit-ordered versions
+
+Revision ID: 6f1b3d8e2a49
+Revises: 5a9e2d7c3b18
+Create Date: 2025-04-07 14:26:51.093127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f1b3d8e2a49'
+down_revision = '5a9e2d7c3b18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task_change', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.BigInteger(), nullable=True))
+
+    # ✅ Existing rows keep their id as version, so clients holding an id-based version resume where they were
+    op.execute(sa.text("UPDATE task_change SET version = id"))
+
+    with op.batch_alter_table('task_change', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_change_project_id_id')
+        batch_op.create_index(batch_op.f('ix_task_change_version'), ['version'], unique=False)
+        batch_op.create_index('ix_task_change_project_id_version', ['project_id', 'version'], unique=False)
+
+    op.create_table('task_change_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('pruned_through', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(sa.text(
+        "INSERT INTO task_change_version (id, version, pruned_through) "
+        "SELECT 1, COALESCE(MAX(version), 0), 0 FROM task_change"
+    ))
+
+
+def downgrade():
+    op.drop_table('task_change_version')
+
+    with op.batch_alter_table('task_change', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_change_project_id_version')
+        batch_op.drop_index(batch_op.f('ix_task_change_version'))
+        batch_op.create_index('ix_task_change_project_id_id', ['project_id', 'id'], unique=False)
+        batch_op.drop_column('version')
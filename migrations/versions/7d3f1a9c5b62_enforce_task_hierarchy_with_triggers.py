@@ -0,0 +1,146 @@
+"""Enforce the task hierarchy with triggers
+
+Revision ID: 7d3f1a9c5b62
+Revises: 0b6d2f9c4e17
+Create Date: 2025-03-31 09:41:18.204377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3f1a9c5b62'
+down_revision = '0b6d2f9c4e17'
+branch_labels = None
+depends_on = None
+
+# Same statements as app/tasks/hierarchy_triggers.py at the time of this revision
+POSTGRES_HIERARCHY_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION task_check_hierarchy() RETURNS trigger AS $$
+    DECLARE
+        current_task task%ROWTYPE;
+        parent_type VARCHAR(10);
+    BEGIN
+        SELECT * INTO current_task FROM task WHERE id = NEW.id;
+        IF NOT FOUND THEN
+            RETURN NULL;  -- Deleted later in the same transaction
+        END IF;
+
+        IF current_task.parent_id IS NOT NULL THEN
+            IF current_task.parent_id = current_task.id THEN
+                RAISE EXCEPTION 'task hierarchy violation: A task cannot be its own parent.'
+                    USING ERRCODE = 'check_violation';
+            END IF;
+            SELECT task_type INTO parent_type FROM task WHERE id = current_task.parent_id;
+            IF parent_type IS NULL THEN
+                RAISE EXCEPTION 'task hierarchy violation: Parent task does not exist.'
+                    USING ERRCODE = 'check_violation';
+            ELSIF current_task.task_type = 'Epic' THEN
+                RAISE EXCEPTION 'task hierarchy violation: Epics cannot have a parent task.'
+                    USING ERRCODE = 'check_violation';
+            ELSIF current_task.task_type = 'User Story' AND parent_type <> 'Epic' THEN
+                RAISE EXCEPTION 'task hierarchy violation: A User Story can only have an Epic as a parent.'
+                    USING ERRCODE = 'check_violation';
+            ELSIF current_task.task_type = 'Subtask' AND parent_type <> 'User Story' THEN
+                RAISE EXCEPTION 'task hierarchy violation: A Subtask can only have a User Story as a parent.'
+                    USING ERRCODE = 'check_violation';
+            END IF;
+
+            -- UNION (not UNION ALL) so a cycle already in the data still terminates
+            IF EXISTS (
+                WITH RECURSIVE ancestors(id) AS (
+                    SELECT current_task.parent_id
+                    UNION
+                    SELECT t.parent_id FROM task t JOIN ancestors a ON t.id = a.id WHERE t.parent_id IS NOT NULL
+                )
+                SELECT 1 FROM ancestors WHERE id = current_task.id
+            ) THEN
+                RAISE EXCEPTION 'task hierarchy violation: A task cannot be its own ancestor.'
+                    USING ERRCODE = 'check_violation';
+            END IF;
+        END IF;
+
+        IF TG_OP = 'UPDATE' AND EXISTS (
+            SELECT 1 FROM task child
+            WHERE child.parent_id = current_task.id
+              AND NOT ((child.task_type = 'User Story' AND current_task.task_type = 'Epic')
+                    OR (child.task_type = 'Subtask' AND current_task.task_type = 'User Story'))
+        ) THEN
+            RAISE EXCEPTION 'task hierarchy violation: Task % has children that its type cannot hold.', current_task.id
+                USING ERRCODE = 'check_violation';
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS task_hierarchy_check ON task",
+    """
+    CREATE CONSTRAINT TRIGGER task_hierarchy_check
+    AFTER INSERT OR UPDATE OF parent_id, task_type ON task
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION task_check_hierarchy()
+    """,
+]
+
+_SQLITE_PARENT_CHECKS = """
+        SELECT RAISE(ABORT, 'task hierarchy violation: Parent task does not exist.')
+        WHERE NOT EXISTS (SELECT 1 FROM task WHERE id = NEW.parent_id);
+        SELECT RAISE(ABORT, 'task hierarchy violation: Epics cannot have a parent task.')
+        WHERE NEW.task_type = 'Epic';
+        SELECT RAISE(ABORT, 'task hierarchy violation: A User Story can only have an Epic as a parent.')
+        WHERE NEW.task_type = 'User Story' AND (SELECT task_type FROM task WHERE id = NEW.parent_id) <> 'Epic';
+        SELECT RAISE(ABORT, 'task hierarchy violation: A Subtask can only have a User Story as a parent.')
+        WHERE NEW.task_type = 'Subtask' AND (SELECT task_type FROM task WHERE id = NEW.parent_id) <> 'User Story';
+"""
+
+SQLITE_HIERARCHY_DDL = [
+    "DROP TRIGGER IF EXISTS task_hierarchy_insert",
+    f"""
+    CREATE TRIGGER task_hierarchy_insert
+    BEFORE INSERT ON task
+    FOR EACH ROW WHEN NEW.parent_id IS NOT NULL
+    BEGIN
+        {_SQLITE_PARENT_CHECKS}
+    END
+    """,
+    "DROP TRIGGER IF EXISTS task_hierarchy_update",
+    f"""
+    CREATE TRIGGER task_hierarchy_update
+    BEFORE UPDATE OF parent_id, task_type ON task
+    FOR EACH ROW WHEN NEW.parent_id IS NOT NULL
+    BEGIN
+        SELECT RAISE(ABORT, 'task hierarchy violation: A task cannot be its own ancestor.')
+        WHERE NEW.parent_id = NEW.id OR EXISTS (
+            SELECT 1 FROM task_closure WHERE ancestor_id = NEW.id AND descendant_id = NEW.parent_id
+        );
+        {_SQLITE_PARENT_CHECKS}
+    END
+    """,
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # The old CHECK constraint used subqueries, which Postgres rejects; drop it wherever it was created
+        op.execute("ALTER TABLE task DROP CONSTRAINT IF EXISTS task_hierarchy_constraint")
+        statements = POSTGRES_HIERARCHY_DDL
+    elif bind.dialect.name == 'sqlite':
+        statements = SQLITE_HIERARCHY_DDL
+    else:
+        return
+    for statement in statements:
+        op.execute(sa.text(statement))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS task_hierarchy_check ON task")
+        op.execute("DROP FUNCTION IF EXISTS task_check_hierarchy()")
+    elif bind.dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS task_hierarchy_insert")
+        op.execute("DROP TRIGGER IF EXISTS task_hierarchy_update")
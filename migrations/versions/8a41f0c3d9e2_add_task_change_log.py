@@ -0,0 +1,38 @@
+"""Add task change log for delta sync
+
+Revision ID: 8a41f0c3d9e2
+Revises: 5d2e8b41c7a3
+Create Date: 2025-03-19 09:41:27.551093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a41f0c3d9e2'
+down_revision = '5d2e8b41c7a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('task_change',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=True),
+    sa.Column('change_type', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('task_change', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_task_change_task_id'), ['task_id'], unique=False)
+        batch_op.create_index('ix_task_change_project_id_id', ['project_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('task_change', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_change_project_id_id')
+        batch_op.drop_index(batch_op.f('ix_task_change_task_id'))
+
+    op.drop_table('task_change')
@@ -0,0 +1,26 @@
+"""Keep the task version epoch in the database
+
+Revision ID: 9b4e7c2d1f36
+Revises: 6f1b3d8e2a49
+Create Date: 2025-04-08 11:03:18.264519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4e7c2d1f36'
+down_revision = '6f1b3d8e2a49'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task_change_version', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('epoch', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('task_change_version', schema=None) as batch_op:
+        batch_op.drop_column('epoch')
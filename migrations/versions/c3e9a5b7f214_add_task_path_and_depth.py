@@ -0,0 +1,49 @@
+"""Add materialized path and depth to task
+
+Revision ID: c3e9a5b7f214
+Revises: 8a41f0c3d9e2
+Create Date: 2025-03-20 14:05:12.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e9a5b7f214'
+down_revision = '8a41f0c3d9e2'
+branch_labels = None
+depends_on = None
+
+MAX_HIERARCHY_DEPTH = 16  # Epic > User Story > Subtask is 3; leaves room for legacy data
+
+
+def upgrade():
+    path_type = sa.String(length=255).with_variant(sa.String(length=255, collation="C"), "postgresql")
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('path', path_type, nullable=True))
+        batch_op.add_column(sa.Column('depth', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_task_path', ['path'], unique=False)
+
+    # Backfill: roots first, then one level per pass
+    op.execute(
+        "UPDATE task SET path = '/' || CAST(id AS VARCHAR(20)) || '/', depth = 0 "
+        "WHERE parent_id IS NULL"
+    )
+    bind = op.get_bind()
+    for _ in range(MAX_HIERARCHY_DEPTH):
+        result = bind.execute(sa.text(
+            "UPDATE task SET "
+            "path = (SELECT p.path FROM task p WHERE p.id = task.parent_id) || CAST(id AS VARCHAR(20)) || '/', "
+            "depth = (SELECT p.depth FROM task p WHERE p.id = task.parent_id) + 1 "
+            "WHERE path IS NULL AND parent_id IN (SELECT id FROM task WHERE path IS NOT NULL)"
+        ))
+        if result.rowcount == 0:
+            break
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_path')
+        batch_op.drop_column('depth')
+        batch_op.drop_column('path')
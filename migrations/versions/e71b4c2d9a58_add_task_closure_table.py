@@ -0,0 +1,51 @@
+"""Add task closure table
+
+Revision ID: e71b4c2d9a58
+Revises: c3e9a5b7f214
+Create Date: 2025-03-24 10:12:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e71b4c2d9a58'
+down_revision = 'c3e9a5b7f214'
+branch_labels = None
+depends_on = None
+
+MAX_HIERARCHY_DEPTH = 16  # Same bound as the path backfill
+
+
+def upgrade():
+    op.create_table('task_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['task.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['task.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    with op.batch_alter_table('task_closure', schema=None) as batch_op:
+        batch_op.create_index('ix_task_closure_descendant_id', ['descendant_id'], unique=False)
+
+    # Backfill: every task is its own ancestor at depth 0, then one level per pass
+    op.execute("INSERT INTO task_closure (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM task")
+    bind = op.get_bind()
+    for level in range(1, MAX_HIERARCHY_DEPTH + 1):
+        result = bind.execute(sa.text(
+            "INSERT INTO task_closure (ancestor_id, descendant_id, depth) "
+            "SELECT c.ancestor_id, t.id, c.depth + 1 FROM task t "
+            "JOIN task_closure c ON c.descendant_id = t.parent_id "
+            "WHERE c.depth = :previous_level"
+        ), {"previous_level": level - 1})
+        if result.rowcount == 0:
+            break
+
+
+def downgrade():
+    with op.batch_alter_table('task_closure', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_closure_descendant_id')
+
+    op.drop_table('task_closure')
@@ -0,0 +1,43 @@
+"""Store task sort_order as a fractional rank
+
+Revision ID: f4a8d61e0b93
+Revises: e71b4c2d9a58
+Create Date: 2025-03-26 09:41:58.227160
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a8d61e0b93'
+down_revision = 'e71b4c2d9a58'
+branch_labels = None
+depends_on = None
+
+RANK_STEP = 1024  # Matches app.tasks.ranking.RANK_STEP
+
+
+def upgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.alter_column('sort_order',
+               existing_type=sa.Integer(),
+               type_=sa.Float(),
+               existing_nullable=False)
+
+    # Spread the existing integer positions apart so moves can take midpoints
+    op.execute(f"UPDATE task SET sort_order = sort_order * {RANK_STEP}")
+
+
+def downgrade():
+    # Fractional ranks do not fit an integer: renumber densely, keeping the order
+    op.execute(
+        "UPDATE task SET sort_order = (SELECT r.position FROM "
+        "(SELECT id, ROW_NUMBER() OVER (ORDER BY sort_order, id) AS position FROM task) r "
+        "WHERE r.id = task.id)"
+    )
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.alter_column('sort_order',
+               existing_type=sa.Float(),
+               type_=sa.Integer(),
+               existing_nullable=False)
@@ -0,0 +1,114 @@
+"""
+Compares serializing tasks through the ORM (`Task.to_dict()`) with the
+row-based serializer in `app.tasks.serializers`.
+
+Runs against a throwaway SQLite database by default; set BENCHMARK_DATABASE_URL
+to benchmark another (empty) database instead.
+
+Usage:
+    python scripts_for_testing/benchmark_task_serializer.py [row_count ...]
+
+Defaults to 10,000 and 100,000 tasks.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+_, db_path = tempfile.mkstemp(suffix=".db")
+os.environ["DATABASE_URL"] = os.getenv("BENCHMARK_DATABASE_URL", f"sqlite:///{db_path}")
+os.environ["FLASK_ENV"] = "benchmark"  # Avoid the development SQL echo
+
+from app import create_app  # noqa: E402
+from app.extensions.db import db  # noqa: E402
+from app.models import Project, Contributor  # noqa: E402
+from app.tasks.models import Task  # noqa: E402
+from app.tasks.serializers import select_task_rows, serialize_task_rows  # noqa: E402
+
+BATCH_SIZE = 5000
+
+
+def create_schema():
+    """Creates the tables, without the subquery CHECK constraint SQLite cannot compile."""
+    for constraint in list(Task.__table__.constraints):
+        if getattr(constraint, "name", None) == "task_hierarchy_constraint":
+            Task.__table__.constraints.discard(constraint)
+    db.create_all()
+
+
+def seed_tasks(row_count):
+    """Bulk-inserts `row_count` tasks (1 epic per 10 tasks, the rest user stories)."""
+    db.session.execute(db.delete(Task))
+    project = Project(name=f"Benchmark {row_count}")
+    contributor = Contributor(name=f"Benchmark contributor {row_count}")
+    db.session.add_all([project, contributor])
+    db.session.commit()
+
+    rows = []
+    epic_id = None
+    for index in range(1, row_count + 1):
+        is_epic = index % 10 == 1
+        rows.append({
+            "id": index,
+            "name": f"Task {index}",
+            "description": "<p>Benchmark task</p>",
+            "task_type": "Epic" if is_epic else "User Story",
+            "parent_id": None if is_epic else epic_id,
+            "project_id": project.id,
+            "contributor_id": contributor.id,
+            "estimate_type": "story_points",
+            "story_points": 0 if is_epic else 3,
+            "sort_order": index,
+            "status": "Not Started",
+        })
+        if is_epic:
+            epic_id = index
+        if len(rows) >= BATCH_SIZE:
+            db.session.execute(Task.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Task.__table__.insert(), rows)
+    db.session.commit()
+
+
+def time_call(func):
+    db.session.expunge_all()  # Start each run with an empty identity map
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def run_benchmark(row_count):
+    seed_tasks(row_count)
+
+    orm_seconds, orm_tasks = time_call(
+        lambda: [task.to_dict() for task in Task.query.order_by(Task.sort_order).all()]
+    )
+    row_seconds, row_tasks = time_call(
+        lambda: serialize_task_rows(db.session.execute(select_task_rows().order_by(Task.sort_order)))
+    )
+
+    assert orm_tasks == row_tasks, "Row serializer output differs from Task.to_dict()"
+    print(
+        f"{row_count:>8} tasks | ORM to_dict: {orm_seconds:7.3f}s | "
+        f"row serializer: {row_seconds:7.3f}s | speedup: {orm_seconds / row_seconds:5.1f}x"
+    )
+
+
+def main():
+    row_counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    app = create_app()
+    try:
+        with app.app_context():
+            create_schema()
+            for row_count in row_counts:
+                run_benchmark(row_count)
+    finally:
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Adding the project root directory to the system path so pytest can find the app package
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# ✅ Must be set before `app.config` is imported: the config classes read the environment once
+_database_dir = tempfile.mkdtemp(prefix="pms-tests-")
+os.environ["FLASK_ENV"] = "testing"
+os.environ["TEST_DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+
+from app import create_app  # noqa: E402
+from app.extensions.db import db as _db  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    """One Flask app in testing mode, backed by a throwaway SQLite file."""
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app
+
+
+def clear_process_caches():
+    """Forgets what earlier tests cached in process: versions and counts restart with each new schema."""
+    from app.tasks import utils as task_utils
+    from app.tasks.tree_cache import task_tree_cache
+    from app.utils import common_utils
+
+    task_tree_cache.clear()
+    task_utils._task_count_cache.clear()
+    task_utils._task_metadata_cache.clear()
+    common_utils._portfolio_cache.clear()
+
+
+@pytest.fixture
+def db_session(app):
+    """A fresh schema (including the hierarchy triggers) for every test."""
+    with app.app_context():
+        _db.drop_all()
+        _db.create_all()
+        clear_process_caches()
+        yield _db.session
+        _db.session.remove()
+
+
+@pytest.fixture
+def client(app, db_session):
+    with app.test_client() as client:
+        yield client
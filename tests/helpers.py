@@ -0,0 +1,92 @@
+"""Factories and consistency checks shared by the task model tests."""
+from contextlib import contextmanager
+
+from sqlalchemy import event, select
+
+from app.extensions.db import db
+from app.models import Project
+from app.tasks.models import PROJECT_STATS_COLUMNS, ProjectStats, Task, TaskClosure, refresh_project_stats
+
+
+def make_project(name="Project"):
+    project = Project(name=name)
+    db.session.add(project)
+    db.session.commit()
+    return project
+
+
+def make_task(project, name, task_type, parent=None, story_points=0, **kwargs):
+    task = Task(
+        name=name,
+        project_id=project.id,
+        task_type=task_type,
+        parent_id=parent.id if parent else None,
+        estimate_type="story_points",
+        story_points=story_points,
+        **kwargs,
+    )
+    db.session.add(task)
+    db.session.commit()
+    return task
+
+
+def walk_hierarchy():
+    """
+    Derives the closure rows and `(path, depth)` of every task by walking `parent_id`.
+
+    Returns:
+        tuple: `({(ancestor_id, descendant_id, depth)}, {task_id: (path, depth)})`.
+    """
+    parents = dict(db.session.execute(select(Task.id, Task.parent_id)).all())
+    closure, paths = set(), {}
+    for task_id in parents:
+        chain = [task_id]
+        while parents[chain[-1]] is not None:
+            chain.append(parents[chain[-1]])
+        closure.update((ancestor_id, task_id, depth) for depth, ancestor_id in enumerate(chain))
+        paths[task_id] = ("/" + "".join(f"{node}/" for node in reversed(chain)), len(chain) - 1)
+    return closure, paths
+
+
+def assert_hierarchy_consistent():
+    """Asserts that `task_closure` and `path`/`depth` match a recursive walk of the tasks."""
+    expected_closure, expected_paths = walk_hierarchy()
+    closure = set(db.session.execute(
+        select(TaskClosure.ancestor_id, TaskClosure.descendant_id, TaskClosure.depth)
+    ).all())
+    paths = {row.id: (row.path, row.depth) for row in db.session.execute(select(Task.id, Task.path, Task.depth))}
+    assert closure == expected_closure
+    assert paths == expected_paths
+
+
+
+def read_project_stats():
+    """Returns `{project_id: {column: value}}` from the `project_stats` table."""
+    rows = db.session.execute(select(ProjectStats.__table__)).mappings()
+    return {row["project_id"]: {column: row[column] for column in PROJECT_STATS_COLUMNS} for row in rows}
+
+
+def assert_project_stats_consistent():
+    """Commits, then asserts that the maintained `project_stats` rows equal a rebuild from the tasks (rolled back)."""
+    db.session.commit()
+    maintained = read_project_stats()
+    refresh_project_stats(db.session.connection())
+    rebuilt = read_project_stats()
+    db.session.rollback()
+    assert maintained == rebuilt
+
+
+@contextmanager
+def count_selects():
+    """Collects the SELECTs sent to the database inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
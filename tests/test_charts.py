@@ -0,0 +1,70 @@
+import pytest
+
+from app.charts.cache import ChartCache, chart_cache, chart_key
+from app.charts.renderer import PLACEHOLDER_PNG, chart_renderer
+
+
+def render_test_chart(params):
+    """Stands in for a matplotlib renderer (module level, like the real ones)."""
+    return f"png:{params['value']}".encode()
+
+
+@pytest.fixture
+def chart_dir(app, monkeypatch, tmp_path):
+    """Keeps rendered charts out of the real instance folder and out of other tests."""
+    monkeypatch.setattr(app, "instance_path", str(tmp_path))
+    chart_cache.clear_memory()
+    yield tmp_path / "chart_cache"
+    chart_cache.clear_memory()
+
+
+def test_chart_key_depends_on_inputs_only():
+    assert chart_key("burnup", {"a": 1, "b": [1, 2]}) == chart_key("burnup", {"b": [1, 2], "a": 1})
+    assert chart_key("burnup", {"a": 1}) != chart_key("burnup", {"a": 2})
+    assert chart_key("burnup", {"a": 1}) != chart_key("breakdown", {"a": 1})
+
+
+def test_chart_cache_renders_once_and_shares_files(db_session, chart_dir):
+    calls = []
+
+    def render(params):
+        calls.append(params)
+        return render_test_chart(params)
+
+    key = chart_cache.get_or_render("test", {"value": 1}, render)
+    assert chart_cache.get_or_render("test", {"value": 1}, render) == key
+    assert calls == [{"value": 1}]
+
+    # ✅ Another worker (an empty memory cache) reads the file
+    assert ChartCache().get(key) == b"png:1"
+    assert (chart_dir / f"{key}.png").read_bytes() == b"png:1"
+    assert ChartCache().get("../" + key) is None
+
+
+def test_chart_route_serves_immutable_image(client, chart_dir):
+    key = chart_renderer.request("test", {"value": 2}, render_test_chart)
+
+    response = client.get(f"/charts/{key}.png")
+    assert response.status_code == 200
+    assert response.data == b"png:2"
+    assert response.headers["Content-Type"] == "image/png"
+    assert "immutable" in response.headers["Cache-Control"]
+
+    revalidated = client.get(f"/charts/{key}.png", headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_chart_route_placeholder_for_key_requested_elsewhere(client, chart_dir):
+    key = chart_key("test", {"value": 3})  # Requested through another worker, not rendered yet
+
+    response = client.get(f"/charts/{key}.png")
+    assert response.status_code == 202
+    assert response.data == PLACEHOLDER_PNG
+    assert response.headers["Cache-Control"] == "no-store"
+
+    # ✅ Once the other worker's render reaches the shared cache, it is served
+    ChartCache().put(key, b"png:3")
+    chart_cache.clear_memory()
+    assert client.get(f"/charts/{key}.png").data == b"png:3"
+
+    assert client.get("/charts/not-a-chart.png").status_code == 404
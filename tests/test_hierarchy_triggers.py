@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions.db import db
+from app.tasks.hierarchy_triggers import hierarchy_violation
+from app.tasks.models import Task
+from tests.helpers import make_project, make_task
+
+
+def set_task_type(task_id, task_type):
+    """Writes `task_type` with raw SQL, so only the database triggers check it."""
+    db.session.execute(text("UPDATE task SET task_type = :task_type WHERE id = :id"), {"id": task_id, "task_type": task_type})
+    db.session.commit()
+
+
+def test_trigger_rejects_subtask_under_epic(db_session):
+    project = make_project()
+    epic = make_task(project, "Epic", "Epic")
+
+    with pytest.raises(IntegrityError) as excinfo:
+        db.session.execute(
+            text("INSERT INTO task (name, task_type, project_id, parent_id) VALUES ('Bad', 'Subtask', :project_id, :parent_id)"),
+            {"project_id": project.id, "parent_id": epic.id},
+        )
+    db.session.rollback()
+    assert hierarchy_violation(excinfo.value) == "A Subtask can only have a User Story as a parent."
+
+
+@pytest.mark.parametrize("task_type, child_type, new_type", [
+    ("User Story", "Subtask", "Epic"),
+    ("User Story", "Subtask", "Subtask"),
+    ("Epic", "User Story", "User Story"),
+])
+def test_trigger_rejects_type_change_that_strands_children(db_session, task_type, child_type, new_type):
+    project = make_project()
+    parent = make_task(project, "Parent", task_type)
+    make_task(project, "Child", child_type, parent=parent)
+
+    with pytest.raises(IntegrityError) as excinfo:
+        set_task_type(parent.id, new_type)
+    db.session.rollback()
+    assert hierarchy_violation(excinfo.value) == "Task has children that its type cannot hold."
+
+
+def test_trigger_allows_type_change_without_children(db_session):
+    project = make_project()
+    story = make_task(project, "Parentless story", "User Story")
+
+    set_task_type(story.id, "Epic")
+
+    assert db.session.execute(text("SELECT task_type FROM task WHERE id = :id"), {"id": story.id}).scalar() == "Epic"
+
+
+@pytest.fixture
+def without_prechecks(app, monkeypatch):
+    """Leaves the hierarchy rules to the database triggers alone."""
+    monkeypatch.setitem(app.config, "TASK_HIERARCHY_PRECHECKS", False)
+
+
+def test_parent_route_reports_trigger_violation(client, without_prechecks):
+    project = make_project()
+    epic = make_task(project, "Epic", "Epic")
+    story = make_task(project, "Story", "User Story", parent=epic)
+    subtask = make_task(project, "Subtask", "Subtask", parent=story)
+
+    response = client.put(f"/api/tasks/{subtask.id}/parent", json={"new_parent_id": epic.id})
+
+    assert response.status_code == 400
+    assert response.json["error"] == "A Subtask can only have a User Story as a parent."
+    assert db.session.get(Task, subtask.id).parent_id == story.id
+
+
+def test_update_route_reports_trigger_violation(client, without_prechecks):
+    project = make_project()
+    epic = make_task(project, "Epic", "Epic")
+    story = make_task(project, "Story", "User Story", parent=epic)
+
+    response = client.patch(f"/api/tasks/{story.id}", json={"task_type": "Subtask"})
+
+    assert response.status_code == 400
+    assert response.json["error"] == "A Subtask can only have a User Story as a parent."
+
+
+def test_create_route_reports_trigger_violation(client, without_prechecks):
+    project = make_project()
+    epic = make_task(project, "Epic", "Epic")
+
+    response = client.post("/api/tasks", json={
+        "title": "Subtask under an epic", "project_id": project.id, "task_type": "Subtask",
+        "parent_id": epic.id, "priority": "Low",
+    })
+
+    assert response.status_code == 400
+    assert response.json["error"] == "A Subtask can only have a User Story as a parent."
+    assert Task.query.count() == 1
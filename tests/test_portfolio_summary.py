@@ -0,0 +1,41 @@
+from app.extensions.db import db
+from app.utils.common_utils import get_portfolio_summary
+from tests.helpers import make_project, make_task
+
+
+def build_portfolio():
+    """One project per bucket edge case; returns the project whose tasks are partly done."""
+    make_project("Empty")
+    unpointed = make_project("Unpointed")
+    make_task(unpointed, "No points", "Epic", story_points=None)
+    zero = make_project("Zero points")
+    make_task(zero, "Zero", "Epic", story_points=0)
+    done = make_project("Done")
+    make_task(done, "Done", "Epic", story_points=3, completed=True)
+    partial = make_project("Partial")
+    make_task(partial, "Done", "Epic", story_points=2, completed=True)
+    make_task(partial, "Open", "Epic", story_points=5)
+    return partial
+
+
+def test_portfolio_buckets_keep_original_definitions(client):
+    build_portfolio()
+
+    summary = get_portfolio_summary(use_cache=False)
+
+    assert summary["all_projects"] == 5
+    assert summary["ongoing_projects"] == 1  # Partial
+    assert summary["completed_projects"] == 2  # Done, and Zero points (0 of 0 points done)
+    assert summary["unstarted_projects"] == 2  # Empty, and Unpointed (no story points at all)
+
+
+def test_portfolio_summary_follows_task_writes(client):
+    partial = build_portfolio()
+    assert client.get("/api/stats/portfolio").json["ongoing_projects"] == 1
+
+    for task in partial.tasks:
+        task.completed = True
+    db.session.commit()
+
+    summary = client.get("/api/stats/portfolio").json
+    assert (summary["ongoing_projects"], summary["completed_projects"]) == (0, 3)
@@ -0,0 +1,46 @@
+from app.extensions.db import db
+from app.models import Contributor
+from app.tasks.models import Task
+from tests.helpers import (
+    assert_project_stats_consistent, count_selects, make_project, make_task, read_project_stats,
+)
+
+
+def test_cleanup_empty_tasks_updates_project_stats(client):
+    project = make_project()
+    make_task(project, "Kept epic", "Epic", story_points=4, description="Keep me")
+    make_task(project, "", "Epic", story_points=6, description="")
+
+    response = client.delete("/api/api/cleanup_empty_tasks")
+
+    assert response.status_code == 200
+    assert response.json["deleted_tasks"] == 1
+    assert Task.query.count() == 1
+    stats = read_project_stats()[project.id]
+    assert stats["task_count"] == 1
+    assert stats["total_story_points"] == 4
+    assert stats["epic_count"] == 1
+    assert_project_stats_consistent()
+
+
+def test_dashboard_reads_project_totals_without_per_project_queries(client, app, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, "instance_path", str(tmp_path))  # Rendered charts stay out of the repository
+    db.session.add(Contributor(name="Ada"))  # The contributor pie chart cannot draw 0 of 0
+    db.session.commit()
+
+    def add_projects(names):
+        for name in names:
+            project = make_project(name)
+            make_task(project, "Done", "Epic", story_points=2, completed=True)
+            make_task(project, "Open", "Epic", story_points=3)
+
+    add_projects(["A", "B"])
+    with count_selects() as two_projects:
+        assert client.get("/dashboard").status_code == 200
+    add_projects(["C", "D"])
+    with count_selects() as four_projects:
+        response = client.get("/dashboard")
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).count("Total Scope: 5 Story Points") == 4
+    assert len(four_projects) == len(two_projects)
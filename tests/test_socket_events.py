@@ -0,0 +1,63 @@
+import pytest
+
+from app import socketio
+from app.extensions.db import db
+from app.utils.socket_events import queue_event
+from tests.helpers import make_project, make_task
+
+
+@pytest.fixture
+def emitted(monkeypatch):
+    """Records the WebSocket events instead of sending them."""
+    events = []
+    monkeypatch.setattr(socketio, "emit", lambda event, payload, namespace="/": events.append((event, payload)))
+    return events
+
+
+def test_task_updates_of_one_request_become_one_event(client, emitted):
+    project = make_project()
+    task_id = make_task(project, "Epic", "Epic").id
+
+    response = client.patch(f"/api/tasks/{task_id}", json={"name": "Renamed", "status": "In Progress"})
+
+    assert response.status_code == 200, response.json
+    assert len(emitted) == 1
+    event, payload = emitted[0]
+    assert event == "update_task"
+    assert (payload["taskId"], payload["name"], payload["status"]) == (task_id, "Renamed", "In Progress")
+
+
+def test_rolled_back_batch_emits_nothing(client, emitted):
+    project = make_project()
+    first, second = make_task(project, "First", "Epic").id, make_task(project, "Second", "Epic").id
+
+    rejected = client.patch("/api/tasks", json=[
+        {"id": first, "changes": {"name": "Changed"}},
+        {"id": second, "changes": {"contributor_id": 9999}},
+    ])
+    assert rejected.status_code == 400
+    assert emitted == []
+
+    accepted = client.patch("/api/tasks", json=[
+        {"id": first, "changes": {"name": "Changed"}},
+        {"id": second, "changes": {"name": "Also changed"}},
+    ])
+    assert accepted.status_code == 200
+    assert [event for event, _ in emitted] == ["tasks_updated"]
+    assert {task["taskId"] for task in emitted[0][1]["tasks"]} == {first, second}
+
+
+def test_events_wait_for_the_commit(app, db_session, emitted):
+    project = make_project()
+    with app.test_request_context():
+        project.name = "Rolled back"
+        db.session.flush()
+        queue_event("dropped", {})
+        db.session.rollback()
+        queue_event("kept", {})
+        make_task(project, "Epic", "Epic")  # Commits
+        queue_event("already_committed", {}, committed=True)
+        assert emitted == []
+        app.process_response(app.response_class())
+
+    assert [event for event, _ in emitted] == ["kept", "already_committed"]
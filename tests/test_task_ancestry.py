@@ -0,0 +1,56 @@
+import pytest
+
+from app.extensions.db import db
+from app.tasks.ancestry import get_ancestor_ids, validate_reparent_batch
+from app.tasks.models import Task
+from tests.helpers import count_selects, make_project, make_task
+
+
+def test_ancestors_load_with_one_query(db_session):
+    project = make_project()
+    epic = make_task(project, "Epic", "Epic")
+    story = make_task(project, "Story", "User Story", parent=epic)
+    subtask = make_task(project, "Subtask", "Subtask", parent=story)
+    epic_id, story_id, subtask_id = epic.id, story.id, subtask.id
+
+    with count_selects() as statements:
+        assert get_ancestor_ids(subtask_id) == [story_id, epic_id]
+        assert get_ancestor_ids(story_id) == [epic_id]  # ✅ Answered from the session's parent map
+    assert len(statements) == 1
+    db.session.rollback()
+
+
+def test_reparent_batch_checks_moves_against_each_other(db_session):
+    project = make_project()
+    epic = make_task(project, "Epic", "Epic")
+    story = make_task(project, "Story", "User Story", parent=epic)
+    subtask = make_task(project, "Subtask", "Subtask", parent=story)
+
+    with pytest.raises(ValueError, match="own ancestor"):
+        validate_reparent_batch([(story.id, subtask.id)])
+    # ✅ Valid once the same batch moves the subtask out from under the story first
+    validate_reparent_batch([(subtask.id, epic.id), (story.id, subtask.id)])
+    db.session.rollback()
+
+
+def test_parent_types_are_looked_up_once_per_transaction(db_session):
+    project = make_project()
+    epic = make_task(project, "Epic", "Epic")
+    story = make_task(project, "Story", "User Story", parent=epic)
+    subtask = make_task(project, "Subtask", "Subtask", parent=story)
+    project_id, story_id, subtask_id = project.id, story.id, subtask.id
+
+    def new_subtask(name, parent_id):
+        return Task(name=name, project_id=project_id, task_type="Subtask", parent_id=parent_id)
+
+    with count_selects() as first:
+        new_subtask("New 0", story_id)
+    with count_selects() as rest:
+        for i in range(1, 5):
+            new_subtask(f"New {i}", story_id)
+
+    assert first
+    assert rest == []
+    with pytest.raises(ValueError):
+        new_subtask("Nested", subtask_id)
+    db.session.rollback()
@@ -0,0 +1,47 @@
+from app.extensions.db import db
+from app.tasks.models import Task
+from tests.helpers import assert_project_stats_consistent, make_project, make_task
+
+
+def test_batch_patch_applies_every_change(client):
+    project = make_project()
+    target = make_project("Target")
+    epic = make_task(project, "Epic", "Epic")
+    story = make_task(project, "Story", "User Story", parent=epic, story_points=3)
+    other = make_task(project, "Other epic", "Epic")
+    epic_id, story_id, other_id = epic.id, story.id, other.id
+
+    response = client.patch("/api/tasks", json=[
+        {"id": story_id, "changes": {"name": "Renamed", "status": "Completed"}},
+        {"id": other_id, "changes": {"project_id": target.id}},
+        {"id": epic_id, "changes": {"name": "Epic"}},  # Already the current value
+    ])
+
+    assert response.status_code == 200, response.json
+    assert {entry["id"]: entry["updated_fields"] for entry in response.json["updated"]} == {
+        story_id: ["completed", "completed_date", "name", "status"], other_id: ["project_id"],
+    }
+    assert response.json["unchanged"] == [epic_id]
+    story = db.session.get(Task, story_id)
+    assert (story.name, story.status) == ("Renamed", "Completed")
+    assert db.session.get(Task, other_id).project_id == target.id
+    assert_project_stats_consistent()
+
+
+def test_batch_patch_is_all_or_nothing(client):
+    project = make_project()
+    first = make_task(project, "First", "Epic")
+    second = make_task(project, "Second", "Epic")
+    first_id, second_id = first.id, second.id
+
+    invalid = client.patch("/api/tasks", json={"updates": [
+        {"id": first_id, "changes": {"name": "Changed"}},
+        {"id": second_id, "changes": {"contributor_id": 9999}},
+    ]})
+    missing = client.patch("/api/tasks", json=[{"id": 9999, "changes": {"name": "Ghost"}}])
+    unknown_field = client.patch("/api/tasks", json=[{"id": first_id, "changes": {"path": "/"}}])
+
+    assert invalid.status_code == 400
+    assert missing.status_code == 404
+    assert unknown_field.status_code == 400
+    assert db.session.get(Task, first_id).name == "First"
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from app.extensions.db import db
+from app.tasks.changes import prune_task_changes
+from app.tasks.models import Task, TaskChange
+from tests.helpers import make_project, make_task
+
+
+def add_tasks(project, *names):
+    """Creates tasks in one transaction; returns their ids."""
+    tasks = [
+        Task(name=name, project_id=project.id, task_type="Epic", estimate_type="story_points", story_points=0)
+        for name in names
+    ]
+    db.session.add_all(tasks)
+    db.session.commit()
+    return [task.id for task in tasks]
+
+
+def test_changes_since_listing_version(client):
+    project = make_project()
+    kept = make_task(project, "Kept", "Epic")
+    removed = make_task(project, "Removed", "Epic")
+    listing = client.get(f"/api/tasks?project_id={project.id}").json
+    since = listing["change_version"]
+
+    kept.name = "Renamed"
+    db.session.commit()
+    removed_id = removed.id
+    db.session.delete(removed)
+    db.session.commit()
+
+    response = client.get(f"/api/tasks/changes?since={since}&project_id={project.id}")
+    assert response.status_code == 200
+    assert [task["name"] for task in response.json["tasks"]] == ["Renamed"]
+    assert response.json["deleted"] == [removed_id]
+    assert response.json["version"] == since + 2
+    assert not response.json["has_more"]
+
+    # ✅ Resuming from the returned version yields nothing new
+    caught_up = client.get(f"/api/tasks/changes?since={response.json['version']}").json
+    assert (caught_up["tasks"], caught_up["deleted"]) == ([], [])
+
+
+def test_changes_of_one_commit_share_a_version_and_pages_keep_them_together(client):
+    project = make_project()
+    first = add_tasks(project, "a", "b", "c")
+    second = add_tasks(project, "d")
+
+    versions = dict(db.session.execute(select(TaskChange.task_id, TaskChange.version)).all())
+    assert len({versions[task_id] for task_id in first}) == 1
+    assert versions[second[0]] == versions[first[0]] + 1
+
+    # ✅ A limit inside the first commit's changes returns that whole commit, not part of it
+    page = client.get("/api/tasks/changes?since=0&limit=2").json
+    assert sorted(task["id"] for task in page["tasks"]) == first
+    assert page["has_more"]
+    page = client.get(f"/api/tasks/changes?since={page['version']}&limit=2").json
+    assert [task["id"] for task in page["tasks"]] == second
+    assert not page["has_more"]
+
+
+def test_pruned_changes_require_a_reload(client):
+    project = make_project()
+    add_tasks(project, "old")
+    add_tasks(project, "new")
+    old_version = TaskChange.latest_version() - 1
+    db.session.execute(
+        update(TaskChange).where(TaskChange.version == old_version)
+        .values(changed_at=datetime.now(timezone.utc) - timedelta(days=90))
+    )
+    db.session.commit()
+
+    assert prune_task_changes(retention_days=30) == 1
+    db.session.commit()
+
+    assert client.get("/api/tasks/changes?since=0").status_code == 410
+    response = client.get(f"/api/tasks/changes?since={old_version}")
+    assert response.status_code == 200
+    assert [task["name"] for task in response.json["tasks"]] == ["new"]
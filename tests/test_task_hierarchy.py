@@ -0,0 +1,135 @@
+from sqlalchemy import select
+
+from app.extensions.db import db
+from app.tasks.models import Task, TaskClosure
+from tests.helpers import assert_hierarchy_consistent, assert_project_stats_consistent, make_project, make_task
+
+
+def build_tree(project):
+    """Two epics; the first holds two stories with two subtasks each."""
+    epic_a = make_task(project, "Epic A", "Epic")
+    epic_b = make_task(project, "Epic B", "Epic")
+    stories = [make_task(project, f"Story {i}", "User Story", parent=epic_a, story_points=3) for i in range(2)]
+    subtasks = [
+        make_task(project, f"Subtask {i}.{k}", "Subtask", parent=story, story_points=1)
+        for i, story in enumerate(stories) for k in range(2)
+    ]
+    return epic_a, epic_b, stories, subtasks
+
+
+def test_create_builds_closure_and_paths(db_session):
+    project = make_project()
+    epic_a, _, stories, subtasks = build_tree(project)
+
+    assert_hierarchy_consistent()
+    assert (epic_a.path, epic_a.depth) == (f"/{epic_a.id}/", 0)
+    assert subtasks[0].path == f"/{epic_a.id}/{stories[0].id}/{subtasks[0].id}/"
+    assert subtasks[0].depth == 2
+
+
+def test_reparent_moves_whole_subtree(db_session):
+    project = make_project()
+    epic_a, epic_b, stories, subtasks = build_tree(project)
+
+    stories[0].parent_id = epic_b.id
+    db.session.commit()
+
+    assert_hierarchy_consistent()
+    descendants = set(db.session.execute(
+        select(TaskClosure.descendant_id).where(TaskClosure.ancestor_id == epic_b.id)
+    ).scalars())
+    assert descendants == {epic_b.id, stories[0].id, subtasks[0].id, subtasks[1].id}
+    assert db.session.get(Task, subtasks[0].id).path == f"/{epic_b.id}/{stories[0].id}/{subtasks[0].id}/"
+
+
+def test_orm_delete_clears_closure_rows(db_session):
+    project = make_project()
+    _, _, _, subtasks = build_tree(project)
+
+    db.session.delete(subtasks[3])
+    db.session.commit()
+
+    assert_hierarchy_consistent()
+
+
+def test_delete_subtree_removes_descendants(db_session):
+    project = make_project()
+    epic_a, epic_b, stories, subtasks = build_tree(project)
+    removed_ids = {stories[0].id, subtasks[0].id, subtasks[1].id}
+    kept_ids = {epic_a.id, epic_b.id, stories[1].id, subtasks[2].id, subtasks[3].id}
+
+    deleted = Task.delete_subtree([stories[0].id])
+    db.session.commit()
+
+    assert {task_id for task_id, _ in deleted} == removed_ids
+    assert_hierarchy_consistent()
+    assert set(db.session.execute(select(Task.id)).scalars()) == kept_ids
+
+
+def test_move_subtree_to_project_keeps_hierarchy(db_session):
+    project = make_project("Source")
+    target = make_project("Target")
+    epic_a, epic_b, _, _ = build_tree(project)
+
+    moved = Task.move_subtree_to_project([epic_a.id], target.id)
+    db.session.commit()
+
+    assert len(moved) == 7
+    assert_hierarchy_consistent()
+    project_ids = dict(db.session.execute(select(Task.id, Task.project_id)).all())
+    assert {task_id for task_id, project_id in project_ids.items() if project_id == target.id} == {
+        task_id for task_id, _ in moved
+    }
+    assert project_ids[epic_b.id] == project.id
+
+
+def test_set_subtree_archived_covers_descendants(db_session):
+    project = make_project()
+    epic_a, epic_b, _, _ = build_tree(project)
+
+    archived = Task.set_subtree_archived([epic_a.id])
+    db.session.commit()
+
+    assert len(archived) == 7
+    assert {task.id for task in Task.query.filter_by(is_archived=True)} == {task_id for task_id, _ in archived}
+    assert not db.session.get(Task, epic_b.id).is_archived
+    assert_hierarchy_consistent()
+
+
+def test_subtree_endpoint_lists_descendants_depth_first(client):
+    project = make_project()
+    epic_a, _, stories, subtasks = build_tree(project)
+    epic_ten = [make_task(project, f"Epic {i}", "Epic") for i in range(2)][-1]
+    # ✅ Its path "/10/..." starts with the text "/1" like epic A's subtree, but is not part of it
+    make_task(project, "Other story", "User Story", parent=epic_ten)
+    assert (epic_a.id, epic_ten.id) == (1, 10)
+
+    response = client.get(f"/api/tasks/{epic_a.id}/subtree?fields=id,parent_id")
+
+    assert response.status_code == 200
+    tasks = response.json["tasks"]
+    assert {task["id"] for task in tasks} == {epic_a.id} | {s.id for s in stories} | {t.id for t in subtasks}
+    positions = {task["id"]: index for index, task in enumerate(tasks)}
+    assert tasks[0]["id"] == epic_a.id
+    assert all(positions[task["parent_id"]] < positions[task["id"]] for task in tasks[1:])
+    assert response.json["rollup"] == {
+        "task_count": 6, "completed_count": 0, "story_points": 10, "completed_story_points": 0,
+    }
+
+
+def test_archive_route_covers_subtrees(client):
+    project = make_project()
+    epic_a, epic_b, stories, subtasks = build_tree(project)
+    subtree_ids = {epic_a.id} | {s.id for s in stories} | {t.id for t in subtasks}
+
+    archived = client.post("/api/tasks/archive", json={"task_ids": [epic_a.id]})
+    assert archived.status_code == 200
+    assert set(archived.json["task_ids"]) == subtree_ids
+    assert {task.id for task in Task.query.filter_by(is_archived=True)} == subtree_ids
+    assert_project_stats_consistent()
+
+    restored = client.post("/api/tasks/archive", json={"task_ids": [stories[0].id], "archived": False})
+    assert set(restored.json["task_ids"]) == {stories[0].id, subtasks[0].id, subtasks[1].id}
+    assert Task.query.filter_by(is_archived=True).count() == len(subtree_ids) - 3
+
+    assert client.post("/api/tasks/archive", json={"task_ids": "all"}).status_code == 400
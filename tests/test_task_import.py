@@ -0,0 +1,106 @@
+from sqlalchemy import func, select
+
+from app.extensions.db import db
+from app.tasks.models import Task, TaskSortCounter
+from app.tasks.ranking import RANK_STEP, allocate_rank, counter_scope
+from tests.helpers import (
+    assert_hierarchy_consistent, assert_project_stats_consistent, make_project, make_task, read_project_stats,
+)
+
+CSV_IMPORT = """temp_id,parent_temp_id,name,task_type,status,story_points
+e1,,Imported epic,Epic,Not Started,
+s1,e1,Imported story,User Story,In Progress,5
+t1,s1,First subtask,Subtask,Completed,2
+t2,s1,Second subtask,Subtask,Not Started,3
+"""
+
+
+def counter_rank(scope):
+    return db.session.execute(select(TaskSortCounter.last_rank).where(TaskSortCounter.scope == scope)).scalar()
+
+
+def max_rank(*conditions):
+    return db.session.execute(select(func.max(Task.sort_order)).where(*conditions)).scalar()
+
+
+def test_json_import_into_existing_tree(client):
+    project = make_project()
+    epic = make_task(project, "Existing epic", "Epic")
+    story = make_task(project, "Existing story", "User Story", parent=epic, story_points=1)
+    make_task(project, "Existing subtask", "Subtask", parent=story, story_points=1)
+
+    response = client.post("/api/tasks/import", json={"project_id": project.id, "tasks": [
+        {"temp_id": "s", "name": "New story", "task_type": "User Story", "parent_id": epic.id, "story_points": 8},
+        {"name": "New subtask", "task_type": "Subtask", "parent_temp_id": "s", "story_points": 2,
+         "status": "Completed"},
+        {"name": "Sibling subtask", "task_type": "Subtask", "parent_id": story.id, "story_points": 3},
+        {"name": "Second sibling", "task_type": "Subtask", "parent_id": story.id},
+        {"name": "New epic", "task_type": "Epic"},
+    ]})
+
+    assert response.status_code == 201, response.json
+    assert response.json["created"] == 5
+    assert_hierarchy_consistent()
+    assert_project_stats_consistent()
+    stats = read_project_stats()[project.id]
+    assert stats["task_count"] == 8
+    assert stats["total_story_points"] == 15
+    assert stats["completed_story_points"] == 2
+
+    # ✅ The counters of existing scopes moved past the imported ranks
+    assert counter_rank(counter_scope(story.id)) == max_rank(Task.parent_id == story.id)
+    assert counter_rank(counter_scope(epic.id)) == max_rank(Task.parent_id == epic.id)
+    assert counter_rank(counter_scope(project_id=project.id)) == max_rank(
+        Task.parent_id.is_(None), Task.project_id == project.id
+    )
+
+
+def test_csv_import_with_temp_id_parents(client):
+    project = make_project()
+
+    response = client.post(
+        f"/api/tasks/import?project_id={project.id}", data=CSV_IMPORT, content_type="text/csv"
+    )
+
+    assert response.status_code == 201, response.json
+    ids = response.json["ids"]
+    assert set(ids) == {"e1", "s1", "t1", "t2"}
+    story = db.session.get(Task, ids["s1"])
+    assert story.parent_id == ids["e1"]
+    assert {task.parent_id for task in Task.query.filter_by(task_type="Subtask")} == {ids["s1"]}
+    assert sorted(task.sort_order for task in story.children) == [RANK_STEP, 2 * RANK_STEP]
+    assert_hierarchy_consistent()
+    assert_project_stats_consistent()
+    assert read_project_stats()[project.id]["completed_story_points"] == 2
+
+    # ✅ A later task under an imported parent lands after the imported ones
+    assert allocate_rank(parent_id=story.id) > 2 * RANK_STEP
+    db.session.rollback()
+
+
+def test_import_rejects_bad_rows_and_writes_nothing(client):
+    project = make_project()
+    epic = make_task(project, "Existing epic", "Epic")
+    stats_before = read_project_stats()
+
+    invalid_rows = client.post("/api/tasks/import", json={"project_id": project.id, "tasks": [
+        {"name": "Valid story", "task_type": "User Story", "parent_id": epic.id},
+        {"name": "", "task_type": "Epic"},
+        {"name": "Bad type", "task_type": "Feature"},
+        {"name": "Bad points", "task_type": "Epic", "story_points": "many"},
+    ]})
+    invalid_hierarchy = client.post("/api/tasks/import", json={"project_id": project.id, "tasks": [
+        {"name": "Valid story", "task_type": "User Story", "parent_id": epic.id},
+        {"name": "Orphan", "task_type": "Subtask", "parent_temp_id": "missing"},
+        {"name": "Wrong parent", "task_type": "Subtask", "parent_id": epic.id},
+        {"name": "Epic with parent", "task_type": "Epic", "parent_id": epic.id},
+        {"name": "Unknown parent", "task_type": "User Story", "parent_id": 9999},
+    ]})
+
+    assert invalid_rows.status_code == 400
+    assert [error["row"] for error in invalid_rows.json["errors"]] == [2, 3, 4]
+    assert invalid_hierarchy.status_code == 400
+    assert [error["row"] for error in invalid_hierarchy.json["errors"]] == [2, 3, 4, 5]
+    assert Task.query.count() == 1
+    assert read_project_stats() == stats_before
+    assert_hierarchy_consistent()
@@ -0,0 +1,142 @@
+import json
+
+from sqlalchemy.orm import Session
+
+from app.extensions.db import db
+from app.tasks.models import Task
+from app.tasks.utils import TaskService
+from tests.helpers import make_project, make_task
+
+
+def rename_in_other_session(task_id, name):
+    """Commits a rename through a separate session, as another worker process would."""
+    with Session(db.engine) as other:
+        other.get(Task, task_id).name = name
+        other.commit()
+
+
+def test_unchanged_listing_returns_304(client):
+    project = make_project()
+    make_task(project, "Epic", "Epic")
+    url = f"/api/tasks?project_id={project.id}"
+
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    unchanged = client.get(url, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["ETag"] == etag
+
+
+def test_write_in_another_session_changes_etag_and_tree(client):
+    project = make_project()
+    other_project = make_project("Other")
+    epic = make_task(project, "Epic", "Epic")
+    other_epic = make_task(other_project, "Other epic", "Epic")
+    url = f"/api/tasks?project_id={project.id}&hierarchical=true"
+
+    first = client.get(url)
+    assert [task["name"] for task in first.json["tasks"]] == ["Epic"]
+    etag = first.headers["ETag"]
+
+    # ✅ Writes to another project leave this project's version alone
+    rename_in_other_session(other_epic.id, "Renamed other epic")
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    rename_in_other_session(epic.id, "Renamed epic")
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert [task["name"] for task in changed.json["tasks"]] == ["Renamed epic"]
+
+
+def test_project_list_change_moves_every_version(client):
+    project = make_project()
+    etag = client.get(f"/api/tasks?project_id={project.id}").headers["ETag"]
+
+    make_project("New")
+    TaskService.invalidate_task_metadata()
+
+    assert client.get(f"/api/tasks?project_id={project.id}", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_cursor_pages_cover_every_task_once(client):
+    project = make_project()
+    ranks = [3.0, 1.0, 2.0, 2.0, 1.0]  # ✅ Ties are broken by id
+    tasks = [make_task(project, f"Epic {i}", "Epic", sort_order=rank) for i, rank in enumerate(ranks)]
+    expected = [task.id for task in sorted(tasks, key=lambda task: (task.sort_order, task.id))]
+
+    for base_url in (f"/api/tasks?project_id={project.id}&per_page=2", "/api/tasks?per_page=2"):
+        seen, cursor = [], ""
+        while cursor is not None:
+            page = client.get(f"{base_url}&cursor={cursor}").json
+            seen.extend(task["id"] for task in page["tasks"])
+            assert page["pagination"]["total"] == 5
+            cursor = page["pagination"]["next_cursor"]
+        assert seen == expected
+
+
+def test_invalid_cursor_is_rejected(client):
+    project = make_project()
+    make_task(project, "Epic", "Epic")
+
+    response = client.get(f"/api/tasks?project_id={project.id}&cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_streamed_exports_match_the_listing(client):
+    project = make_project()
+    epic = make_task(project, "Epic", "Epic", sort_order=1.0)
+    make_task(project, "Story", "User Story", parent=epic, sort_order=2.0)
+    listed = client.get("/api/tasks").json["tasks"]
+
+    ndjson = client.get("/api/tasks?format=ndjson")
+    assert ndjson.mimetype == "application/x-ndjson"
+    assert [json.loads(line) for line in ndjson.get_data(as_text=True).splitlines()] == listed
+
+    array = client.get("/api/tasks?format=json-stream")
+    assert array.mimetype == "application/json"
+    assert json.loads(array.get_data(as_text=True)) == listed
+
+    assert client.get(f"/api/tasks?format=ndjson&project_id={project.id}&hierarchical=true").status_code == 400
+
+
+def test_sparse_fieldsets(client):
+    project = make_project()
+    epic = make_task(project, "Epic", "Epic")
+    make_task(project, "Story", "User Story", parent=epic)
+
+    flat = client.get(f"/api/tasks?project_id={project.id}&fields=name,status").json["tasks"]
+    assert [set(task) for task in flat] == [{"name", "status"}] * 2
+
+    tree = client.get(f"/api/tasks?project_id={project.id}&hierarchical=true&fields=id,name").json["tasks"]
+    assert tree == [{"id": epic.id, "name": "Epic", "children": [
+        {"id": epic.children[0].id, "name": "Story", "children": []},
+    ]}]
+
+    streamed = client.get("/api/tasks?format=ndjson&fields=id").get_data(as_text=True).splitlines()
+    assert [set(json.loads(line)) for line in streamed] == [{"id"}] * 2
+
+    story_id = epic.children[0].id
+    assert set(client.get(f"/api/tasks/{story_id}?fields=name,parent").json) == {"name", "parent"}
+
+    unknown = client.get(f"/api/tasks?project_id={project.id}&fields=name,password")
+    assert unknown.status_code == 400
+    assert "password" in unknown.json["error"]
+
+
+def test_metadata_endpoint_is_cached_and_revalidated(client):
+    project = make_project("Alpha")
+    make_task(project, "Epic", "Epic")
+
+    meta = client.get("/api/meta")
+    assert meta.json == {"task_types": ["all", "Epic"], "projects": [{"id": project.id, "name": "Alpha"}]}
+    assert client.get("/api/meta", headers={"If-None-Match": meta.headers["ETag"]}).status_code == 304
+
+    # ✅ Project writes invalidate the cached metadata
+    beta = make_project("Beta")
+    TaskService.invalidate_task_metadata()
+    changed = client.get("/api/meta", headers={"If-None-Match": meta.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.json["projects"][-1] == {"id": beta.id, "name": "Beta"}
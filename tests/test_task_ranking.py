@@ -0,0 +1,109 @@
+import pytest
+from sqlalchemy import event, select, text
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.extensions.db import db
+from app.tasks.models import Task
+from app.tasks.ranking import RANK_STEP, allocate_rank, rebalance_level, sibling_scope
+from tests.helpers import assert_hierarchy_consistent, make_project, make_task
+
+
+def make_level(project, ranks):
+    epic = make_task(project, "Epic", "Epic")
+    story = make_task(project, "Story", "User Story", parent=epic)
+    subtasks = [make_task(project, f"Subtask {i}", "Subtask", parent=story, sort_order=rank) for i, rank in enumerate(ranks)]
+    return story, subtasks
+
+
+def level_ranks(parent_id):
+    return db.session.execute(
+        select(Task.name, Task.sort_order).where(Task.parent_id == parent_id).order_by(Task.sort_order, Task.id)
+    ).all()
+
+
+def test_rebalance_level_spaces_ranks_evenly(db_session):
+    project = make_project()
+    story, subtasks = make_level(project, [1.0, 1.0005, 1.001])
+
+    renumbered = rebalance_level(sibling_scope(subtasks[0]))
+    db.session.commit()
+
+    assert len(renumbered) == 3
+    assert [rank for _, rank in level_ranks(story.id)] == [RANK_STEP, 2 * RANK_STEP, 3 * RANK_STEP]
+
+
+def test_rebalance_level_does_not_overwrite_concurrent_move(db_session):
+    project = make_project()
+    story, subtasks = make_level(project, [1.0, 1.0005, 1.001])
+    moved_id = subtasks[0].id
+    scope = sibling_scope(subtasks[0])
+    db.session.commit()
+
+    moves = []
+
+    def move_first_task_to_end(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE task SET sort_order") and not moves:
+            moves.append(moved_id)
+            # ✅ Another request moves a task after the level was read, before it is written
+            with db.engine.begin() as other:
+                other.execute(text("UPDATE task SET sort_order = 99 WHERE id = :id"), {"id": moved_id})
+
+    event.listen(db.engine, "before_cursor_execute", move_first_task_to_end)
+    try:
+        with pytest.raises(StaleDataError):
+            rebalance_level(scope)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", move_first_task_to_end)
+    db.session.rollback()
+
+    assert db.session.get(Task, moved_id).sort_order == 99
+
+
+def test_rebalance_level_moves_counter_past_reparented_tasks(db_session):
+    project = make_project()
+    epic = make_task(project, "Epic", "Epic")
+    story = make_task(project, "Story", "User Story", parent=epic)
+    other = make_task(project, "Other story", "User Story", parent=epic)
+    for name in ("a", "b", "c"):
+        make_task(project, name, "Subtask", parent=story, sort_order=allocate_rank(parent_id=story.id))
+    for name, rank in (("x", 1500.0), ("y", 2500.0)):
+        make_task(project, name, "Subtask", parent=other, sort_order=rank)
+
+    # ✅ Reparented tasks keep their rank, so the level now holds more tasks than its counter handed out
+    for task in Task.query.filter(Task.name.in_(["x", "y"])):
+        task.parent_id = story.id
+    db.session.commit()
+    rebalance_level(sibling_scope(db.session.get(Task, story.id).children[0]))
+    db.session.commit()
+
+    make_task(project, "NEW", "Subtask", parent=story, sort_order=allocate_rank(parent_id=story.id))
+    assert [name for name, _ in level_ranks(story.id)] == ["a", "x", "b", "y", "c", "NEW"]
+    assert level_ranks(story.id)[-1].sort_order == 6 * RANK_STEP
+
+
+def test_reorder_subtasks_writes_only_changed_rows(client):
+    project = make_project()
+    story, subtasks = make_level(project, [1.0, 2.0, 3.0])
+    other = make_task(project, "Other story", "User Story", parent=story.parent)
+    a, b, c = (task.id for task in subtasks)
+    story_id, other_id = story.id, other.id
+
+    response = client.post("/tasks/reorder_subtasks", json={"ordered_tasks": [
+        {"id": a, "sort_order": 1.0, "parent_id": story_id},  # Unchanged
+        {"id": b, "sort_order": 4.0, "parent_id": story_id},
+        {"id": c, "sort_order": 1.0, "parent_id": other_id},
+    ]})
+
+    assert response.status_code == 200, response.json
+    assert sorted(response.json["changed_tasks"]) == [b, c]
+    assert level_ranks(story_id) == [("Subtask 0", 1.0), ("Subtask 1", 4.0)]
+    assert level_ranks(other_id) == [("Subtask 2", 1.0)]
+    assert_hierarchy_consistent()
+
+    # ✅ A subtask cannot hold subtasks: the whole ordering is rejected, nothing is written
+    rejected = client.post("/tasks/reorder_subtasks", json={"ordered_tasks": [
+        {"id": a, "sort_order": 9.0, "parent_id": story_id},
+        {"id": b, "sort_order": 1.0, "parent_id": c},
+    ]})
+    assert rejected.status_code == 400
+    assert level_ranks(story_id) == [("Subtask 0", 1.0), ("Subtask 1", 4.0)]
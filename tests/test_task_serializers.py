@@ -0,0 +1,23 @@
+from app.extensions.db import db
+from app.models import Contributor
+from app.tasks.models import Task
+from app.tasks.serializers import select_task_rows, serialize_task_rows
+from tests.helpers import make_project, make_task
+
+
+def test_row_serializer_matches_to_dict(db_session):
+    project = make_project()
+    contributor = Contributor(name="Ada")
+    db.session.add(contributor)
+    db.session.commit()
+    epic = make_task(project, "Epic", "Epic", epic_priority="P1", story_points=5)
+    make_task(project, "Story", "User Story", parent=epic, story_points=3, contributor_id=contributor.id,
+              priority="High", completed=True)
+    timed = make_task(project, "Timed", "User Story", parent=epic, story_points=None)
+    timed.estimate_type = "time"
+    timed.time_estimate = 4
+    db.session.commit()
+
+    rows = db.session.execute(select_task_rows().order_by(Task.id)).all()
+
+    assert serialize_task_rows(rows) == [task.to_dict() for task in Task.query.order_by(Task.id)]